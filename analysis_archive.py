@@ -0,0 +1,63 @@
+import os
+import re
+import time
+
+import cache_store
+
+NAMESPACE = "archive"
+
+# A markdown table row whose second cell is a 1–5 score, e.g. "| **Clarity** | 4.5 | ... |"
+_SCORE_ROW = re.compile(r"^\|\s*\**\s*([^|*]+?)\s*\**\s*\|\s*_?\[?\s*(\d(?:\.\d+)?)\s*(?:/\s*5)?\s*\]?_?\s*\|", re.M)
+
+
+def parse_scores(text):
+    """Extract {aspect: score} from the markdown score tables of an analysis."""
+    scores = {}
+    for aspect, score in _SCORE_ROW.findall(text or ""):
+        value = float(score)
+        if 1 <= value <= 5 and aspect.lower() not in ("aspect", "criterion", "element"):
+            scores[aspect.strip()] = value
+    return scores
+
+
+def get(asset_key):
+    """Return the archived record of an asset, or None."""
+    return cache_store.read_json(NAMESPACE, asset_key)
+
+
+def record(asset_key, name, analysis_name, text, **fields):
+    """Store the result of one analysis for an asset, keeping results of other analyses.
+
+    Extra keyword fields (e.g. kind, phash) are stored on the record itself.
+    """
+    now = time.time()
+    entry = get(asset_key) or {"asset_key": asset_key, "name": name, "analyses": {}, "created": now}
+    entry["analyses"][analysis_name] = {"text": text, "scores": parse_scores(text), "created": now}
+    entry.update(fields)
+    entry["updated"] = now
+    cache_store.write_json(NAMESPACE, asset_key, entry)
+    return entry
+
+
+def update(asset_key, **fields):
+    """Set fields on an existing record. Returns the record, or None if the asset is not archived."""
+    entry = get(asset_key)
+    if entry is None:
+        return None
+    entry.update(fields)
+    cache_store.write_json(NAMESPACE, asset_key, entry)
+    return entry
+
+
+def asset_keys():
+    """Keys of every archived asset."""
+    directory = os.path.dirname(cache_store.cache_path(NAMESPACE, "_"))
+    return [filename[:-len(".json")] for filename in os.listdir(directory) if filename.endswith(".json")]
+
+
+def iter_records():
+    """Yield every archived record."""
+    for asset_key in asset_keys():
+        entry = get(asset_key)
+        if entry is not None:
+            yield entry
@@ -0,0 +1,131 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import cache_store
+
+# Node outputs kept in memory per DAG; older ones are still found in the disk cache
+MEMO_SIZE = int(os.getenv("ANALYSIS_DAG_MEMO_SIZE", "1024"))
+
+
+class AnalysisDAG:
+    """A small dependency graph of analysis steps, memoized per asset.
+
+    Each node is a function taking the run inputs plus the outputs of its dependencies
+    as keyword arguments. Memoized node outputs are kept in memory and in the disk cache,
+    keyed by node name and asset key, so upstream work runs once per asset. Nodes whose
+    dependencies are satisfied run in parallel. The in-memory memo keeps the memo_size most
+    recently used outputs.
+    """
+
+    def __init__(self, namespace="analysis_dag", max_workers=4, memo_size=MEMO_SIZE):
+        self.namespace = namespace
+        self.max_workers = max_workers
+        self.memo_size = memo_size
+        self.nodes = {}
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self._locks = {}  # only for node runs in progress
+        self._locks_guard = threading.Lock()
+
+    def node(self, name, deps=(), memoize=True):
+        """Decorator registering a node function."""
+        def register(func):
+            for dep in deps:
+                if dep not in self.nodes:
+                    raise ValueError(f"Node {name!r} depends on unknown node {dep!r}")
+            self.nodes[name] = {"func": func, "deps": tuple(deps), "memoize": memoize}
+            return func
+        return register
+
+    def _cache_key(self, name, asset_key):
+        return f"{name}-{asset_key}"
+
+    def _lock(self, name, asset_key):
+        with self._locks_guard:
+            return self._locks.setdefault((name, asset_key), threading.Lock())
+
+    def _memoize(self, key, value):
+        with self._memo_lock:
+            self._memo[key] = value
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def cached(self, name, asset_key):
+        """Return the memoized output of a node, or None."""
+        with self._memo_lock:
+            if (name, asset_key) in self._memo:
+                self._memo.move_to_end((name, asset_key))
+                return self._memo[(name, asset_key)]
+        value = cache_store.read_json(self.namespace, self._cache_key(name, asset_key))
+        if value is not None:
+            self._memoize((name, asset_key), value)
+        return value
+
+    def remember(self, name, asset_key, value):
+        """Store a node output computed elsewhere (e.g. parsed from a larger response)."""
+        self._memoize((name, asset_key), value)
+        if self.nodes[name]["memoize"]:
+            cache_store.write_json(self.namespace, self._cache_key(name, asset_key), value)
+
+    def forget(self, asset_key):
+        """Drop the in-memory outputs of an asset (the disk cache is left untouched)."""
+        with self._memo_lock:
+            for key in [key for key in self._memo if key[1] == asset_key]:
+                del self._memo[key]
+
+    def _closure(self, targets):
+        """Every node needed for the targets, grouped into levels that can run in parallel."""
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.nodes:
+                raise KeyError(f"Unknown analysis node {name!r}")
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.nodes[name]["deps"])
+
+        levels, done = [], set()
+        while len(done) < len(needed):
+            level = sorted(name for name in needed - done if set(self.nodes[name]["deps"]) <= done)
+            levels.append(level)
+            done.update(level)
+        return levels
+
+    def _run_node(self, name, asset_key, inputs, outputs):
+        node = self.nodes[name]
+        if node["memoize"]:
+            value = self.cached(name, asset_key)
+            if value is not None:
+                return value
+        try:
+            with self._lock(name, asset_key):
+                # Another thread may have finished the same node while we waited
+                if node["memoize"]:
+                    value = self.cached(name, asset_key)
+                    if value is not None:
+                        return value
+                value = node["func"](**inputs, **{dep: outputs[dep] for dep in node["deps"]})
+                if node["memoize"] and value is not None:
+                    self.remember(name, asset_key, value)
+                return value
+        finally:
+            # Later runs find the memoized output, so the lock is only needed while this run is in progress
+            with self._locks_guard:
+                self._locks.pop((name, asset_key), None)
+
+    def run(self, targets, asset_key, inputs):
+        """Compute the target nodes (and everything they depend on) for one asset.
+
+        Returns a dict with the output of every node that was needed.
+        """
+        outputs = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for level in self._closure(targets):
+                futures = {name: executor.submit(self._run_node, name, asset_key, inputs, outputs) for name in level}
+                for name, future in futures.items():
+                    outputs[name] = future.result()
+        return outputs
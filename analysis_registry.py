@@ -0,0 +1,149 @@
+import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import google.generativeai as genai
+
+import cache_store
+import metrics
+import tracing
+
+REGISTRY_PATH = os.getenv("ANALYSES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "analyses.json"))
+NAMESPACE = "analysis_results"
+FIELDS = ("prompt", "model", "output", "samples", "cache_ttl", "timeout")
+OUTPUT_TYPES = ("text", "json")
+MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "16"))
+
+# Model calls run on one pool and whole analyses (which wait on their calls) on another,
+# so a batch of analyses can never starve its own model calls
+_call_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="analysis-call")
+_analysis_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="analysis")
+_models = {}
+_models_lock = threading.Lock()
+
+
+class AnalysisTimeout(Exception):
+    """Raised when an analysis does not finish within its timeout."""
+
+
+def load(path=REGISTRY_PATH):
+    """Read the analysis definitions and every prompt template once.
+
+    Returns {"analyses": {name: definition}, "models": {policy: {"model_name", "generation_config"}}}.
+    Each definition has the FIELDS (defaults applied), its "name" and the prompt "template" text.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    models = spec.get("models", {})
+    analyses = {}
+    for name, entry in spec["analyses"].items():
+        definition = dict(spec.get("defaults", {}), **entry)
+        unknown = set(definition) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Analysis {name} has unknown fields: {', '.join(sorted(unknown))}")
+        missing = set(FIELDS) - set(definition)
+        if missing:
+            raise ValueError(f"Analysis {name} is missing: {', '.join(sorted(missing))}")
+        if definition["model"] not in models:
+            raise ValueError(f"Analysis {name} uses unknown model policy {definition['model']}")
+        if definition["output"] not in OUTPUT_TYPES:
+            raise ValueError(f"Analysis {name} has output {definition['output']}, expected one of {OUTPUT_TYPES}")
+        with open(os.path.join(base, definition["prompt"]), "r", encoding="utf-8") as f:
+            definition["template"] = f.read()
+        definition["name"] = name
+        analyses[name] = definition
+    return {"analyses": analyses, "models": models}
+
+
+def get_model(registry, policy):
+    """The GenerativeModel for a model policy, created once per process."""
+    with _models_lock:
+        if policy not in _models:
+            settings = registry["models"][policy]
+            _models[policy] = genai.GenerativeModel(
+                model_name=settings["model_name"],
+                generation_config=settings.get("generation_config"),
+            )
+        return _models[policy]
+
+
+def render(definition, **values):
+    """Fill the {placeholders} of a prompt template. Other braces are left untouched."""
+    prompt = definition["template"]
+    for key, value in values.items():
+        prompt = prompt.replace("{" + key + "}", str(value))
+    return prompt
+
+
+def _cache_key(definition, prompt, media):
+    fingerprint = json.dumps([definition["name"], definition["model"], definition["samples"], prompt]).encode()
+    return cache_store.content_hash(fingerprint + b"".join(part["data"] for part in media))
+
+
+def _response_text(response):
+    return response.candidates[0].content.parts[0].text.strip()
+
+
+def run(registry, name, media, media_type="image"):
+    """Run a registered analysis on model-ready media parts.
+
+    Samples are requested concurrently and merged the way the routes always did. Results are
+    cached per prompt and media for the definition's cache_ttl seconds (0 disables caching).
+    Returns {"content": str, "cached": bool} plus "data" (parsed samples) for json outputs.
+    """
+    with tracing.span("analysis", analysis=name, media_type=media_type):
+        result = _run(registry, name, media, media_type)
+        tracing.set_attributes(cached=result["cached"])
+    return result
+
+
+def _run(registry, name, media, media_type):
+    definition = registry["analyses"][name]
+    prompt = render(definition, media_type=media_type)
+    key = _cache_key(definition, prompt, media)
+    if definition["cache_ttl"]:
+        cached = cache_store.read_json(NAMESPACE, key)
+        if cached and time.time() - cached["created"] < definition["cache_ttl"]:
+            return dict(cached["result"], cached=True)
+
+    model = get_model(registry, definition["model"])
+    call = tracing.wrap(metrics.generate)
+    futures = [_call_pool.submit(call, model, [prompt, *media], name) for _ in range(definition["samples"])]
+    _, pending = wait(futures, timeout=definition["timeout"])
+    if pending:
+        for future in pending:
+            future.cancel()
+        raise AnalysisTimeout(f"{name} did not finish within {definition['timeout']} seconds")
+    responses = [future.result() for future in futures]
+
+    with metrics.stage(name, "parse"):
+        texts = [_response_text(response) for response in responses]
+        result = {"content": " ".join(texts)}
+        if definition["output"] == "json":
+            result["data"] = [json.loads(re.sub(r"^```(?:json)?\s*|\s*```$", "", text)) for text in texts]
+    if definition["cache_ttl"]:
+        cache_store.write_json(NAMESPACE, key, {"created": time.time(), "result": result})
+    return dict(result, cached=False)
+
+
+def submit(registry, name, media, media_type="image", trace_parent=None):
+    """Schedule run() on the analysis pool and return its future (traced under trace_parent if given)."""
+    return _analysis_pool.submit(tracing.wrap(run, trace_parent), registry, name, media, media_type)
+
+
+def run_many(registry, names, media, media_type="image"):
+    """Run several analyses on the same media concurrently.
+
+    Returns {name: result} where a failed analysis maps to {"error": message}.
+    """
+    futures = {name: submit(registry, name, media, media_type) for name in names}
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            results[name] = {"error": str(e)}
+    return results
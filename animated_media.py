@@ -0,0 +1,90 @@
+import io
+import hashlib
+import numpy as np
+from PIL import Image, ImageSequence, UnidentifiedImageError
+
+import video_timeline
+
+ANIMATED_MIME_TYPES = ("image/gif", "image/webp")
+DEFAULT_FRAME_MS = 100  # browsers' effective delay for GIF frames without one
+MAX_SAMPLED_FRAMES = 240
+
+
+def _open(source):
+    """Open a path, bytes or file object as a PIL image without reading every frame."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif hasattr(source, "seek"):
+        source.seek(0)
+    return Image.open(source)
+
+
+def is_animated(source):
+    """True if the source is an image with more than one frame (animated GIF or WebP)."""
+    try:
+        with _open(source) as image:
+            return bool(getattr(image, "is_animated", False)) and getattr(image, "n_frames", 1) > 1
+    except (UnidentifiedImageError, OSError):
+        return False
+    finally:
+        if hasattr(source, "seek"):
+            source.seek(0)
+
+
+def iter_frames(source, fps=video_timeline.SAMPLE_FPS, max_side=None, max_frames=MAX_SAMPLED_FRAMES):
+    """Lazily yield (frame_index, seconds, RGB frame) for the distinct frames of an animation.
+
+    Frames are sampled at no more than fps using each frame's own display duration, frames
+    identical to one already yielded are skipped, and iteration stops after max_frames, so
+    memory stays bounded however long the animation is.
+    """
+    seen = set()
+    yielded = 0
+    elapsed, next_sample = 0.0, 0.0
+    with _open(source) as image:
+        for index, frame in enumerate(ImageSequence.Iterator(image)):
+            duration = (frame.info.get("duration") or DEFAULT_FRAME_MS) / 1000.0
+            if elapsed >= next_sample:
+                rgb = frame.convert("RGB")
+                digest = hashlib.sha1(rgb.tobytes()).digest()
+                if digest not in seen:
+                    seen.add(digest)
+                    if max_side:
+                        rgb.thumbnail((max_side, max_side))
+                    yield index, elapsed, rgb
+                    yielded += 1
+                    next_sample = elapsed + 1.0 / fps
+                    if yielded >= max_frames:
+                        break
+            elapsed += duration
+
+
+def sample_frames(source):
+    """Animation counterpart of video_timeline.sample_frames: (times, RGB arrays, frame indices)."""
+    times, frames, indices = [], [], []
+    for index, seconds, frame in iter_frames(source, max_side=video_timeline.SAMPLE_SIDE):
+        indices.append(index)
+        times.append(seconds)
+        frames.append(np.asarray(frame))
+    if not frames:
+        raise Exception("No frames were extracted from the animation.")
+    return times, frames, indices
+
+
+def keyframes(source, num_frames=5):
+    """Full-resolution RGB keyframes: the middle frame of each shot, at most num_frames shots."""
+    times, frames, indices = sample_frames(source)
+    segments = video_timeline.bound_segments(video_timeline.detect_shots(times, frames), times, num_frames)
+    wanted = [indices[(first + last) // 2] for first, last in segments]
+    selected = []
+    with _open(source) as image:
+        for index in wanted:
+            image.seek(index)
+            selected.append(image.convert("RGB"))
+    return selected
+
+
+def analyze_animation(model, source, user_prompt, **kwargs):
+    """Shot-by-shot timeline analysis of an animation through the video timeline's map-reduce path."""
+    times, frames, _ = sample_frames(source)
+    return video_timeline.analyze_frames(model, times, frames, user_prompt, **kwargs)
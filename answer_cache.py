@@ -0,0 +1,83 @@
+import os
+import re
+import time
+import numpy as np
+
+import cache_store
+import rulebook_store
+
+NAMESPACE = "answer_cache"
+SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+MAX_ENTRIES_PER_SET = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))
+
+
+def normalize_question(question):
+    """Lower-case, strip punctuation and collapse whitespace so trivially different questions match."""
+    question = re.sub(r"[^\w\s]", " ", question.lower())
+    return " ".join(question.split())
+
+
+def _load(set_hash, rulebook_hashes):
+    return cache_store.read_json(NAMESPACE, set_hash) or {"rulebooks": sorted(rulebook_hashes), "entries": []}
+
+
+def lookup(rulebook_hashes, question, threshold=SIMILARITY_THRESHOLD, embed_fn=rulebook_store.embed_texts):
+    """Find a cached answer for a question asked against the same rulebook set.
+
+    Returns (entry, similarity, question_vector); entry is None on a miss. The question
+    vector is returned so a miss can be stored without embedding the question twice.
+    """
+    set_hash = rulebook_store.rulebook_set_hash(rulebook_hashes)
+    cache = _load(set_hash, rulebook_hashes)
+    normalized = normalize_question(question)
+    for entry in cache["entries"]:
+        if entry["normalized"] == normalized:
+            return entry, 1.0, None
+
+    vector = embed_fn([normalized], task_type="semantic_similarity")[0]
+    if not cache["entries"]:
+        return None, 0.0, vector
+    matrix = np.asarray([entry["vector"] for entry in cache["entries"]], dtype=np.float32)
+    similarities = matrix @ vector
+    best = int(np.argmax(similarities))
+    if similarities[best] >= threshold:
+        return cache["entries"][best], float(similarities[best]), vector
+    return None, float(similarities[best]), vector
+
+
+def store(rulebook_hashes, question, answer, vector=None, embed_fn=rulebook_store.embed_texts):
+    """Add an answer to the cache of a rulebook set, dropping the oldest entries past the limit."""
+    set_hash = rulebook_store.rulebook_set_hash(rulebook_hashes)
+    cache = _load(set_hash, rulebook_hashes)
+    normalized = normalize_question(question)
+    if vector is None:
+        vector = embed_fn([normalized], task_type="semantic_similarity")[0]
+    cache["entries"] = [entry for entry in cache["entries"] if entry["normalized"] != normalized]
+    cache["entries"].append({
+        "question": question,
+        "normalized": normalized,
+        "vector": [float(value) for value in vector],
+        "answer": answer,
+        "created": time.time(),
+    })
+    cache["entries"] = cache["entries"][-MAX_ENTRIES_PER_SET:]
+    cache_store.write_json(NAMESPACE, set_hash, cache)
+
+
+def invalidate(rulebook_hashes):
+    """Drop every cached answer for a rulebook set."""
+    set_hash = rulebook_store.rulebook_set_hash(rulebook_hashes)
+    path = cache_store.cache_path(NAMESPACE, f"{set_hash}.json")
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def invalidate_rulebook(rulebook_hash):
+    """Drop cached answers of every rulebook set that contains the given rulebook."""
+    directory = os.path.dirname(cache_store.cache_path(NAMESPACE, "_"))
+    for filename in os.listdir(directory):
+        if not filename.endswith(".json"):
+            continue
+        cache = cache_store.read_json(NAMESPACE, filename[:-len(".json")])
+        if cache is None or rulebook_hash in cache.get("rulebooks", []):
+            os.remove(os.path.join(directory, filename))
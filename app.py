@@ -11,6 +11,21 @@ import imageio
 import json
 import xml.etree.ElementTree as ET
 import base64
+import ocr_headlines
+from analysis_dag import AnalysisDAG
+import visual_metrics
+import saliency
+import palette
+import legibility
+import cache_store
+import analysis_archive
+import phash_index
+import similarity_index
+import score_model
+import archive_indexing
+import animated_media
+import video_timeline
+import pandas as pd
 
 # Load environment variables from .env file
 load_dotenv()
@@ -54,6 +69,9 @@ else:
 
     def extract_frames(video_file_path, num_frames=5):
         """Extracts frames from a video file using OpenCV."""
+        if animated_media.is_animated(video_file_path):
+            # Animated GIF/WebP uploads take the video path with one keyframe per shot
+            return animated_media.keyframes(video_file_path, num_frames)
         cap = cv2.VideoCapture(video_file_path)
         if not cap.isOpened():
             st.error(f"Failed to open video file {video_file_path}. Check if the file is corrupt or format is unsupported.")
@@ -80,6 +98,163 @@ else:
             return None
         return frames
 
+    def load_media_image(uploaded_file, is_image=True):
+        """Return an uploaded image, or the first frame of an uploaded video, as a PIL image."""
+        if is_image:
+            return Image.open(io.BytesIO(uploaded_file.read()))
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
+            tmp.write(uploaded_file.read())
+            tmp_path = tmp.name
+        frames = extract_frames(tmp_path)
+        if frames is None or not frames:  # Check if frames were extracted successfully
+            st.error("No frames were extracted from the video. Please check the video format.")
+            return None
+        return frames[0]
+
+    # Upstream extraction steps shared by every headline analysis, memoized per asset hash. The graph is
+    # built once per server process so its in-memory memo survives Streamlit reruns.
+    @st.cache_resource
+    def build_headline_dag(_model):
+        dag = AnalysisDAG(namespace="headline_dag")
+
+        @dag.node("ocr")
+        def ocr_node(image):
+            try:
+                return ocr_headlines.extract_headlines(image)
+            except Exception:
+                return None  # not memoized, so OCR is retried on the next run
+
+        @dag.node("headlines", deps=("ocr",))
+        def headlines_node(image, ocr):
+            if ocr and ocr.get("main"):
+                return {headline_type: ocr[headline_type] for headline_type in ocr_headlines.HEADLINE_TYPES}
+            # OCR found no headline: one image call extracts the headlines and the asset context together
+            prompt = (
+                "Extract the headlines from this marketing asset and translate non-English text into English. "
+                "Also identify the type of asset (e.g. social media post, display ad, email, flyer, landing page) "
+                "with its purpose in one short sentence, and its target audience (demographics, interests and needs) "
+                'in at most three sentences. Respond with JSON only: {"main": "<main headline or null>", '
+                '"image": "<image headline or null>", "supporting": "<supporting headline or null>", '
+                '"asset_type": "<asset type>", "target_audience": "<target audience>"}'
+            )
+            response = _model.generate_content([prompt, image], generation_config={"response_mime_type": "application/json"})
+            return json.loads(re.sub(r"^```(?:json)?\s*|\s*```$", "", response.text.strip()))
+
+        def text_context(field, question, ocr, headlines):
+            headlines = headlines or {}
+            if headlines.get(field):
+                return headlines[field]  # already answered by the headlines node's image call
+            # Headlines came from OCR: answer from the extracted text without sending the image
+            extraction = "\n".join(
+                f"- {ocr_headlines.HEADLINE_LABELS[headline_type]}: {headlines.get(headline_type) or 'Not present'}"
+                for headline_type in ocr_headlines.HEADLINE_TYPES
+            )
+            prompt = (
+                "Below is the text of a marketing asset, extracted with OCR.\n\n"
+                f"Headlines:\n{extraction}\n\nAll text, top to bottom:\n{(ocr or {}).get('all_text', '')}\n\n{question}"
+            )
+            return _model.generate_content([prompt]).text.strip()
+
+        # Independent of each other, so the DAG runs them in parallel
+        @dag.node("asset_type", deps=("ocr", "headlines"))
+        def asset_type_node(image, ocr, headlines):
+            question = ("Identify the type of this marketing asset (e.g. social media post, display ad, email, flyer, "
+                        "landing page) and its purpose. Respond in one short sentence.")
+            return text_context("asset_type", question, ocr, headlines)
+
+        @dag.node("target_audience", deps=("ocr", "headlines"))
+        def target_audience_node(image, ocr, headlines):
+            question = ("Describe the target audience of this marketing asset (demographics, interests and needs) "
+                        "in at most three sentences.")
+            return text_context("target_audience", question, ocr, headlines)
+
+        return dag
+
+    headline_dag = build_headline_dag(model)
+
+    def headline_context(uploaded_file, is_image=True):
+        """Run the memoized upstream headline nodes for an upload.
+
+        Returns (image, asset_key, outputs) or (None, None, None) if the media could not be read.
+        """
+        image = load_media_image(uploaded_file, is_image)
+        if image is None:
+            return None, None, None
+        asset_key = ocr_headlines.image_hash(image)
+        outputs = headline_dag.run(["headlines", "asset_type", "target_audience"], asset_key, {"image": image})
+        return image, asset_key, outputs
+
+    def seeded_headline_response(prompt, image, outputs, headline_type="main"):
+        """A text-only call seeded with the upstream extraction, or an image call when no such headline was found."""
+        headlines = outputs["headlines"] or {}
+        if headlines.get(headline_type):
+            extraction = dict(outputs["ocr"] or {"blocks": []}, **headlines)
+            seeded = ocr_headlines.seed_prompt(prompt, extraction)
+            seeded = (
+                f"Asset type: {outputs['asset_type']}\nTarget audience: {outputs['target_audience']}\n\n{seeded}"
+            )
+            return model.generate_content([seeded])
+        return model.generate_content([prompt, image])
+
+    def headline_response(prompt, uploaded_file, is_image=True, headline_type="main"):
+        """Run a headline prompt as a text-only call seeded with the memoized upstream extraction.
+
+        Falls back to sending the image when no headline of the requested type was extracted.
+        """
+        image, _, outputs = headline_context(uploaded_file, is_image)
+        if image is None:
+            return None
+        return seeded_headline_response(prompt, image, outputs, headline_type)
+
+    def record_analysis(uploaded_file, analysis_name, text):
+        """Archive an analysis result and index the asset for near-duplicate lookups."""
+        try:
+            data = uploaded_file.getvalue()
+            asset_key = cache_store.content_hash(data)
+            is_image_upload = uploaded_file.type.startswith("image/")
+            if not is_image_upload:
+                kind = "video"
+            else:
+                kind = "animation" if animated_media.is_animated(data) else "image"
+            image = Image.open(io.BytesIO(data)) if is_image_upload else None
+            warnings = archive_indexing.archive_analysis(asset_key, uploaded_file.name, analysis_name, text, kind, image)
+        except Exception as e:
+            st.warning(f"Could not archive the analysis: {e}")
+            return
+        for warning in warnings:
+            st.warning(warning)
+
+    def predicted_scores_markdown(prediction):
+        """Markdown table of locally predicted aspect scores."""
+        rows = "\n".join(
+            f"| {aspect} | {mean:.1f} | ±{std:.1f} |" for aspect, (mean, std) in prediction["scores"].items()
+        )
+        return "| Aspect | Predicted Score | Uncertainty |\n|---|---|---|\n" + rows
+
+    def legibility_rows(report):
+        """Table rows for a legibility report."""
+        return [
+            {
+                "Text": region["text"] or region["role"],
+                "Contrast": f"{region['contrast_ratio']:.1f}:1",
+                "Required": f"{region['required_ratio']}:1",
+                "Height": f"{region['relative_height']:.1%}",
+                "Result": "✅ Pass" if region["pass"] else "❌ Fail",
+            }
+            for region in report["regions"]
+        ]
+
+    def video_keyframe_legibility(uploaded_file):
+        """Legibility reports for the keyframes of an uploaded video, kept in the session across reruns."""
+        state_key = f"keyframe_legibility_{uploaded_file.name}_{uploaded_file.size}"
+        if state_key not in st.session_state:
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
+                tmp.write(uploaded_file.getvalue())
+                tmp_path = tmp.name
+            frames = extract_frames(tmp_path) or []
+            st.session_state[state_key] = [legibility.analyze(frame) for frame in frames]
+        return st.session_state[state_key]
+
     def analyze_video(uploaded_file):
         """Analyzes video by extracting frames and performing model inference on the first frame."""
         try:
@@ -126,24 +301,19 @@ else:
             "User interaction (High, Moderate, or Low), CTA presence (Yes or No), CTA clarity (Clear or Unclear)."
         )
         try:
-            if is_image:
-                image = Image.open(io.BytesIO(uploaded_file.read()))
-                response = model.generate_content([prompt, image])  # Assuming model.generate_content handles image input
-            else:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
-                    tmp.write(uploaded_file.read())
-                    tmp_path = tmp.name
-
-                frames = extract_frames(tmp_path)  # Assuming extract_frames extracts frames from video
-                if frames is None or not frames:
-                    st.error("No frames were extracted from the video. Please check the video format.")
-                    return None
+            image = load_media_image(uploaded_file, is_image)
+            if image is None:
+                return None
 
-                response = model.generate_content([prompt, frames[0]])  # Analyzing the first frame
+            # Give the model the locally measured metrics so it does not have to estimate them
+            metrics_context = visual_metrics.describe_metrics(visual_metrics.compute_metrics(image))
+            palette_context = palette.describe_palette(palette.extract_palette(image))
+            response = model.generate_content([metrics_context + palette_context + "\n" + prompt, image])
 
             attributes = ["text_amount", "color_usage", "visual_cues", "emotion", "focus", "customer_centric", "credibility", "user_interaction", "cta_presence", "cta_clarity"]
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "analyze_media", raw_response)
                 values = raw_response.split(',')
                 if len(attributes) == len(values):
                     structured_response = {attr: val.strip() for attr, val in zip(attributes, values)}
@@ -219,23 +389,19 @@ Present the results in a table with these columns:
 - **Final Optimization Strategy:** _[Offer specific, actionable suggestions for overall improvement based on the 20 aspects & Specific actions to enhance performance, ]_ 
         """
         try:
-            if is_image:
-                image = Image.open(io.BytesIO(uploaded_file.read()))
-                response = model.generate_content([prompt, image])
-            else:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
-                    tmp.write(uploaded_file.read())
-                    tmp_path = tmp.name
-
-                frames = extract_frames(tmp_path)
-                if frames is None or not frames:  # Check if frames were extracted successfully
-                    st.error("No frames were extracted from the video. Please check the video format.")
-                    return None
+            image = load_media_image(uploaded_file, is_image)
+            if image is None:
+                return None
 
-                response = model.generate_content([prompt, frames[0]])  # Using the first frame for analysis
+            # Ground the Attention aspect in the locally computed fixation order
+            attention_context = saliency.describe_fixations(saliency.analyze(image)["regions"])
+            palette_context = palette.describe_palette(palette.extract_palette(image))
+            legibility_context = legibility.describe_legibility(legibility.analyze(image))
+            response = model.generate_content([attention_context + palette_context + legibility_context + "\n" + prompt, image])
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "overall_analysis", raw_response)
                 st.write("Combined Marketing Analysis Results_V6:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -345,6 +511,7 @@ After the table, provide a **final summary** that includes:
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "Story_Telling_Analysis", raw_response)
                 st.write("Story Telling Analysis Results:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -448,6 +615,7 @@ At the end, provide a **concise summary** that includes:
                     response = model.generate_content([prompt, frames[0]])  # Using the first frame for analysis
                 if response.candidates:
                     raw_response = response.candidates[0].content.parts[0].text.strip()
+                    record_analysis(uploaded_file, "emotional_resonance", raw_response)
                     st.write("Emotional Resonance Analysis Results:")
                     st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
                 else:
@@ -596,6 +764,7 @@ At the end, provide:
 
                 if response.candidates:
                     raw_response = response.candidates[0].content.parts[0].text.strip()
+                    record_analysis(uploaded_file, "emotional_analysis", raw_response)
                     st.write("Emotional Resonance Analysis Results:")
                     st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
                 else:
@@ -734,6 +903,7 @@ At the end of the analysis, provide:
 
                 if response.candidates:
                     raw_response = response.candidates[0].content.parts[0].text.strip()
+                    record_analysis(uploaded_file, "Emotional_Appraisal_Models", raw_response)
                     st.write("Emotional Appraisal Mode Analysis Results:")
                     st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
                 else:
@@ -886,6 +1056,7 @@ After the **principle-by-principle** evaluation, provide:
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "behavioural_principles", raw_response)
                 st.write("Behavioural Principles Result::")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -1035,6 +1206,7 @@ After analyzing the content through **NLP principles**, provide:
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "nlp_principles_analysis", raw_response)
                 st.write("NLP Principles Result::")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -1129,6 +1301,7 @@ At the end of the evaluation, **provide a well-structured summary** with:
 
             if response.candidates and response.candidates[0].content.parts:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "text_analysis", raw_response)
                 st.write("Text Analysis Results:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -1261,6 +1434,7 @@ At the end of the evaluation, **provide a well-structured summary** with:
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "Text_Analysis_2", raw_response)
                 st.write("Text Analysis 2 Results:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -1397,6 +1571,7 @@ At the end of the evaluation, **provide a structured summary** with:
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "Text_Analysis_2_table", raw_response)
                 st.write("ext Analysis 2 - table Results:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -1515,32 +1690,30 @@ After completing the evaluation, propose **three alternative headline suggestion
     """
 
         try:
-            if is_image:
-                image = Image.open(io.BytesIO(uploaded_file.read()))
-                response = model.generate_content([prompt, image])
-            else:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
-                    tmp.write(uploaded_file.read())
-                    tmp_path = tmp.name
-
-                frames = extract_frames(tmp_path)
-                if frames is None or not frames:  # Check if frames were extracted successfully
-                    st.error("No frames were extracted from the video. Please check the video format.")
-                    return None
-
-                response = model.generate_content([prompt, frames[0]])  # Using the first frame for analysis
+            # Start from the memoized OCR headline extraction; the image is only sent when it found no main headline
+            analyzed_image, asset_key, outputs = headline_context(uploaded_file, is_image)
+            if analyzed_image is None:
+                return None
+            response = seeded_headline_response(prompt, analyzed_image, outputs, "main")
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "headline_analysis", raw_response)
                 st.session_state.headline_result = raw_response
                 st.write("Headline Analysis Results:")
                 st.markdown(raw_response, unsafe_allow_html=True)
 
-                headline_matches = re.findall(r'(Main Headline|Image Headline):\s*(.*)', raw_response)
+                headline_matches = re.findall(r'(Main Headline|Image Headline|Supporting Headline):\s*(.*)', raw_response)
                 extracted_headlines = {headline_type: headline_text for headline_type, headline_text in headline_matches}
 
                 if "Image Headline" in extracted_headlines:
                     st.session_state.headlines = extracted_headlines
+                    # Merge into the memoized extraction, keeping what this response does not restate
+                    merged = dict(outputs["headlines"] or {})
+                    for headline_type, label in ocr_headlines.HEADLINE_LABELS.items():
+                        if extracted_headlines.get(label):
+                            merged[headline_type] = extracted_headlines[label]
+                    headline_dag.remember("headlines", asset_key, merged)
                 else:
                     st.warning("Image headline not found in the results. Further analysis cannot be performed.")
                     st.session_state.headlines = None
@@ -1650,6 +1823,7 @@ Each headline type (**Main, Image, and Supporting**) should be **analyzed indepe
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "headline_detailed_analysis", raw_response)
                 st.write("Headline Optimization Report Results:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -1729,23 +1903,13 @@ Generate three alternative **optimized headlines** for the main headline.
 4. **Next Steps:** Offer a **step-by-step strategy** to **refine and test the improved headlines**.
     """
         try:
-            if is_image:
-                image = Image.open(io.BytesIO(uploaded_file.read()))
-                response = model.generate_content([prompt, image])
-            else:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
-                    tmp.write(uploaded_file.read())
-                    tmp_path = tmp.name
-
-                frames = extract_frames(tmp_path)
-                if frames is None or not frames:  # Check if frames were extracted successfully
-                    st.error("No frames were extracted from the video. Please check the video format.")
-                    return None
-
-                response = model.generate_content([prompt, frames[0]])  # Using the first frame for analysis
+            response = headline_response(prompt, uploaded_file, is_image, "main")
+            if response is None:
+                return None
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "main_headline_detailed_analysis", raw_response)
                 st.write("Headline Optimization Report Results:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -1828,23 +1992,13 @@ Generate **three alternative optimized headlines** for the **image headline**, e
 4. **Next Steps:** Offer a **step-by-step strategy** to **refine and test the improved headlines**.
     """
         try:
-            if is_image:
-                image = Image.open(io.BytesIO(uploaded_file.read()))
-                response = model.generate_content([prompt, image])
-            else:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
-                    tmp.write(uploaded_file.read())
-                    tmp_path = tmp.name
-
-                frames = extract_frames(tmp_path)
-                if frames is None or not frames:  # Check if frames were extracted successfully
-                    st.error("No frames were extracted from the video. Please check the video format.")
-                    return None
-
-                response = model.generate_content([prompt, frames[0]])  # Using the first frame for analysis
+            response = headline_response(prompt, uploaded_file, is_image, "image")
+            if response is None:
+                return None
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "image_headline_detailed_analysis", raw_response)
                 st.write("Headline Optimization Report Results:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -1927,23 +2081,13 @@ Generate **three alternative optimized headlines** for the **supporting headline
 4. **Next Steps:** Offer a **step-by-step strategy** to **refine and test the improved headlines**.
     """
         try:
-            if is_image:
-                image = Image.open(io.BytesIO(uploaded_file.read()))
-                response = model.generate_content([prompt, image])
-            else:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
-                    tmp.write(uploaded_file.read())
-                    tmp_path = tmp.name
-
-                frames = extract_frames(tmp_path)
-                if frames is None or not frames:  # Check if frames were extracted successfully
-                    st.error("No frames were extracted from the video. Please check the video format.")
-                    return None
-
-                response = model.generate_content([prompt, frames[0]])  # Using the first frame for analysis
+            response = headline_response(prompt, uploaded_file, is_image, "supporting")
+            if response is None:
+                return None
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "supporting_headline_detailed_analysis", raw_response)
                 st.write("Headline Optimization Report Results:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -2021,23 +2165,13 @@ Generate **three alternative optimized headlines**, ensuring:
 4. **Next Steps:** Offer a **step-by-step strategy** to **refine and test the improved headlines**.
     """
         try:
-            if is_image:
-                image = Image.open(io.BytesIO(uploaded_file.read()))
-                response = model.generate_content([prompt, image])
-            else:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
-                    tmp.write(uploaded_file.read())
-                    tmp_path = tmp.name
-
-                frames = extract_frames(tmp_path)
-                if frames is None or not frames:  # Check if frames were extracted successfully
-                    st.error("No frames were extracted from the video. Please check the video format.")
-                    return None
-
-                response = model.generate_content([prompt, frames[0]])  # Using the first frame for analysis
+            response = headline_response(prompt, uploaded_file, is_image, "main")
+            if response is None:
+                return None
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "main_headline_analysis", raw_response)
                 st.write("Headline Optimization Report Results:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -2114,23 +2248,13 @@ Generate **three alternative optimized headlines**, ensuring:
 4. **Next Steps:** Offer a **step-by-step strategy** to **refine and test the improved headlines**. 
     """
         try:
-            if is_image:
-                image = Image.open(io.BytesIO(uploaded_file.read()))
-                response = model.generate_content([prompt, image])
-            else:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
-                    tmp.write(uploaded_file.read())
-                    tmp_path = tmp.name
-
-                frames = extract_frames(tmp_path)
-                if frames is None or not frames:  # Check if frames were extracted successfully
-                    st.error("No frames were extracted from the video. Please check the video format.")
-                    return None
-
-                response = model.generate_content([prompt, frames[0]])  # Using the first frame for analysis
+            response = headline_response(prompt, uploaded_file, is_image, "image")
+            if response is None:
+                return None
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "image_headline_analysis", raw_response)
                 st.write("Headline Optimization Report Results:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -2207,23 +2331,13 @@ Generate **three alternative optimized headlines**, ensuring:
 4. **Next Steps:** Offer a **step-by-step strategy** to **refine and test the improved headlines**.
 """
         try:
-            if is_image:
-                image = Image.open(io.BytesIO(uploaded_file.read()))
-                response = model.generate_content([prompt, image])
-            else:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
-                    tmp.write(uploaded_file.read())
-                    tmp_path = tmp.name
-
-                frames = extract_frames(tmp_path)
-                if frames is None or not frames:  # Check if frames were extracted successfully
-                    st.error("No frames were extracted from the video. Please check the video format.")
-                    return None
-
-                response = model.generate_content([prompt, frames[0]])  # Using the first frame for analysis
+            response = headline_response(prompt, uploaded_file, is_image, "supporting")
+            if response is None:
+                return None
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "supporting_headline_analysis", raw_response)
                 st.write("Headline Optimization Report Results:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -2316,6 +2430,7 @@ For each persona, specify **which Facebook targeting options** should be selecte
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "meta_profile", raw_response)
                 st.write("Meta (Facebook) targeting Profile Result::")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -2413,6 +2528,7 @@ For each persona, specify **which LinkedIn targeting options** should be selecte
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "linkedin_profile", raw_response)
                 st.write("linkedin targeting Profile Result:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -2509,6 +2625,7 @@ For each persona, specify **which X targeting options** should be selected.
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "x_profile", raw_response)
                 st.write("X (formerly Twitter) targeting Profile Result::")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -2587,6 +2704,7 @@ Evaluate content using **various personality trait models**, analyzing how diffe
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "Personality_Trait_Assessment", raw_response)
                 st.write("Personality Trait Assessment Results::")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -2662,6 +2780,7 @@ Evaluate the content based on **MBTI personality types**, analyzing how differen
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "BMTI_Analysis", raw_response)
                 st.write("BMTI Analysis Results::")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -2783,23 +2902,16 @@ Evaluate the provided **image** against multiple marketing and design principles
 - Identify **key areas that need improvement** and suggest **general enhancements**.
 """
         try:
-            if is_image:
-                image = Image.open(io.BytesIO(uploaded_file.read()))
-                response = model.generate_content([prompt, image])
-            else:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp:
-                    tmp.write(uploaded_file.read())
-                    tmp_path = tmp.name
-
-                frames = extract_frames(tmp_path)
-                if frames is None or not frames:  # Check if frames were extracted successfully
-                    st.error("No frames were extracted from the video. Please check the video format.")
-                    return None
+            image = load_media_image(uploaded_file, is_image)
+            if image is None:
+                return None
 
-                response = model.generate_content([prompt, frames[0]])  # Using the first frame for analysis
+            palette_context = palette.describe_palette(palette.extract_palette(image))
+            response = model.generate_content([palette_context + "\n" + prompt, image])
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "Image_Analysis", raw_response)
                 st.write("Image Analysis::")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -2937,6 +3049,7 @@ Evaluate the **image** against multiple marketing and design principles. Each as
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "Image_Analysis_2", raw_response)
                 st.write("Image Analysis 2 ::")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -3074,6 +3187,7 @@ Evaluate the **image** against multiple **marketing, design, and psychological**
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "Image_Analysis_2_table", raw_response)
                 st.write("Image Analysis 2 Table ::")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -3308,6 +3422,7 @@ At the end of the evaluation, compute a **Motivational Score**, which is weighte
 
             if response.candidates:
                 raw_response = response.candidates[0].content.parts[0].text.strip()
+                record_analysis(uploaded_file, "motivation", raw_response)
                 st.write("Motivation Results:")
                 st.markdown(raw_response, unsafe_allow_html=True)  # Assuming the response is in HTML table format
             else:
@@ -3414,222 +3529,423 @@ with st.sidebar:
     st.markdown("---")
     custom_prompt = st.text_area("Custom Prompt (Optional):")
     custom_prompt_button = st.button("Analyze with Custom Prompt")
+    st.markdown("---")
+    with st.expander("🔍 Similar Past Creatives"):
+        similar_query = st.file_uploader("Find past ads that look like:", type=["png", "jpg", "jpeg"], key="similar_query")
+        similar_k = st.slider("Results", 1, 20, 5, key="similar_k")
+        if similar_query:
+            try:
+                matches = similarity_index.similar_creatives(Image.open(similar_query), k=similar_k)
+                if not matches:
+                    st.info("No analyzed creatives in the archive yet.")
+                for match in matches:
+                    if os.path.exists(match["thumbnail"]):
+                        st.image(match["thumbnail"], width=120)
+                    score_text = f" · mean score {match['mean_score']:.1f}/5" if match["mean_score"] is not None else ""
+                    st.markdown(f"**{match['name']}** — similarity {match['similarity']:.2f}{score_text}")
+                    for analysis_name, aspects in match["scores"].items():
+                        st.caption(f"{analysis_name}: " + ", ".join(f"{aspect} {score:g}" for aspect, score in aspects.items()))
+            except Exception as e:
+                st.error(f"Similarity search failed: {e}")
+    triage_with_score_model = st.checkbox(
+        "🎯 Triage Overall Analysis with the local score model",
+        value=False,
+        help="Confident local predictions are shown instead of calling the LLM; uncertain assets still get the full analysis.",
+    )
+    if st.button("Retrain score model"):
+        with st.spinner("Training the score model on archived analyses..."):
+            trained_on = score_model.train()
+        if trained_on:
+            st.success(f"Score model trained on {trained_on} analyzed assets.")
+        else:
+            st.warning(f"At least {score_model.MIN_TRAINING_ASSETS} assets with an overall analysis are needed to train.")
+    reuse_archived_analyses = st.checkbox(
+        "♻️ Reuse archived analyses of identical or near-duplicate assets",
+        value=True,
+        help="Matches are found with a perceptual hash, so re-exported or slightly cropped creatives reuse earlier results.",
+    )
 # --- Main Content Area ---
 
 # File Uploader with Enhanced UI
 uploaded_files = st.file_uploader(
     "Upload Marketing Media (Image or Video):",
     accept_multiple_files=True,
-    type=["png", "jpg", "jpeg", "mp4", "avi"],
-    help="Supported formats: PNG, JPG, JPEG, MP4, AVI",
+    type=["png", "jpg", "jpeg", "gif", "webp", "mp4", "avi"],
+    help="Supported formats: PNG, JPG, JPEG, GIF, WebP (static or animated), MP4, AVI",
     key="general_media_uploader"  # Unique key for this uploader
 )
 
 # Display Uploaded Media (Responsive Design)
 for uploaded_file in uploaded_files:
-    is_image = uploaded_file.type in ["image/png", "image/jpg", "image/jpeg"]
+    # Animated GIF/WebP ads go through the video path (keyframes per shot); static ones are images
+    is_animated = uploaded_file.type in animated_media.ANIMATED_MIME_TYPES and animated_media.is_animated(uploaded_file)
+    is_image = uploaded_file.type in ["image/png", "image/jpg", "image/jpeg", "image/gif", "image/webp"] and not is_animated
 
     with st.container():  # Use container for better layout
+        asset_key = cache_store.content_hash(uploaded_file.getvalue())
+        reusable_analyses = {}
+        prediction = None
+        own_record = analysis_archive.get(asset_key)
+        if own_record:
+            for analysis_name, archived in own_record["analyses"].items():
+                reusable_analyses[analysis_name] = (archived, "a previous analysis of this exact file")
         # Display the uploaded media
         if is_image:
             image = Image.open(uploaded_file)
+            original_image = image.convert("RGB")  # full-resolution copy; resize_image thumbnails in place
+            try:
+                metrics = visual_metrics.compute_metrics(original_image)
+            except Exception as e:
+                metrics = None
+                st.warning(f"Could not compute visual metrics: {e}")
             image = resize_image(image)  # Resize for display
             st.image(image, caption="Uploaded Image", use_container_width='auto')
+
+            # Instant local measurements, shown before any model call
+            if metrics:
+                labels = visual_metrics.label_metrics(metrics)
+                with st.expander(f"⚡ Instant Visual Metrics ({metrics['elapsed_ms']:.0f} ms)", expanded=True):
+                    cols = st.columns(4)
+                    cols[0].metric("Colourfulness", f"{metrics['colourfulness']:.0f}", labels["color_usage"], delta_color="off")
+                    cols[1].metric("RMS Contrast", f"{metrics['rms_contrast']:.2f}", labels["visual_cues"], delta_color="off")
+                    cols[2].metric("Text Coverage", f"{metrics['text_region_ratio']:.0%}", labels["text_amount"], delta_color="off")
+                    cols[3].metric("Focus Offset", f"{metrics['focus_offset']:.2f}", labels["focus"], delta_color="off")
+                    cols = st.columns(4)
+                    cols[0].metric("Edge Density", f"{metrics['edge_density']:.3f}")
+                    cols[1].metric("Palette Entropy", f"{metrics['palette_entropy']:.2f}")
+                    cols[2].metric("Text Regions", metrics["text_regions"])
+                    cols[3].metric("Focus Spread", f"{metrics['focus_spread']:.2f}")
+
+            # Near-duplicates (re-exports, recompressions, minor crops) of already analyzed assets
+            try:
+                for duplicate, distance, _ in phash_index.get_index().find(original_image, exclude=asset_key):
+                    duplicate_record = analysis_archive.get(duplicate["key"])
+                    if not duplicate_record or not duplicate_record["analyses"]:
+                        continue
+                    source = f"near-duplicate {duplicate_record['name']} (pHash distance {distance})"
+                    for analysis_name, archived in duplicate_record["analyses"].items():
+                        reusable_analyses.setdefault(analysis_name, (archived, source))
+                    with st.expander(f"♻️ Near-duplicate of {duplicate_record['name']} (distance {distance})", expanded=False):
+                        chosen = st.selectbox("Archived analysis", list(duplicate_record["analyses"]), key=f"dup_{asset_key}_{duplicate['key']}")
+                        st.markdown(duplicate_record["analyses"][chosen]["text"], unsafe_allow_html=True)
+            except Exception as e:
+                st.warning(f"Could not search for near-duplicates: {e}")
+
+            # Instant score prediction from the local model trained on past overall analyses
+            try:
+                prediction = score_model.predict(score_model.extract_features(original_image))
+                if prediction:
+                    verdict = "LLM analysis recommended" if prediction["needs_llm"] else "confident prediction"
+                    with st.expander(f"🎯 Predicted Scores (±{prediction['uncertainty']:.2f}, {verdict})", expanded=False):
+                        st.markdown(predicted_scores_markdown(prediction))
+            except Exception as e:
+                st.warning(f"Could not predict scores: {e}")
+
+            # Dominant palette and brand-colour compliance
+            try:
+                colours = palette.extract_palette(original_image)
+                st.markdown(palette.swatches_html(colours), unsafe_allow_html=True)
+                caption = " · ".join(f"{swatch['hex']} {swatch['coverage']:.0%}" for swatch in colours["swatches"])
+                if colours["brand_checked"]:
+                    caption += f" — off-brand coverage {colours['off_brand_coverage']:.0%}"
+                st.caption(caption)
+            except Exception as e:
+                st.warning(f"Could not extract the colour palette: {e}")
+
+            # WCAG contrast and minimum text height for every detected text region
+            try:
+                report = legibility.analyze(original_image)
+                with st.expander(f"🔤 Text Legibility ({report['pass_rate']:.0%} of regions pass)", expanded=False):
+                    if report["regions"]:
+                        st.dataframe(legibility_rows(report), use_container_width=True)
+                    else:
+                        st.write("No text regions detected.")
+            except Exception as e:
+                st.warning(f"Could not check text legibility: {e}")
+
+            # Attention heatmap and predicted fixation order from the local saliency model
+            try:
+                attention = saliency.analyze(original_image)
+                with st.expander("👁️ Attention Heatmap & Fixation Order", expanded=False):
+                    heatmap = saliency.heatmap_overlay(original_image, attention["map"], attention["regions"])
+                    st.image(resize_image(heatmap, max_size=(600, 600)), caption="Spectral residual saliency")
+                    for region in attention["regions"]:
+                        st.markdown(f"{region['rank']}. **{region['kind']}** — {region['label']} (saliency {region['score']:.2f})")
+            except Exception as e:
+                st.warning(f"Could not compute the attention heatmap: {e}")
+        elif is_animated:
+            st.image(uploaded_file.getvalue(), caption="Uploaded Animation")
+            if st.button("🎞️ Analyze Animation Timeline", key=f"animation_timeline_{asset_key}"):
+                try:
+                    with st.spinner("Analyzing the animation shot by shot..."):
+                        timeline = animated_media.analyze_animation(
+                            model, uploaded_file.getvalue(),
+                            "Evaluate this animated display ad: pacing, message order, and whether the key message and CTA are visible long enough.",
+                        )
+                    times, series = video_timeline.timeline_series(timeline["segments"], step=0.1)
+                    st.line_chart(pd.DataFrame(series, index=pd.Index(times, name="Seconds")))
+                    st.caption(f"{len(timeline['segments'])} shots, {timeline['calls']} model calls")
+                    st.markdown(timeline["summary"])
+                except Exception as e:
+                    st.error(f"Failed to analyze the animation: {e}")
         else:
             st.video(uploaded_file, format="video/mp4")
+            try:
+                reports = video_keyframe_legibility(uploaded_file)
+                with st.expander(f"🔤 Keyframe Text Legibility ({len(reports)} keyframes)", expanded=False):
+                    for index, report in enumerate(reports, start=1):
+                        st.markdown(f"**Keyframe {index}** — {report['pass_rate']:.0%} of text regions pass")
+                        if report["regions"]:
+                            st.dataframe(legibility_rows(report), use_container_width=True)
+            except Exception as e:
+                st.warning(f"Could not check keyframe legibility: {e}")
 
         # Analysis Results
         uploaded_file.seek(0)  # Reset file pointer for re-analysis
 
         # Check which analysis button was clicked and call the corresponding function
-        if basic_analysis:
-            with st.spinner("Performing basic analysis..."):
-                result = analyze_media(uploaded_file, is_image)
-                if result:
-                    st.write("## Basic Analysis Results:")
-                    st.markdown(result, unsafe_allow_html=True)
-        if emotional_resonance_button:
-            with st.spinner("Performing Emotional Resonance Analysis..."):
-                result = emotional_resonance(uploaded_file, is_image)
-                if result:
-                    st.write("## Emotional Resonance Results:")
-                    st.markdown(result)
-        if emotional_analysis_button:
-            with st.spinner("Performing Emotional Analysis..."):
-                result = emotional_analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Emotional Analysis Results:")
-                    st.markdown(result)
-        if Emotional_Appraisal_Models_button:
-            with st.spinner("Performing Emotional Appraisal Models Analysis..."):
-                result = Emotional_Appraisal_Models(uploaded_file, is_image)
-                if result:
-                    st.write("## Emotional Appraisal Models Analysis Results:")
-                    st.markdown(result)
-        elif flash_analysis_button:
-            with st.spinner("Performing Flash analysis..."):
-                result = flash_analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Flash Analysis Results:")
-                    st.markdown(result)  # Display results directly
-        elif behavioural_principles_button:
-            with st.spinner("Analyzing Behavioral Principles..."):
-                result = behavioural_principles(uploaded_file, is_image)
-                if result:
-                    st.write("## Behavioral Principles Analysis Results:")
-                    st.markdown(result, unsafe_allow_html=True)
-        elif nlp_principles_analysis_button:
-            with st.spinner("Analyzing NLP Principles..."):
-                result = nlp_principles_analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## NLP Principles Analysis Results:")
-                    st.markdown(result, unsafe_allow_html=True)
-        elif overall_analysis_button:
-            with st.spinner("Performing overall marketing analysis..."):
-                result = overall_analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Overall Marketing Analysis Results:")
-                    st.markdown(result)
-        elif motivation_button:
-            with st.spinner("Performing Motivation Analysis..."):
-                result = motivation(uploaded_file, is_image)
-                if result:
-                    st.write("## Motivation Analysis Results:")
-                    st.markdown(result)
-        elif Story_Telling_Analysis_button:
-            with st.spinner("Performing Story Telling Analysis..."):
-                result = Story_Telling_Analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Overall Story Telling Analysis Results:")
-                    st.markdown(result)
-        elif text_analysis_button:
-            with st.spinner("Performing text analysis..."):
-                result = text_analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Text Analysis Results:")
-                    st.markdown(result)
-        elif text_analysis_2_button:
-            with st.spinner("Performing Text Analysis 2..."):
-                result = Text_Analysis_2(uploaded_file, is_image)
-                if result:
-                    st.write("## Text Analysis 2 Results:")
-                    st.markdown(result)
-        elif text_analysis_2_table_button:
-            with st.spinner("Performing Text Analysis 2 - Table Button..."):
-                result = Text_Analysis_2_table(uploaded_file, is_image)
-                if result:
-                    st.write("## Text Analysis 2 - Table Results:")
-                    st.markdown(result)
-        elif Image_Analysis_2_button:
-            with st.spinner("Performing Image Analysis 2..."):
-                result = Image_Analysis_2(uploaded_file, is_image)
-                if result:
-                    st.write("## TImage Analysis 2 Results:")
-                    st.markdown(result)
-        elif Image_Analysis_2_table_button:
-            with st.spinner("Performing Image Analysis 2 table..."):
-                result = Image_Analysis_2_table(uploaded_file, is_image)
-                if result:
-                    st.write("## Image Analysis 2 table Results:")
-                    st.markdown(result)                    
-        elif headline_analysis_button:
-            with st.spinner("Performing headline analysis..."):
-                result = headline_analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Headline Analysis Results:")
-                    st.markdown(result)
+        # Reuse archived analyses of this asset or of a near-duplicate instead of calling the model again
+        analysis_buttons = [
+            ("analyze_media", basic_analysis, "Basic Analysis Results:"),
+            ("emotional_resonance", emotional_resonance_button, "Emotional Resonance Results:"),
+            ("emotional_analysis", emotional_analysis_button, "Emotional Analysis Results:"),
+            ("Emotional_Appraisal_Models", Emotional_Appraisal_Models_button, "Emotional Appraisal Models Analysis Results:"),
+            ("flash_analysis", flash_analysis_button, "Flash Analysis Results:"),
+            ("behavioural_principles", behavioural_principles_button, "Behavioral Principles Analysis Results:"),
+            ("nlp_principles_analysis", nlp_principles_analysis_button, "NLP Principles Analysis Results:"),
+            ("overall_analysis", overall_analysis_button, "Overall Marketing Analysis Results:"),
+            ("motivation", motivation_button, "Motivation Analysis Results:"),
+            ("Story_Telling_Analysis", Story_Telling_Analysis_button, "Overall Story Telling Analysis Results:"),
+            ("text_analysis", text_analysis_button, "Text Analysis Results:"),
+            ("Text_Analysis_2", text_analysis_2_button, "Text Analysis 2 Results:"),
+            ("Text_Analysis_2_table", text_analysis_2_table_button, "Text Analysis 2 - Table Results:"),
+            ("Image_Analysis_2", Image_Analysis_2_button, "TImage Analysis 2 Results:"),
+            ("Image_Analysis_2_table", Image_Analysis_2_table_button, "Image Analysis 2 table Results:"),
+            ("headline_analysis", headline_analysis_button, "Headline Analysis Results:"),
+            ("main_headline_detailed_analysis", main_headline_analysis_button, "Main Headline Analysis Results:"),
+            ("image_headline_detailed_analysis", image_headline_analysis_button, "Image Headline Analysis Results:"),
+            ("supporting_headline_detailed_analysis", supporting_headline_analysis_button, "Supporting Headline Analysis Report Results:"),
+            ("headline_detailed_analysis", detailed_headline_analysis_button, "Headline Optimization Report Results:"),
+            ("main_headline_analysis", main_headline_text_analysis_button, "Main Headline Text Analysis Results:"),
+            ("image_headline_analysis", image_headline_text_analysis_button, "Image Headline Text Analysis Results:"),
+            ("supporting_headline_analysis", supporting_headline_text_analysis_button, "Supporting Headline Text Analysis Results:"),
+            ("meta_profile", meta_profile_button, "Meta Profile Analysis Results:"),
+            ("linkedin_profile", linkedin_profile_button, "Linkedin profile Analysis Results:"),
+            ("x_profile", x_profile_button, "X (formerly Twitter) targeting Analysis Results:"),
+            ("Personality_Trait_Assessment", personality_trait_assessment_button, "Personality Trait Assessment Analysis Results:"),
+            ("BMTI_Analysis", BMTI_Analysis_button, "BMTI Analysis Results:"),
+            ("Image_Analysis", Image_Analysis_button, "Image Analysis Results:"),
+        ]
+        served_without_model = False
+        if reuse_archived_analyses:
+            for analysis_name, clicked, title in analysis_buttons:
+                if clicked and analysis_name in reusable_analyses:
+                    archived, source = reusable_analyses[analysis_name]
+                    st.write(f"## {title}")
+                    st.caption(f"♻️ Reused from {source}")
+                    st.markdown(archived["text"], unsafe_allow_html=True)
+                    served_without_model = True
+
+        if (triage_with_score_model and overall_analysis_button and not served_without_model
+                and prediction and not prediction["needs_llm"]):
+            st.write("## Overall Marketing Analysis Results:")
+            st.caption(
+                f"🎯 Predicted locally (mean uncertainty ±{prediction['uncertainty']:.2f}, "
+                f"model trained on {prediction['trained_on']} analyzed assets). "
+                "Turn off triage in the sidebar to request the full LLM analysis."
+            )
+            st.markdown(predicted_scores_markdown(prediction))
+            served_without_model = True
+
+        if not served_without_model:
+            if basic_analysis:
+                with st.spinner("Performing basic analysis..."):
+                    result = analyze_media(uploaded_file, is_image)
+                    if result:
+                        st.write("## Basic Analysis Results:")
+                        st.markdown(result, unsafe_allow_html=True)
+            if emotional_resonance_button:
+                with st.spinner("Performing Emotional Resonance Analysis..."):
+                    result = emotional_resonance(uploaded_file, is_image)
+                    if result:
+                        st.write("## Emotional Resonance Results:")
+                        st.markdown(result)
+            if emotional_analysis_button:
+                with st.spinner("Performing Emotional Analysis..."):
+                    result = emotional_analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Emotional Analysis Results:")
+                        st.markdown(result)
+            if Emotional_Appraisal_Models_button:
+                with st.spinner("Performing Emotional Appraisal Models Analysis..."):
+                    result = Emotional_Appraisal_Models(uploaded_file, is_image)
+                    if result:
+                        st.write("## Emotional Appraisal Models Analysis Results:")
+                        st.markdown(result)
+            elif flash_analysis_button:
+                with st.spinner("Performing Flash analysis..."):
+                    result = flash_analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Flash Analysis Results:")
+                        st.markdown(result)  # Display results directly
+            elif behavioural_principles_button:
+                with st.spinner("Analyzing Behavioral Principles..."):
+                    result = behavioural_principles(uploaded_file, is_image)
+                    if result:
+                        st.write("## Behavioral Principles Analysis Results:")
+                        st.markdown(result, unsafe_allow_html=True)
+            elif nlp_principles_analysis_button:
+                with st.spinner("Analyzing NLP Principles..."):
+                    result = nlp_principles_analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## NLP Principles Analysis Results:")
+                        st.markdown(result, unsafe_allow_html=True)
+            elif overall_analysis_button:
+                with st.spinner("Performing overall marketing analysis..."):
+                    result = overall_analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Overall Marketing Analysis Results:")
+                        st.markdown(result)
+            elif motivation_button:
+                with st.spinner("Performing Motivation Analysis..."):
+                    result = motivation(uploaded_file, is_image)
+                    if result:
+                        st.write("## Motivation Analysis Results:")
+                        st.markdown(result)
+            elif Story_Telling_Analysis_button:
+                with st.spinner("Performing Story Telling Analysis..."):
+                    result = Story_Telling_Analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Overall Story Telling Analysis Results:")
+                        st.markdown(result)
+            elif text_analysis_button:
+                with st.spinner("Performing text analysis..."):
+                    result = text_analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Text Analysis Results:")
+                        st.markdown(result)
+            elif text_analysis_2_button:
+                with st.spinner("Performing Text Analysis 2..."):
+                    result = Text_Analysis_2(uploaded_file, is_image)
+                    if result:
+                        st.write("## Text Analysis 2 Results:")
+                        st.markdown(result)
+            elif text_analysis_2_table_button:
+                with st.spinner("Performing Text Analysis 2 - Table Button..."):
+                    result = Text_Analysis_2_table(uploaded_file, is_image)
+                    if result:
+                        st.write("## Text Analysis 2 - Table Results:")
+                        st.markdown(result)
+            elif Image_Analysis_2_button:
+                with st.spinner("Performing Image Analysis 2..."):
+                    result = Image_Analysis_2(uploaded_file, is_image)
+                    if result:
+                        st.write("## TImage Analysis 2 Results:")
+                        st.markdown(result)
+            elif Image_Analysis_2_table_button:
+                with st.spinner("Performing Image Analysis 2 table..."):
+                    result = Image_Analysis_2_table(uploaded_file, is_image)
+                    if result:
+                        st.write("## Image Analysis 2 table Results:")
+                        st.markdown(result)                    
+            elif headline_analysis_button:
+                with st.spinner("Performing headline analysis..."):
+                    result = headline_analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Headline Analysis Results:")
+                        st.markdown(result)
         
-        elif main_headline_analysis_button:
-            with st.spinner("Performing Main Headline Analysis..."):
-                result = main_headline_detailed_analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Main Headline Analysis Results:")
-                    st.markdown(result)
-
-        elif image_headline_analysis_button:
-            with st.spinner("Performing Image Headline Analysis..."):
-                result = image_headline_detailed_analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Image Headline Analysis Results:")
-                    st.markdown(result)
-
-        elif supporting_headline_analysis_button:
-            with st.spinner("Performing Supporting Headline Analysis..."):
-                result = supporting_headline_detailed_analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Supporting Headline Analysis Report Results:")
-                    st.markdown(result)
-
-        elif detailed_headline_analysis_button:
-            with st.spinner("Performing Headline Optimization Report analysis..."):
-                result = headline_detailed_analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Headline Optimization Report Results:")
-                    st.markdown(result)
+            elif main_headline_analysis_button:
+                with st.spinner("Performing Main Headline Analysis..."):
+                    result = main_headline_detailed_analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Main Headline Analysis Results:")
+                        st.markdown(result)
+
+            elif image_headline_analysis_button:
+                with st.spinner("Performing Image Headline Analysis..."):
+                    result = image_headline_detailed_analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Image Headline Analysis Results:")
+                        st.markdown(result)
+
+            elif supporting_headline_analysis_button:
+                with st.spinner("Performing Supporting Headline Analysis..."):
+                    result = supporting_headline_detailed_analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Supporting Headline Analysis Report Results:")
+                        st.markdown(result)
+
+            elif detailed_headline_analysis_button:
+                with st.spinner("Performing Headline Optimization Report analysis..."):
+                    result = headline_detailed_analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Headline Optimization Report Results:")
+                        st.markdown(result)
                     
-        elif main_headline_text_analysis_button:
-            with st.spinner("Performing Main Headline Text Analysis..."):
-                result = main_headline_analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Main Headline Text Analysis Results:")
-                    st.markdown(result)
-
-        elif image_headline_text_analysis_button:
-            with st.spinner("Performing Image Headline Text Analysis..."):
-                result = image_headline_analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Image Headline Text Analysis Results:")
-                    st.markdown(result)
-
-        elif supporting_headline_text_analysis_button:
-            with st.spinner("Performing Supporting Headline Text Analysis..."):
-                result = supporting_headline_analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Supporting Headline Text Analysis Results:")
-                    st.markdown(result)
-        elif meta_profile_button:
-            with st.spinner("Performing Meta Analysis..."):
-                result = meta_profile(uploaded_file, is_image)
-                if result:
-                    st.write("## Meta Profile Analysis Results:")
-                    st.markdown(result)
-        elif linkedin_profile_button:
-            with st.spinner("Performing Linkedin profile Analysis..."):
-                result = linkedin_profile(uploaded_file, is_image)
-                if result:
-                    st.write("## Linkedin profile Analysis Results:")
-                    st.markdown(result)
-        elif x_profile_button:
-            with st.spinner("Performing X (formerly Twitter) targeting Analysis..."):
-                result = x_profile(uploaded_file, is_image)
-                if result:
-                    st.write("## X (formerly Twitter) targeting Analysis Results:")
-                    st.markdown(result)
-        elif personality_trait_assessment_button:
-            with st.spinner("Performing Personality Trait Assessment Analysis..."):
-                result = Personality_Trait_Assessment(uploaded_file, is_image)
-                if result:
-                    st.write("## Personality Trait Assessment Analysis Results:")
-                    st.markdown(result)
-        elif BMTI_Analysis_button:
-            with st.spinner("Performing BMTI Analysis..."):
-                result = BMTI_Analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## BMTI Analysis Results:")
-                    st.markdown(result)                    
-        elif Image_Analysis_button:
-            with st.spinner("Performing Image Analysis..."):
-                result = Image_Analysis(uploaded_file, is_image)
-                if result:
-                    st.write("## Image Analysis Results:")
-                    st.markdown(result)                     
-        # Custom Prompt Analysis
-        elif custom_prompt_button and custom_prompt:
-            with st.spinner("Performing custom prompt analysis..."):
-                result = custom_prompt_analysis(uploaded_file, custom_prompt, is_image)
-                if result:
-                    st.write("## Custom Prompt Analysis Results:")
-                    st.markdown(result)
+            elif main_headline_text_analysis_button:
+                with st.spinner("Performing Main Headline Text Analysis..."):
+                    result = main_headline_analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Main Headline Text Analysis Results:")
+                        st.markdown(result)
+
+            elif image_headline_text_analysis_button:
+                with st.spinner("Performing Image Headline Text Analysis..."):
+                    result = image_headline_analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Image Headline Text Analysis Results:")
+                        st.markdown(result)
+
+            elif supporting_headline_text_analysis_button:
+                with st.spinner("Performing Supporting Headline Text Analysis..."):
+                    result = supporting_headline_analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Supporting Headline Text Analysis Results:")
+                        st.markdown(result)
+            elif meta_profile_button:
+                with st.spinner("Performing Meta Analysis..."):
+                    result = meta_profile(uploaded_file, is_image)
+                    if result:
+                        st.write("## Meta Profile Analysis Results:")
+                        st.markdown(result)
+            elif linkedin_profile_button:
+                with st.spinner("Performing Linkedin profile Analysis..."):
+                    result = linkedin_profile(uploaded_file, is_image)
+                    if result:
+                        st.write("## Linkedin profile Analysis Results:")
+                        st.markdown(result)
+            elif x_profile_button:
+                with st.spinner("Performing X (formerly Twitter) targeting Analysis..."):
+                    result = x_profile(uploaded_file, is_image)
+                    if result:
+                        st.write("## X (formerly Twitter) targeting Analysis Results:")
+                        st.markdown(result)
+            elif personality_trait_assessment_button:
+                with st.spinner("Performing Personality Trait Assessment Analysis..."):
+                    result = Personality_Trait_Assessment(uploaded_file, is_image)
+                    if result:
+                        st.write("## Personality Trait Assessment Analysis Results:")
+                        st.markdown(result)
+            elif BMTI_Analysis_button:
+                with st.spinner("Performing BMTI Analysis..."):
+                    result = BMTI_Analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## BMTI Analysis Results:")
+                        st.markdown(result)                    
+            elif Image_Analysis_button:
+                with st.spinner("Performing Image Analysis..."):
+                    result = Image_Analysis(uploaded_file, is_image)
+                    if result:
+                        st.write("## Image Analysis Results:")
+                        st.markdown(result)                     
+            # Custom Prompt Analysis
+            elif custom_prompt_button and custom_prompt:
+                with st.spinner("Performing custom prompt analysis..."):
+                    result = custom_prompt_analysis(uploaded_file, custom_prompt, is_image)
+                    if result:
+                        st.write("## Custom Prompt Analysis Results:")
+                        st.markdown(result)
 # Function to compare all images with a standard prompt or custom prompt
 def compare_all_images(images, filenames, model, custom_prompt=None):
     # Define the prompt
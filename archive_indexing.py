@@ -0,0 +1,76 @@
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+import cache_store
+import animated_media
+import video_upload
+import analysis_archive
+import phash_index
+import similarity_index
+import score_model
+
+logger = logging.getLogger(__name__)
+# The API archives off the request thread: embedding and feature extraction are CPU work
+_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="archive")
+
+
+def archive_analysis(asset_key, name, analysis_name, text, kind, image=None):
+    """Archive one analysis result and, for images, add the asset to every index built from the archive.
+
+    The near-duplicate index, the similar-creative index and the score model features are each
+    updated on their own, so one failing does not keep the asset out of the others. Returns a
+    warning message for every step that failed.
+    """
+    analysis_archive.record(asset_key, name, analysis_name, text, kind=kind)
+    if image is None:
+        return []
+
+    def add_features():
+        if not (analysis_archive.get(asset_key) or {}).get("features"):
+            analysis_archive.update(asset_key, features=score_model.extract_features(image))
+
+    steps = [
+        ("the near-duplicate index", lambda: phash_index.get_index().add(asset_key, image, name=name)),
+        ("the similar-creative index", lambda: similarity_index.get_index().add(asset_key, image, name=name)),
+        ("the score model features", add_features),
+    ]
+    warnings = []
+    for label, step in steps:
+        try:
+            step()
+        except Exception as e:
+            warnings.append(f"Could not update {label}: {e}")
+    return warnings
+
+
+def _archive_and_log(*args):
+    try:
+        for warning in archive_analysis(*args):
+            logger.warning(warning)
+    except Exception:
+        logger.exception("Could not archive the analysis")
+
+
+def submit(asset_key, name, analysis_name, text, kind, image=None):
+    """archive_analysis on a background thread; failures are logged."""
+    return _pool.submit(_archive_and_log, asset_key, name, analysis_name, text, kind, image)
+
+
+def submit_upload(fileobj, name, is_image, results):
+    """Archive the {analysis: result} of one uploaded file, the way the Streamlit app archives its analyses.
+
+    Only hashing happens on the calling thread; failed results (without "content") are skipped.
+    """
+    if is_image:
+        fileobj.seek(0)
+        data = fileobj.read()
+        asset_key = cache_store.content_hash(data)
+        kind = "animation" if animated_media.is_animated(data) else "image"
+        image = Image.open(io.BytesIO(data))
+    else:
+        asset_key, kind, image = video_upload.stream_hash(fileobj), "video", None
+    for analysis_name, result in results.items():
+        if "content" in result:
+            submit(asset_key, name, analysis_name, result["content"], kind, image)
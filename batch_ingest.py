@@ -0,0 +1,276 @@
+import os
+import json
+import logging
+import select
+import socket
+import time
+import uuid
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.sansio.multipart import MultipartDecoder, Field, File, Data, Epilogue, NeedData
+from werkzeug.utils import secure_filename
+
+import cache_store
+import preprocessing
+import analysis_registry
+import upload_limits
+import metrics
+import tracing
+import archive_indexing
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "batch_uploads"
+READ_SIZE = 64 * 1024
+MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "500"))
+MAX_FIELD_BYTES = 64 * 1024
+# Uncompressed size allowed per ZIP archive, so a small archive cannot fill the scratch disk
+MAX_ZIP_MB = int(os.getenv("BATCH_MAX_ZIP_MB", "2048"))
+WORKERS = int(os.getenv("BATCH_WORKERS", str(preprocessing.WORKERS)))
+# Files whose preprocessed media is held in memory while their analyses run
+FILES_IN_FLIGHT = int(os.getenv("BATCH_FILES_IN_FLIGHT", str(2 * WORKERS)))
+BUSY_RETRIES = 5
+VIDEO_EXTENSIONS = {"mp4", "mov", "avi", "mkv", "webm", "mpeg", "mpg"}
+
+_pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="batch")
+
+
+def _extension(filename):
+    return filename.rsplit(".", 1)[1].lower() if "." in filename else ""
+
+
+def _add_file(files, batch_dir, name):
+    if len(files) >= MAX_FILES:
+        raise RequestEntityTooLarge(f"A batch may contain at most {MAX_FILES} files.")
+    entry = {"name": name, "path": os.path.join(batch_dir, f"{len(files):04d}-{secure_filename(name) or 'upload'}")}
+    files.append(entry)
+    return entry
+
+
+def _expand_zip(entry, batch_dir, extensions, files):
+    """Replace an uploaded ZIP entry by the supported files inside it, extracted one by one."""
+    files.remove(entry)
+    try:
+        with zipfile.ZipFile(entry["path"]) as archive:
+            members = [member for member in archive.infolist() if not member.is_dir()
+                       and not os.path.basename(member.filename).startswith(".") and "__MACOSX" not in member.filename]
+            if sum(member.file_size for member in members) > MAX_ZIP_MB * 1048576:
+                raise RequestEntityTooLarge(f"{entry['name']} expands to more than {MAX_ZIP_MB} MB.")
+            for member in members:
+                name = f"{entry['name']}/{member.filename}"
+                if _extension(member.filename) not in extensions:
+                    files.append({"name": name, "error": "Unsupported file type"})
+                    continue
+                extracted = _add_file(files, batch_dir, name)
+                with archive.open(member) as src, open(extracted["path"], "wb") as dst:
+                    shutil.copyfileobj(src, dst, READ_SIZE)
+    except zipfile.BadZipFile:
+        files.append({"name": entry["name"], "error": "Not a valid ZIP archive"})
+    finally:
+        os.remove(entry["path"])
+
+
+def ingest(stream, boundary, extensions):
+    """Stream a multipart/form-data body part by part into a fresh scratch directory.
+
+    Only one READ_SIZE chunk of the body is in memory at a time. ZIP parts are expanded into
+    their supported members. Returns (batch_dir, fields, files) where each file is
+    {"name", "path"}, or {"name", "error"} for a part that was rejected.
+    """
+    batch_dir = os.path.dirname(cache_store.cache_path(NAMESPACE, uuid.uuid4().hex, "parts"))
+    decoder = MultipartDecoder(boundary, max_form_memory_size=MAX_FIELD_BYTES, max_parts=2 * MAX_FILES + 100)
+    fields, files = {}, []
+    part, sink, size, limit = None, None, 0, None
+    try:
+        while True:
+            chunk = stream.read(READ_SIZE)
+            decoder.receive_data(chunk or None)
+            event = decoder.next_event()
+            while not isinstance(event, (Epilogue, NeedData)):
+                if isinstance(event, Field):
+                    part, sink = event, bytearray()
+                elif isinstance(event, File):
+                    part, sink, size = event, None, 0
+                    if event.filename and _extension(event.filename) in extensions | {"zip"}:
+                        part = _add_file(files, batch_dir, event.filename)
+                        sink = open(part["path"], "wb")
+                        kind = upload_limits.declared_kind(event.filename, event.headers.get("Content-Type"))
+                        limit = MAX_ZIP_MB * 1048576 if _extension(event.filename) == "zip" else upload_limits.limit_bytes(kind)
+                    elif event.filename:
+                        files.append({"name": event.filename, "error": "Unsupported file type"})
+                elif isinstance(event, Data):
+                    if isinstance(sink, bytearray):
+                        sink.extend(event.data)
+                    elif sink is not None:
+                        size += len(event.data)
+                        if size > limit:
+                            # Drop the rest of an oversized part but keep reading the others
+                            sink.close()
+                            os.remove(part["path"])
+                            part.pop("path")
+                            part["error"] = f"Larger than the {limit // 1048576} MB limit for its type"
+                            sink = None
+                        else:
+                            sink.write(event.data)
+                    if not event.more_data:
+                        if isinstance(sink, bytearray):
+                            fields[part.name] = sink.decode("utf-8", "replace")
+                        elif sink is not None:
+                            sink.close()
+                            if _extension(part["name"]) == "zip":
+                                _expand_zip(part, batch_dir, extensions, files)
+                        part, sink = None, None
+                event = decoder.next_event()
+            if not chunk or isinstance(event, Epilogue):
+                break
+    except BaseException:
+        if sink is not None and not isinstance(sink, bytearray):
+            sink.close()
+        cache_store.remove_tree(batch_dir)
+        raise
+    return batch_dir, fields, files
+
+
+def discard(batch_dir):
+    """Remove an ingested batch that will not be run."""
+    cache_store.remove_tree(batch_dir)
+
+
+def _prepare_file(entry):
+    # The real type comes from the file's magic bytes, not its name, and is checked before any decode
+    with open(entry["path"], "rb") as f:
+        kind, _ = upload_limits.check_upload(f)
+    is_image = kind != "video"
+    # A batch should wait for the shared preprocessing pool rather than fail like a single request
+    for attempt in range(BUSY_RETRIES):
+        try:
+            return preprocessing.prepare(entry["path"], is_image, entry["name"], analysis="batch"), is_image
+        except preprocessing.PreprocessingBusy:
+            if attempt == BUSY_RETRIES - 1:
+                raise
+            metrics.RETRIES.labels("batch_preprocess").inc()
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def _archive(entry):
+    # Archived like single-file API results, while the scratch copy still exists
+    try:
+        with open(entry["path"], "rb") as f:
+            archive_indexing.submit_upload(f, entry["name"], entry["is_image"], entry["results"])
+    except Exception:
+        logger.exception("Could not archive the analyses of %s", entry["name"])
+
+
+def peer_closed(sock):
+    """True once the client has closed its end of the connection; checked without blocking."""
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        # The request body has been read in full, so a readable socket with nothing to read is closed
+        return bool(readable) and not sock.recv(1, socket.MSG_PEEK)
+    except (OSError, ValueError):
+        return True
+
+
+def run_batch(registry, files, names, batch_dir=None, disconnected=None):
+    """Run every analysis on every ingested file and yield one result dict as each one finishes.
+
+    Files are preprocessed on the batch pool, at most FILES_IN_FLIGHT at a time, and their
+    analyses run on the analysis pool. A final {"summary": ...} line closes the stream, and
+    the scratch directory is removed once the stream ends or the client goes away.
+    disconnected() is checked before each file is started; once it is true no new work is
+    submitted. The stream is traced as a batch.run span under the caller's current span.
+    """
+    return _stream_batch(registry, files, names, batch_dir, disconnected, tracing.current_context())
+
+
+def _stream_batch(registry, files, names, batch_dir, disconnected, trace_parent):
+    # Runs after the request has been torn down, so the batch keeps its own span and in-flight count
+    start = time.time()
+    batch_span, trace_context = tracing.open_span("batch.run", trace_parent, files=len(files), analyses=len(names))
+    in_flight = metrics.IN_FLIGHT.labels("batch")
+    in_flight.inc()
+    pending = {}  # future -> (file entry, analysis name or None while preprocessing)
+    outstanding = {}  # file path -> analyses still running
+    rejected = []
+    counts = {"files": len(files), "results": 0, "errors": 0}
+    queue = iter(files)
+    gone = False
+
+    def client_gone():
+        nonlocal gone
+        gone = gone or bool(disconnected and disconnected())
+        return gone
+
+    def fill():
+        while len(outstanding) < FILES_IN_FLIGHT and not client_gone():
+            entry = next(queue, None)
+            if entry is None:
+                return
+            if "error" in entry:
+                rejected.append({"file": entry["name"], "error": entry["error"]})
+                continue
+            pending[_pool.submit(tracing.wrap(_prepare_file, trace_context), entry)] = (entry, None)
+            outstanding[entry["path"]] = len(names)
+
+    def finish(entry):
+        outstanding[entry["path"]] -= 1
+        if outstanding[entry["path"]] <= 0:
+            del outstanding[entry["path"]]
+            _archive(entry)
+
+    try:
+        fill()
+        while (pending or rejected) and not gone:
+            while rejected:
+                counts["errors"] += 1
+                yield rejected.pop(0)
+            done, _ = wait(pending, return_when=FIRST_COMPLETED) if pending else ((), ())
+            for future in done:
+                entry, name = pending.pop(future)
+                if name is None:
+                    try:
+                        media, is_image = future.result()
+                    except Exception as e:
+                        counts["errors"] += 1
+                        del outstanding[entry["path"]]
+                        yield {"file": entry["name"], "error": f"Failed to read or process the media: {e}"}
+                        continue
+                    if client_gone():
+                        # Analyses cannot be stopped once running, so do not start any for a closed stream
+                        del outstanding[entry["path"]]
+                        continue
+                    entry["is_image"], entry["results"] = is_image, {}
+                    for analysis in names:
+                        future = analysis_registry.submit(registry, analysis, media, "image" if is_image else "video",
+                                                          trace_context)
+                        pending[future] = (entry, analysis)
+                    continue
+                try:
+                    result = future.result()
+                    entry["results"][name] = result
+                    line = dict(result, file=entry["name"], analysis=name)
+                    counts["results"] += 1
+                except Exception as e:
+                    line = {"file": entry["name"], "analysis": name, "error": str(e)}
+                    counts["errors"] += 1
+                finish(entry)
+                yield line
+            fill()
+        if not gone:
+            yield {"summary": dict(counts, seconds=round(time.time() - start, 2))}
+    finally:
+        for future in pending:
+            future.cancel()
+        if batch_dir:
+            cache_store.remove_tree(batch_dir)
+        in_flight.dec()
+        batch_span.set_attributes(dict(counts, disconnected=gone))
+        batch_span.end()
+
+
+def ndjson(lines):
+    """Encode result dicts as newline-delimited JSON."""
+    for line in lines:
+        yield json.dumps(line) + "\n"
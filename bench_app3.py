@@ -0,0 +1,143 @@
+"""Load test for app3 against the local model stub.
+
+    python bench_app3.py --serve gevent --clients 50 --duration 20
+    python bench_app3.py --url http://127.0.0.1:8000 --path /custom_prompt_analysis
+
+--serve starts gunicorn with the given worker class and GENAI_MODEL_STUB=1, so no credentials
+or network are needed; without it the benchmark targets an already running server. Each client
+keeps one keep-alive connection open and sends requests back to back, honouring Retry-After on 503.
+"""
+import io
+import os
+import sys
+import time
+import uuid
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlsplit
+import numpy as np
+from PIL import Image
+
+
+def multipart_body(fields, filename="bench.png"):
+    """A multipart/form-data body with the form fields and a small PNG upload."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 250), (200, 40, 40)).save(buffer, format="PNG")
+    boundary = uuid.uuid4().hex
+    lines = []
+    for name, value in fields.items():
+        lines.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    lines.append(f'--{boundary}\r\nContent-Disposition: form-data; name="uploaded_file"; filename="{filename}"\r\n'
+                 f"Content-Type: image/png\r\n\r\n".encode() + buffer.getvalue() + b"\r\n")
+    lines.append(f"--{boundary}--\r\n".encode())
+    return b"".join(lines), f"multipart/form-data; boundary={boundary}"
+
+
+def client(url, path, body, content_type, deadline, results):
+    parts = urlsplit(url)
+    connection_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    connection = None
+    headers = {"Content-Type": content_type, "X-Forwarded-Proto": "https"}
+    while time.time() < deadline:
+        if connection is None:
+            connection = connection_cls(parts.hostname, parts.port, timeout=120)
+        start = time.time()
+        try:
+            connection.request("POST", path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            results.append((response.status, time.time() - start))
+            if response.status == 503:  # back off like a well-behaved client instead of hammering the server
+                time.sleep(float(response.getheader("Retry-After", "1")))
+            if response.getheader("Connection", "").lower() == "close":
+                connection.close()
+                connection = None
+        except (OSError, http.client.HTTPException):
+            results.append((0, time.time() - start))
+            connection.close()
+            connection = None
+    if connection is not None:
+        connection.close()
+
+
+def run(url, path, fields, clients, duration):
+    """Send requests from `clients` concurrent connections for `duration` seconds and summarise them."""
+    body, content_type = multipart_body(fields)
+    results = []
+    deadline = time.time() + duration
+    threads = [threading.Thread(target=client, args=(url, path, body, content_type, deadline, results))
+               for _ in range(clients)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = np.array([latency for status, latency in results if status == 200]) * 1000
+    summary = {
+        "clients": clients,
+        "requests": len(results),
+        "ok_per_second": len(latencies) / elapsed,
+        "statuses": statuses,
+    }
+    if len(latencies):
+        summary.update({f"p{q}_ms": float(np.percentile(latencies, q)) for q in (50, 95, 99)})
+    return summary
+
+
+def wait_for_port(host, port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not start listening on {host}:{port}")
+
+
+def serve(worker_class, port):
+    """Start gunicorn serving app3 with the model stub and return the process."""
+    env = dict(os.environ, GENAI_MODEL_STUB="1", APP3_WORKER_CLASS=worker_class, APP3_BIND=f"127.0.0.1:{port}")
+    here = os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", os.path.join(here, "gunicorn.conf.py"), "app3:app"],
+                               cwd=here, env=env)
+    wait_for_port("127.0.0.1", port)
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/custom_prompt_analysis")
+    parser.add_argument("--prompt", default="Describe this ad in one sentence.")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--serve", metavar="WORKER_CLASS", help="start gunicorn with this worker class (gevent, gthread, sync)")
+    args = parser.parse_args()
+
+    process = None
+    if args.serve:
+        port = urlsplit(args.url).port or 8000
+        process = serve(args.serve, port)
+    try:
+        summary = run(args.url, args.path, {"custom_prompt": args.prompt, "is_image": "true"}, args.clients, args.duration)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    print(f"{summary['clients']} clients: {summary['ok_per_second']:.1f} ok requests/s, "
+          f"{summary['requests']} requests, statuses {summary['statuses']}")
+    if "p50_ms" in summary:
+        print(f"latency p50 {summary['p50_ms']:.0f} ms, p95 {summary['p95_ms']:.0f} ms, p99 {summary['p99_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
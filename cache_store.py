@@ -0,0 +1,64 @@
+import os
+import json
+import hashlib
+import shutil
+
+import metrics
+
+# Root directory for every on-disk cache used by the apps
+CACHE_ROOT = os.getenv("MARKETING_CACHE_DIR", ".cache")
+
+
+def content_hash(data):
+    """Return the SHA-256 hex digest of raw bytes (or a memoryview)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def cache_path(namespace, *parts):
+    """Build a path inside a cache namespace, creating the parent directory."""
+    path = os.path.join(CACHE_ROOT, namespace, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def read_json(namespace, key, default=None):
+    """Read a JSON document from the cache, returning default if it is missing or corrupt."""
+    path = cache_path(namespace, f"{key}.json")
+    if not os.path.exists(path):
+        metrics.cache_lookup(namespace, False)
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            value = json.load(f)
+    except (OSError, ValueError):
+        metrics.cache_lookup(namespace, False)
+        return default
+    metrics.cache_lookup(namespace, True)
+    return value
+
+
+def write_json(namespace, key, value):
+    """Atomically write a JSON document to the cache."""
+    path = cache_path(namespace, f"{key}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(value, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def directory_size(path):
+    """Total size in bytes of all files below a directory."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def remove_tree(path):
+    """Delete a cache directory, ignoring entries that are already gone."""
+    shutil.rmtree(path, ignore_errors=True)
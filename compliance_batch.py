@@ -0,0 +1,196 @@
+import os
+import re
+import json
+import functools
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import rulebook_store
+import prescreen
+
+MAX_WORKERS = int(os.getenv("COMPLIANCE_MAX_WORKERS", "8"))
+RULES_PER_ASSET = int(os.getenv("COMPLIANCE_RULES_PER_ASSET", "12"))
+JSON_CONFIG = {"response_mime_type": "application/json", "temperature": 0.1}
+
+CLAIMS_PROMPT = (
+    "Extract every marketing claim, promise, statistic, disclaimer and call to action made in this media file. "
+    "Translate non-English text into English. "
+    'Respond with JSON only: {"summary": "<one sentence describing the asset>", "claims": ["<claim>", ...]}'
+)
+
+COMPLIANCE_PROMPT = """You are a regulatory compliance reviewer.
+Check the attached media file against the rulebook excerpts below. Only cite rules that appear in the excerpts.
+
+Claims extracted from the asset:
+{claims}
+
+Rulebook excerpts:
+{rules}
+
+{extra_instructions}
+Respond with JSON only:
+{{"violations": [{{"claim": "<text in the asset>", "rule": "<rule excerpt violated>", "source": "<rulebook, page>",
+"severity": "High|Medium|Low", "explanation": "<why it violates>", "suggestion": "<compliant rewrite>"}}],
+"verdict": "Compliant|Needs Review|Non-Compliant"}}
+"""
+
+
+def parse_json_response(text):
+    """Parse a JSON model response, tolerating markdown code fences around it."""
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    return json.loads(cleaned)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_rulebook(rulebook_hash):
+    return rulebook_store.load_rulebook(rulebook_hash)
+
+
+def retrieve_rules(rulebook_metas, queries, k=RULES_PER_ASSET, embed_fn=rulebook_store.embed_texts):
+    """Return the k rulebook chunks most similar to any of the query texts."""
+    if not queries or not rulebook_metas:
+        return []
+    chunks, sources, matrices = [], [], []
+    for meta in rulebook_metas:
+        rulebook = _load_rulebook(meta["hash"])
+        if len(rulebook["chunks"]) == 0:
+            continue
+        chunks.extend(rulebook["chunks"])
+        sources.extend([meta["names"][0]] * len(rulebook["chunks"]))
+        matrices.append(rulebook["vectors"])
+    if not chunks:
+        return []
+
+    query_vectors = embed_fn(list(queries), task_type="retrieval_query")
+    # Score each chunk by its best match against any claim
+    scores = (np.vstack(matrices) @ query_vectors.T).max(axis=1)
+    top = np.argsort(-scores)[:k]
+    return [dict(chunks[i], source=sources[i], score=float(scores[i])) for i in top]
+
+
+def format_rules(rules):
+    return "\n\n".join(
+        f"[{i + 1}] ({rule['source']}, page {rule['page']}) {rule['text'].strip()}" for i, rule in enumerate(rules)
+    ) or "(no relevant rules found)"
+
+
+def check_asset(model, name, mime_type, data, rulebook_metas, extra_instructions=""):
+    """Run claim extraction, rule retrieval and the compliance check for one media file."""
+    media_part = {"mime_type": mime_type, "data": data}
+    try:
+        claims_response = model.generate_content([CLAIMS_PROMPT, media_part], generation_config=JSON_CONFIG)
+        extracted = parse_json_response(claims_response.text)
+        claims = [claim for claim in extracted.get("claims", []) if claim]
+        queries = claims or [extracted.get("summary", name)]
+
+        rules = retrieve_rules(rulebook_metas, queries)
+        prompt = COMPLIANCE_PROMPT.format(
+            claims="\n".join(f"- {claim}" for claim in claims) or "(none found)",
+            rules=format_rules(rules),
+            extra_instructions=f"Additional reviewer instructions: {extra_instructions}\n" if extra_instructions else "",
+        )
+        response = model.generate_content([prompt, media_part], generation_config=JSON_CONFIG)
+        result = parse_json_response(response.text)
+        return {
+            "asset": name,
+            "summary": extracted.get("summary", ""),
+            "claims": claims,
+            "rules": rules,
+            "verdict": result.get("verdict", "Needs Review"),
+            "violations": result.get("violations", []),
+            "error": None,
+        }
+    except Exception as e:
+        return {"asset": name, "summary": "", "claims": [], "rules": [], "verdict": "Error", "violations": [], "error": str(e)}
+
+
+def screen_and_check(model, name, mime_type, data, rulebook_metas, extra_instructions="", terms=None, clean_model=None):
+    """Pre-screen an asset locally and only send it for the full check when needed.
+
+    Clean assets are either passed without any model call (clean_model is None)
+    or checked with the cheaper clean_model. Flagged and unreadable assets get the full check.
+    """
+    screen = prescreen.screen_asset(mime_type, data, terms) if terms is not None else None
+    if screen and screen["status"] == "clean":
+        if clean_model is None:
+            return {"asset": name, "summary": "", "claims": [], "rules": [], "verdict": "Compliant (pre-screen)",
+                    "violations": [], "error": None, "prescreen": "clean"}
+        result = check_asset(clean_model, name, mime_type, data, rulebook_metas, extra_instructions)
+    else:
+        if screen and screen["status"] == "flagged":
+            hints = []
+            if screen["prohibited_hits"]:
+                hints.append(f"Pre-screen matched prohibited terms: {', '.join(screen['prohibited_hits'])}.")
+            if screen["missing_disclaimers"]:
+                hints.append(f"Pre-screen did not find required disclaimers: {', '.join(screen['missing_disclaimers'])}.")
+            extra_instructions = " ".join([extra_instructions] + hints).strip()
+        result = check_asset(model, name, mime_type, data, rulebook_metas, extra_instructions)
+    result["prescreen"] = screen["status"] if screen else "skipped"
+    return result
+
+
+def run_batch(model, assets, rulebook_metas, extra_instructions="", max_workers=MAX_WORKERS, on_result=None,
+              terms=None, clean_model=None):
+    """Check many (name, mime_type, data) assets concurrently.
+
+    When terms are given, every asset is pre-screened locally first (see screen_and_check).
+    on_result(result, done, total) is called from the calling thread as each asset finishes.
+    Results are returned in the original asset order.
+    """
+    results = [None] * len(assets)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(assets)))) as executor:
+        futures = {
+            executor.submit(screen_and_check, model, name, mime_type, data, rulebook_metas,
+                            extra_instructions, terms, clean_model): i
+            for i, (name, mime_type, data) in enumerate(assets)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            results[index] = future.result()
+            if on_result:
+                on_result(results[index], done, len(assets))
+    return results
+
+
+def _cell(value):
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def violation_rows(result):
+    """Flatten one asset result into table rows."""
+    return [
+        {
+            "Asset": result["asset"],
+            "Severity": violation.get("severity", ""),
+            "Claim": violation.get("claim", ""),
+            "Rule": violation.get("rule", ""),
+            "Source": violation.get("source", ""),
+            "Explanation": violation.get("explanation", ""),
+            "Suggestion": violation.get("suggestion", ""),
+        }
+        for violation in result["violations"]
+    ]
+
+
+def merge_report(results):
+    """Merge per-asset results into one markdown compliance report."""
+    lines = ["### Summary", "", "| Asset | Pre-screen | Verdict | Violations |", "|-------|------------|---------|------------|"]
+    for result in results:
+        verdict = f"Error: {result['error']}" if result["error"] else result["verdict"]
+        lines.append(
+            f"| {_cell(result['asset'])} | {result.get('prescreen', 'skipped')} | {_cell(verdict)} | {len(result['violations'])} |"
+        )
+
+    for result in results:
+        if not result["violations"]:
+            continue
+        lines += ["", f"### {result['asset']}", ""]
+        if result["summary"]:
+            lines += [result["summary"], ""]
+        lines += ["| Severity | Claim | Rule | Source | Explanation | Suggestion |", "|---|---|---|---|---|---|"]
+        for row in violation_rows(result):
+            lines.append(
+                f"| {_cell(row['Severity'])} | {_cell(row['Claim'])} | {_cell(row['Rule'])} | "
+                f"{_cell(row['Source'])} | {_cell(row['Explanation'])} | {_cell(row['Suggestion'])} |"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,176 @@
+import os
+import sys
+import time
+import atexit
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+
+import tracing
+
+WORKERS = int(os.getenv("FRAME_DECODE_WORKERS", str(os.cpu_count() or 1)))
+# Below this many output frames the pool start-up and IPC cost more than decoding in-process
+MIN_PARALLEL_FRAMES = int(os.getenv("FRAME_DECODE_MIN_PARALLEL", "8"))
+# Gaps longer than this (in frames) are skipped with a seek instead of grabbing through them
+SEEK_GAP = 48
+
+
+def probe(video_path):
+    """(frame count, fps, width, height) of a video."""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise Exception(f"Failed to open video file {video_path}. Check if the file is corrupt or format is unsupported.")
+    info = (int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), cap.get(cv2.CAP_PROP_FPS) or 25.0,
+            int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    cap.release()
+    return info
+
+
+def output_size(width, height, max_side=None):
+    """(width, height) of decoded frames after downscaling the longest side to max_side."""
+    if not max_side or max(width, height) <= max_side:
+        return width, height
+    scale = max_side / float(max(width, height))
+    return max(int(width * scale), 1), max(int(height * scale), 1)
+
+
+def _attach(name):
+    # The parent owns and unlinks the block. Spawned workers share the parent's resource tracker,
+    # so attaching without track=False (Python < 3.13) only re-registers the same name.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _decode_segment(video_path, shm_name, shape, slots, indices):
+    """Decode the frames at indices (ascending) into the given slots of the shared frame buffer.
+
+    Runs in a worker process with its own VideoCapture. Returns the slots that were filled and the
+    segment's wall-clock start and end plus the seeks it made, for tracing.
+    """
+    start = time.time_ns()
+    shm = _attach(shm_name)
+    try:
+        frames = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        height, width = shape[1:3]
+        cap = cv2.VideoCapture(video_path)
+        filled = []
+        position = None
+        seeks, seek_ns = 0, 0
+        for slot, index in zip(slots, indices):
+            if position is None or index < position or index - position > SEEK_GAP:
+                seek_start = time.perf_counter_ns()
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                seek_ns += time.perf_counter_ns() - seek_start
+                seeks += 1
+                position = index
+            while position < index and cap.grab():
+                position += 1
+            ret, frame = cap.read()
+            position += 1
+            if not ret:
+                continue
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            frames[slot] = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            filled.append(slot)
+        cap.release()
+        del frames
+        return filled, {"start_ns": start, "end_ns": time.time_ns(), "seeks": seeks, "seek_ms": seek_ns / 1e6}
+    finally:
+        shm.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool_context(preload=(__name__,)):
+    """Multiprocessing context for long-lived worker pools started from a threaded server.
+
+    Never fork the server process itself: workers fork from a clean server that preloads the given
+    modules. Pools are long-lived, so each worker pays the __main__ import only once.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(list(preload))
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def get_pool():
+    """Process-wide decode pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=pool_context())
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def decode_frames(video_path, indices, max_side=None, workers=None):
+    """Decode the given frame indices, splitting them into contiguous segments across worker processes.
+
+    Frames come back through one shared memory block instead of being pickled.
+    Returns (decoded_indices, frames) with frames an (N, H, W, 3) RGB uint8 array.
+    Traced as a frame_extraction span with one decode_segment child per worker job.
+    """
+    with tracing.span("frame_extraction", frames=len(indices), max_side=max_side or 0):
+        return _decode_frames(video_path, indices, max_side, workers)
+
+
+def _decode_frames(video_path, indices, max_side, workers):
+    _, _, width, height = probe(video_path)
+    width, height = output_size(width, height, max_side)
+    indices = sorted(set(int(index) for index in indices))
+    if not indices:
+        return [], np.zeros((0, height, width, 3), dtype=np.uint8)
+    shape = (len(indices), height, width, 3)
+    workers = min(workers or WORKERS, len(indices))
+
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+    try:
+        segments = [segment for segment in np.array_split(np.arange(len(indices)), workers) if len(segment)]
+        jobs = [(video_path, shm.name, shape, segment.tolist(), [indices[slot] for slot in segment])
+                for segment in segments]
+        if workers <= 1 or len(indices) < MIN_PARALLEL_FRAMES:
+            results = [_decode_segment(*job) for job in jobs]
+        else:
+            results = list(get_pool().map(_decode_segment, *zip(*jobs)))
+        filled = []
+        for job, (slots, timing) in zip(jobs, results):
+            filled.extend(slots)
+            tracing.record_span("decode_segment", timing["start_ns"], timing["end_ns"], frames=len(job[3]),
+                                decoded=len(slots), seeks=timing["seeks"], seek_ms=timing["seek_ms"])
+        filled.sort()
+        view = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        frames = view[filled]  # fancy indexing copies out of the shared block
+        del view
+    finally:
+        shm.close()
+        shm.unlink()
+    return [indices[slot] for slot in filled], frames
+
+
+def sample_indices(video_path, every=None, count=None):
+    """Frame indices every `every` frames, or `count` evenly spaced ones, plus (fps, total frames)."""
+    total, fps, _, _ = probe(video_path)
+    step = every if every else max(total // max(count or 1, 1), 1)
+    return list(range(0, total, max(int(step), 1))), fps, total
+
+
+if __name__ == "__main__":
+    # Throughput check: python frame_decoder.py video.mp4 [every_nth_frame]
+    path = sys.argv[1]
+    every = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    indices, _, _ = sample_indices(path, every=every)
+    for workers in sorted({1, 2, 4, WORKERS}):
+        decode_frames(path, indices[:WORKERS * 2], max_side=640, workers=workers)  # warm the pool
+        start = time.time()
+        decoded, _ = decode_frames(path, indices, max_side=640, workers=workers)
+        elapsed = time.time() - start
+        print(f"{workers:>3} workers: {len(decoded)} frames in {elapsed:.2f}s ({len(decoded) / elapsed:.0f} frames/s)")
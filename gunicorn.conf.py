@@ -0,0 +1,61 @@
+"""Production server settings for app3.
+
+    gunicorn -c gunicorn.conf.py app3:app
+
+Workers use gevent by default, so a request waiting on the model yields to the others instead
+of holding an OS thread. Every setting can be overridden from the environment (APP3_*).
+TLS is normally terminated by the load balancer, which must send X-Forwarded-Proto: https.
+
+Each worker admits PREPROCESS_QUEUE_SIZE uploads (default: twice its preprocessing workers) beyond
+the ones being preprocessed, and answers later arrivals with a 503 and Retry-After. Raise it only
+when a deployment prefers slow responses to 503s during bursts: a queued upload can wait up to
+PREPROCESS_TIMEOUT seconds.
+"""
+import os
+import shutil
+
+cores = os.cpu_count() or 1
+
+bind = os.getenv("APP3_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("APP3_WORKERS", str(cores)))
+worker_class = os.getenv("APP3_WORKER_CLASS", "gevent")
+# Concurrent requests per gevent worker, or threads per gthread worker
+worker_connections = int(os.getenv("APP3_WORKER_CONNECTIONS", "1000"))
+threads = int(os.getenv("APP3_THREADS", "16"))
+keepalive = int(os.getenv("APP3_KEEPALIVE", "5"))
+# Video analyses can take minutes
+timeout = int(os.getenv("APP3_TIMEOUT", "300"))
+graceful_timeout = int(os.getenv("APP3_GRACEFUL_TIMEOUT", "30"))
+max_requests = int(os.getenv("APP3_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+certfile = os.getenv("APP3_CERTFILE") or None
+keyfile = os.getenv("APP3_KEYFILE") or None
+accesslog = os.getenv("APP3_ACCESS_LOG") or None
+
+# Each worker starts its own preprocessing and decode pools: share the cores between them
+os.environ.setdefault("PREPROCESS_WORKERS", str(max(cores // workers, 1)))
+os.environ.setdefault("FRAME_DECODE_WORKERS", str(max(cores // workers, 1)))
+# Workers write their metrics here so that /metrics on any worker reports all of them
+metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR",
+                                    os.path.join(os.getenv("MARKETING_CACHE_DIR", ".cache"), "prometheus"))
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    # The Gemini client talks gRPC, which only cooperates with gevent once told to
+    if worker_class == "gevent":
+        try:
+            from grpc.experimental import gevent as grpc_gevent
+            grpc_gevent.init_gevent()
+        except ImportError:
+            pass
@@ -0,0 +1,134 @@
+import os
+import cv2
+import numpy as np
+
+import cache_store
+import ocr_headlines
+
+NAMESPACE = "legibility"
+# Minimum rendered text height as a fraction of the canvas height
+MIN_TEXT_HEIGHT = float(os.getenv("LEGIBILITY_MIN_TEXT_HEIGHT", "0.02"))
+# Text at least this tall (fraction of canvas height) is treated as WCAG "large text"
+LARGE_TEXT_HEIGHT = float(os.getenv("LEGIBILITY_LARGE_TEXT_HEIGHT", "0.04"))
+WCAG_NORMAL = 4.5
+WCAG_LARGE = 3.0
+
+
+def relative_luminance(rgb):
+    """WCAG 2.x relative luminance of an (..., 3) array of sRGB values in 0–255."""
+    c = np.asarray(rgb, dtype=np.float32) / 255.0
+    linear = np.where(c <= 0.03928, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    return linear @ np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+
+def contrast_ratio(l1, l2):
+    lighter, darker = max(l1, l2), min(l1, l2)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+def mser_text_regions(gray):
+    """Detect text lines with MSER: stroke-like regions merged horizontally into line boxes."""
+    height, width = gray.shape
+    mser = cv2.MSER_create()
+    mser.setMinArea(max(8, (height * width) // 200000))
+    mser.setMaxArea(max(64, (height * width) // 50))
+    _, boxes = mser.detectRegions(gray)
+    mask = np.zeros_like(gray)
+    for x, y, w, h in boxes:
+        if 0.1 <= w / float(h) <= 10 and h < 0.3 * height:
+            mask[y:y + h, x:x + w] = 255
+    # Join neighbouring characters of the same line
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, width // 100), 1)))
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    regions = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w >= 1.5 * h and h >= 4:
+            regions.append({"text": "", "box": [x, y, x + w, y + h], "font_size": float(h)})
+    return regions
+
+
+def region_contrast(rgb, box):
+    """Split a text box into text and background pixels with Otsu and return the WCAG contrast ratio."""
+    x0, y0, x1, y1 = box
+    patch = rgb[max(0, y0):y1, max(0, x0):x1]
+    if patch.size == 0:
+        return 1.0
+    luminance = relative_luminance(patch.reshape(-1, 3))
+    if float(luminance.max() - luminance.min()) < 1e-3:
+        return 1.0
+    _, split = cv2.threshold((luminance * 255).astype(np.uint8).reshape(-1, 1), 0, 1, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    split = split.ravel().astype(bool)
+    # Glyph strokes cover less of a text box than the background does
+    text_is_bright = split.mean() < 0.5
+    text = luminance[split] if text_is_bright else luminance[~split]
+    background = luminance[~split] if text_is_bright else luminance[split]
+    if text.size == 0 or background.size == 0:
+        return 1.0
+    return float(contrast_ratio(float(np.median(text)), float(np.median(background))))
+
+
+def analyze(image, use_ocr=True):
+    """Per-region legibility results for an image, cached per image hash.
+
+    Each region reports its WCAG contrast ratio, relative text height and pass/fail against
+    the contrast level required for its size and the minimum text height.
+    """
+    key = f"{ocr_headlines.image_hash(image)}-{int(use_ocr)}-{MIN_TEXT_HEIGHT}-{LARGE_TEXT_HEIGHT}"
+    cached = cache_store.read_json(NAMESPACE, key)
+    if cached is not None:
+        return cached
+
+    rgb = np.asarray(image.convert("RGB"))
+    height = rgb.shape[0]
+    regions, source, ocr_failed = [], "mser", False
+    if use_ocr:
+        try:
+            regions = ocr_headlines.extract_headlines(image)["blocks"]
+            source = "ocr"
+        except Exception:
+            regions, ocr_failed = [], True
+    if not regions:
+        regions, source = mser_text_regions(cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)), "mser"
+
+    results = []
+    for region in regions:
+        relative_height = region["font_size"] / float(height)
+        required = WCAG_LARGE if relative_height >= LARGE_TEXT_HEIGHT else WCAG_NORMAL
+        ratio = region_contrast(rgb, region["box"])
+        results.append({
+            "text": region.get("text", ""),
+            "role": region.get("role", "text"),
+            "box": region["box"],
+            "contrast_ratio": round(ratio, 2),
+            "required_ratio": required,
+            "relative_height": relative_height,
+            "contrast_pass": ratio >= required,
+            "size_pass": relative_height >= MIN_TEXT_HEIGHT,
+        })
+        results[-1]["pass"] = results[-1]["contrast_pass"] and results[-1]["size_pass"]
+    report = {
+        "source": source,
+        "regions": results,
+        "pass_rate": float(np.mean([result["pass"] for result in results])) if results else 1.0,
+    }
+    # A fallback after an OCR error is not the OCR result: cache it only under the OCR-less key
+    if ocr_failed:
+        key = f"{ocr_headlines.image_hash(image)}-0-{MIN_TEXT_HEIGHT}-{LARGE_TEXT_HEIGHT}"
+    cache_store.write_json(NAMESPACE, key, report)
+    return report
+
+
+def describe_legibility(report, limit=10):
+    """Render the legibility report as prompt context."""
+    if not report["regions"]:
+        return "Local legibility check: no text regions were detected.\n"
+    lines = [
+        f"- \"{region['text'] or region['role']}\": contrast {region['contrast_ratio']:.1f}:1 "
+        f"(needs {region['required_ratio']}:1), height {region['relative_height']:.1%} of canvas — "
+        f"{'PASS' if region['pass'] else 'FAIL'}"
+        for region in report["regions"][:limit]
+    ]
+    return (
+        f"Local WCAG legibility check ({report['pass_rate']:.0%} of text regions pass):\n" + "\n".join(lines) + "\n"
+    )
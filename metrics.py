@@ -0,0 +1,166 @@
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+from prometheus_client.parser import text_string_to_metric_families
+
+import tracing
+
+STAGES = ("decode", "preprocess", "model", "parse")
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram("marketing_stage_seconds", "Seconds spent per analysis in each stage (decode, preprocess, model, parse).",
+                          ["analysis", "stage"], buckets=BUCKETS)
+MODEL_CALLS = Counter("marketing_model_calls", "Model calls by outcome (ok, error, rate_limited).", ["analysis", "outcome"])
+MODEL_TOKENS = Counter("marketing_model_tokens", "Tokens reported in usage_metadata, by direction (input, output).",
+                       ["analysis", "direction"])
+RETRIES = Counter("marketing_retries", "Operations retried after a transient failure.", ["operation"])
+CACHE_LOOKUPS = Counter("marketing_cache_lookups", "Cache lookups by namespace and result (hit, miss).", ["namespace", "result"])
+# livesum: under gunicorn each worker reports its own value and /metrics adds up the live ones
+IN_FLIGHT = Gauge("marketing_in_flight", "Work in progress (http, batch, model, preprocess).", ["kind"], multiprocess_mode="livesum")
+QUEUE_DEPTH = Gauge("marketing_queue_depth", "Jobs waiting for a free worker.", ["queue"], multiprocess_mode="livesum")
+
+
+def registry():
+    """The registry to expose: every gunicorn worker's metrics when PROMETHEUS_MULTIPROC_DIR is set."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        collected = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collected)
+        return collected
+    return REGISTRY
+
+
+def exposition():
+    """(body, content type) for a /metrics response."""
+    return generate_latest(registry()), CONTENT_TYPE_LATEST
+
+
+@contextmanager
+def stage(analysis, name):
+    """Time a block as one stage of an analysis, and trace it as a span of the same name."""
+    start = time.perf_counter()
+    try:
+        with tracing.span(name, analysis=analysis):
+            yield
+    finally:
+        STAGE_SECONDS.labels(analysis, name).observe(time.perf_counter() - start)
+
+
+def cache_lookup(namespace, hit):
+    CACHE_LOOKUPS.labels(namespace, "hit" if hit else "miss").inc()
+
+
+def _rate_limited(error):
+    # google.api_core raises ResourceExhausted (code 429) when the quota is used up
+    return int(getattr(error, "code", 0) or 0) == 429 or type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+
+
+def record_usage(analysis, response):
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        input_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        MODEL_TOKENS.labels(analysis, "input").inc(input_tokens)
+        MODEL_TOKENS.labels(analysis, "output").inc(output_tokens)
+        tracing.set_attributes(input_tokens=input_tokens, output_tokens=output_tokens)
+
+
+def payload_bytes(contents):
+    """Approximate request size: prompt text plus inline media bytes."""
+    total = 0
+    for part in contents if isinstance(contents, list) else [contents]:
+        if isinstance(part, str):
+            total += len(part.encode("utf-8"))
+        elif isinstance(part, dict):
+            total += len(part.get("data", b""))
+        elif isinstance(part, (bytes, bytearray)):
+            total += len(part)
+    return total
+
+
+def model_name(model):
+    return getattr(model, "model_name", None) or getattr(model, "_model_name", "") or ""
+
+
+def generate(model, contents, analysis, **kwargs):
+    """model.generate_content, recording latency, outcome, concurrency and token usage under the analysis name.
+
+    The call is traced as a generate_content span with the model, prompt family, request bytes and tokens.
+    """
+    in_flight = IN_FLIGHT.labels("model")
+    in_flight.inc()
+    start = time.perf_counter()
+    with tracing.span("generate_content", model=model_name(model), prompt_family=analysis, bytes=payload_bytes(contents)):
+        try:
+            response = model.generate_content(contents, **kwargs)
+        except Exception as e:
+            MODEL_CALLS.labels(analysis, "rate_limited" if _rate_limited(e) else "error").inc()
+            raise
+        finally:
+            in_flight.dec()
+            STAGE_SECONDS.labels(analysis, "model").observe(time.perf_counter() - start)
+        MODEL_CALLS.labels(analysis, "ok").inc()
+        record_usage(analysis, response)
+    return response
+
+
+def _quantile(buckets, q):
+    """Estimate a quantile from cumulative (upper bound, count) histogram buckets, like histogram_quantile()."""
+    total = buckets[-1][1]
+    if not total:
+        return None
+    rank = q * total
+    lower, below = 0.0, 0.0
+    for upper, count in buckets:
+        if count >= rank:
+            if upper == float("inf"):
+                return lower
+            return lower + (upper - lower) * (rank - below) / ((count - below) or 1)
+        lower, below = upper, count
+    return lower
+
+
+def snapshot(text):
+    """Turn a Prometheus text exposition into plain rows for display.
+
+    Returns {"stages", "model_calls", "tokens", "cache", "retries", "gauges"}, each a list of dicts.
+    """
+    samples = [sample for family in text_string_to_metric_families(text) for sample in family.samples]
+    histograms = {}
+    rows = {"stages": [], "model_calls": [], "tokens": [], "cache": [], "retries": [], "gauges": []}
+    cache = {}
+    for sample in samples:
+        name, labels, value = sample.name, sample.labels, sample.value
+        if name.startswith("marketing_stage_seconds"):
+            entry = histograms.setdefault((labels["analysis"], labels["stage"]), {"buckets": [], "count": 0, "sum": 0.0})
+            if name.endswith("_bucket"):
+                entry["buckets"].append((float(labels["le"]), value))
+            elif name.endswith("_count"):
+                entry["count"] = value
+            elif name.endswith("_sum"):
+                entry["sum"] = value
+        elif name == "marketing_model_calls_total":
+            rows["model_calls"].append(dict(labels, calls=value))
+        elif name == "marketing_model_tokens_total":
+            rows["tokens"].append(dict(labels, tokens=value))
+        elif name == "marketing_retries_total":
+            rows["retries"].append(dict(labels, retries=value))
+        elif name == "marketing_cache_lookups_total":
+            cache.setdefault(labels["namespace"], {"hit": 0.0, "miss": 0.0})[labels["result"]] += value
+        elif name in ("marketing_in_flight", "marketing_queue_depth"):
+            rows["gauges"].append({"metric": name, "label": labels.get("kind") or labels.get("queue"), "value": value})
+
+    for (analysis, stage_name), entry in sorted(histograms.items()):
+        if not entry["count"]:
+            continue
+        buckets = sorted(entry["buckets"])
+        rows["stages"].append({
+            "analysis": analysis, "stage": stage_name, "count": int(entry["count"]),
+            "mean_s": entry["sum"] / entry["count"], "p50_s": _quantile(buckets, 0.5), "p95_s": _quantile(buckets, 0.95),
+        })
+    for namespace, counts in sorted(cache.items()):
+        lookups = counts["hit"] + counts["miss"]
+        rows["cache"].append({"namespace": namespace, "hits": int(counts["hit"]), "misses": int(counts["miss"]),
+                              "hit_ratio": counts["hit"] / lookups if lookups else None})
+    return rows
@@ -0,0 +1,52 @@
+import os
+import json
+import time
+import random
+import asyncio
+from types import SimpleNamespace
+
+def _response(contents):
+    prompt = " ".join(part for part in contents if isinstance(part, str))
+    text = json.dumps({"stub": True, "prompt_chars": len(prompt), "media_parts": len(contents) - 1})
+    prompt_tokens = len(prompt) // 4 + 258 * (len(contents) - 1)
+    output_tokens = len(text) // 4
+    return SimpleNamespace(
+        text=text,
+        candidates=[SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))],
+        usage_metadata=SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens,
+                                       total_token_count=prompt_tokens + output_tokens),
+    )
+
+
+def _delay():
+    # Read per call: app3 imports this module before loading its .env file
+    latency = float(os.getenv("MODEL_STUB_LATENCY", "1.0"))
+    jitter = float(os.getenv("MODEL_STUB_JITTER", "0.2"))
+    return max(latency * (1 + random.uniform(-jitter, jitter)), 0.0)
+
+
+class StubModel:
+    """Stand-in for genai.GenerativeModel that answers after a simulated network latency."""
+
+    def __init__(self, model_name=None, generation_config=None, **kwargs):
+        self.model_name = model_name
+        self.generation_config = generation_config
+
+    def generate_content(self, contents, **kwargs):
+        time.sleep(_delay())
+        return _response(contents if isinstance(contents, list) else [contents])
+
+    async def generate_content_async(self, contents, **kwargs):
+        await asyncio.sleep(_delay())
+        return _response(contents if isinstance(contents, list) else [contents])
+
+
+def enabled():
+    """True when GENAI_MODEL_STUB is set, to serve without credentials or network (e.g. for load tests)."""
+    return os.getenv("GENAI_MODEL_STUB", "").lower() in ("1", "true", "yes")
+
+
+def install():
+    """Make every genai.GenerativeModel created from now on a StubModel."""
+    import google.generativeai as genai
+    genai.GenerativeModel = StubModel
@@ -1,132 +1,203 @@
-import streamlit as st
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-google_api_key = os.getenv("GOOGLE_API_KEY")
-
-# Configure Gemini API
-genai.configure(api_key=google_api_key)
-model = genai.GenerativeModel("gemini-2.5-flash")
-
-st.set_page_config(page_title="Multimodal Compliance AI", layout="wide")
-st.title("📊 Multimodal Document & Compliance Analysis with Gemini 2.5 Flash")
-
-# -----------------------------
-# 🔍 Generic Analysis Section
-# -----------------------------
-with st.expander("🔎 General Media Analysis (Prompt + Any File)", expanded=True):
-    uploaded_images = st.file_uploader("Upload Images", type=["jpg", "jpeg", "png"], accept_multiple_files=True, key="gen_images")
-    uploaded_pdfs = st.file_uploader("Upload PDF Books", type=["pdf"], accept_multiple_files=True, key="gen_pdfs")
-    uploaded_media = st.file_uploader("Upload Regulatory Media (e.g., TXT, CSV, etc.)", accept_multiple_files=True, key="gen_media")
-
-    # ✅ Show image previews for general analysis
-    if uploaded_images:
-        st.markdown("🖼️ **Preview of Uploaded Images:**")
-        for img in uploaded_images:
-            st.image(img, caption=img.name, use_container_width=True)
-
-    prompt = st.text_area("Enter your custom prompt for analysis:", height=200, key="gen_prompt")
-
-    if st.button("Run General Analysis", key="gen_button"):
-        if not (uploaded_images or uploaded_pdfs or uploaded_media):
-            st.warning("Please upload at least one file.")
-        elif not prompt:
-            st.warning("Please enter a prompt for analysis.")
-        else:
-            contents = [prompt]
-
-            for image_file in uploaded_images:
-                img_bytes = image_file.getvalue()
-                contents.append({"mime_type": image_file.type, "data": img_bytes})
-
-            for pdf_file in uploaded_pdfs:
-                pdf_bytes = pdf_file.getvalue()
-                contents.append({"mime_type": "application/pdf", "data": pdf_bytes})
-
-            for media_file in uploaded_media:
-                contents.append({"mime_type": media_file.type, "data": media_file.getvalue()})
-
-            try:
-                response = model.generate_content(contents)
-                st.subheader("🧠 Analysis Result:")
-                st.markdown(response.text)
-            except Exception as e:
-                st.error(f"An error occurred: {e}")
-
-# -----------------------------
-# ✅ Compliance Checker Section
-# -----------------------------
-st.markdown("---")
-st.subheader("🛡️ Compliance Checker: Compare Media Against Regulations")
-
-rulebooks = st.file_uploader("📚 Upload Rulebooks (PDF)", type=["pdf"], accept_multiple_files=True, key="rules")
-media_files = st.file_uploader("🖼️ Upload Media Files (Images, PDFs, PPTX, etc.)", accept_multiple_files=True, key="media")
-
-# ✅ Show image previews in the compliance section
-if media_files:
-    image_extensions = ["jpg", "jpeg", "png"]
-    st.markdown("🖼️ **Preview of Uploaded Media Images:**")
-    for media in media_files:
-        if any(media.name.lower().endswith(ext) for ext in image_extensions):
-            st.image(media, caption=media.name, use_container_width=True)
-
-compliance_prompt = st.text_area(
-    "🔧 Optional: Custom compliance prompt (e.g., 'Highlight all ad claims that may violate health disclaimers')",
-    height=150,
-    key="compliance_prompt"
-)
-
-if st.button("Analyze for Compliance"):
-    if not (rulebooks and media_files):
-        st.warning("Upload both rulebooks and media files.")
-    else:
-        base_context = ["Analyze these materials for rule compliance. Detect violations and suggest improvements."]
-        if compliance_prompt:
-            base_context.append(compliance_prompt)
-
-        for rule_pdf in rulebooks:
-            base_context.append({"mime_type": "application/pdf", "data": rule_pdf.getvalue()})
-
-        for media in media_files:
-            base_context.append({"mime_type": media.type, "data": media.getvalue()})
-
-        try:
-            response = model.generate_content(base_context)
-            st.subheader("📋 Compliance Report:")
-            st.markdown(response.text)
-        except Exception as e:
-            st.error(f"❌ Error during compliance check: {e}")
-
-# -----------------------------
-# ❓ Ask Rulebook-Only Questions
-# -----------------------------
-st.markdown("---")
-st.subheader("💬 Ask a Question Based on Rulebooks")
-
-query = st.text_input(
-    "Enter your question about the rules (e.g., 'Are health-related claims allowed in product ads?')",
-    key="rule_query"
-)
-
-if st.button("Ask Rulebook", key="query_button"):
-    if not rulebooks:
-        st.warning("Please upload rulebooks first.")
-    elif not query:
-        st.warning("Please enter a question.")
-    else:
-        context = [query]
-        for rule_pdf in rulebooks:
-            context.append({"mime_type": "application/pdf", "data": rule_pdf.getvalue()})
-
-        try:
-            response = model.generate_content(context)
-            st.subheader("📘 Answer from Rulebook:")
-            st.markdown(response.text)
-        except Exception as e:
-            st.error(f"❌ Error while querying rulebook: {e}")
-
-
-
+import streamlit as st
+import google.generativeai as genai
+import os
+from dotenv import load_dotenv
+
+import pandas as pd
+
+import rulebook_store
+import compliance_batch
+import prescreen
+import answer_cache
+
+# Load environment variables
+load_dotenv()
+google_api_key = os.getenv("GOOGLE_API_KEY")
+
+# Configure Gemini API
+genai.configure(api_key=google_api_key)
+model = genai.GenerativeModel("gemini-2.5-flash")
+cheap_model = genai.GenerativeModel(os.getenv("CHEAP_MODEL_NAME", "gemini-2.5-flash-lite"))
+
+st.set_page_config(page_title="Multimodal Compliance AI", layout="wide")
+st.title("📊 Multimodal Document & Compliance Analysis with Gemini 2.5 Flash")
+
+# -----------------------------
+# 🔍 Generic Analysis Section
+# -----------------------------
+with st.expander("🔎 General Media Analysis (Prompt + Any File)", expanded=True):
+    uploaded_images = st.file_uploader("Upload Images", type=["jpg", "jpeg", "png"], accept_multiple_files=True, key="gen_images")
+    uploaded_pdfs = st.file_uploader("Upload PDF Books", type=["pdf"], accept_multiple_files=True, key="gen_pdfs")
+    uploaded_media = st.file_uploader("Upload Regulatory Media (e.g., TXT, CSV, etc.)", accept_multiple_files=True, key="gen_media")
+
+    # ✅ Show image previews for general analysis
+    if uploaded_images:
+        st.markdown("🖼️ **Preview of Uploaded Images:**")
+        for img in uploaded_images:
+            st.image(img, caption=img.name, use_container_width=True)
+
+    prompt = st.text_area("Enter your custom prompt for analysis:", height=200, key="gen_prompt")
+
+    if st.button("Run General Analysis", key="gen_button"):
+        if not (uploaded_images or uploaded_pdfs or uploaded_media):
+            st.warning("Please upload at least one file.")
+        elif not prompt:
+            st.warning("Please enter a prompt for analysis.")
+        else:
+            contents = [prompt]
+
+            for image_file in uploaded_images:
+                img_bytes = image_file.getvalue()
+                contents.append({"mime_type": image_file.type, "data": img_bytes})
+
+            for pdf_file in uploaded_pdfs:
+                pdf_bytes = pdf_file.getvalue()
+                contents.append({"mime_type": "application/pdf", "data": pdf_bytes})
+
+            for media_file in uploaded_media:
+                contents.append({"mime_type": media_file.type, "data": media_file.getvalue()})
+
+            try:
+                response = model.generate_content(contents)
+                st.subheader("🧠 Analysis Result:")
+                st.markdown(response.text)
+            except Exception as e:
+                st.error(f"An error occurred: {e}")
+
+# -----------------------------
+# ✅ Compliance Checker Section
+# -----------------------------
+st.markdown("---")
+st.subheader("🛡️ Compliance Checker: Compare Media Against Regulations")
+
+rulebooks = st.file_uploader("📚 Upload Rulebooks (PDF)", type=["pdf"], accept_multiple_files=True, key="rules")
+
+# ✅ Parse and index rulebooks once; identical PDFs are served from the local store
+rulebook_metas = []
+if rulebooks:
+    try:
+        with st.spinner("Indexing rulebooks..."):
+            rulebook_metas, newly_indexed = rulebook_store.index_rulebooks(rulebooks)
+        if newly_indexed:
+            st.caption(f"📚 Indexed {len(newly_indexed)} new rulebook(s): {', '.join(newly_indexed)}")
+    except Exception as e:
+        st.error(f"❌ Error while indexing rulebooks: {e}")
+media_files = st.file_uploader("🖼️ Upload Media Files (Images, PDFs, PPTX, etc.)", accept_multiple_files=True, key="media")
+
+# ✅ Show image previews in the compliance section
+if media_files:
+    image_extensions = ["jpg", "jpeg", "png"]
+    st.markdown("🖼️ **Preview of Uploaded Media Images:**")
+    for media in media_files:
+        if any(media.name.lower().endswith(ext) for ext in image_extensions):
+            st.image(media, caption=media.name, use_container_width=True)
+
+compliance_prompt = st.text_area(
+    "🔧 Optional: Custom compliance prompt (e.g., 'Highlight all ad claims that may violate health disclaimers')",
+    height=150,
+    key="compliance_prompt"
+)
+
+use_prescreen = st.checkbox("⚡ Pre-screen assets locally for prohibited terms and disclaimers", value=True, key="use_prescreen")
+clean_asset_mode = st.radio(
+    "Assets that pass the pre-screen:",
+    ["Skip the LLM check", "Check with the cheaper model"],
+    index=1,  # skipping would pass any asset that paraphrases a claim unchecked
+    horizontal=True,
+    key="clean_asset_mode",
+    disabled=not use_prescreen,
+)
+
+if st.button("Analyze for Compliance"):
+    if not (rulebooks and media_files):
+        st.warning("Upload both rulebooks and media files.")
+    elif not rulebook_metas:
+        st.warning("Rulebooks could not be indexed. Please check the uploaded PDFs.")
+    else:
+        assets = [(media.name, media.type, media.getvalue()) for media in media_files]
+        progress_bar = st.progress(0)
+        status = st.empty()
+
+        def show_progress(result, done, total):
+            progress_bar.progress(done / total)
+            status.caption(f"Checked {done}/{total}: {result['asset']} → {result['verdict']}")
+
+        try:
+            terms = prescreen.build_terms(rulebook_metas) if use_prescreen else None
+            results = compliance_batch.run_batch(
+                model, assets, rulebook_metas,
+                extra_instructions=compliance_prompt,
+                on_result=show_progress,
+                terms=terms,
+                clean_model=cheap_model if clean_asset_mode == "Check with the cheaper model" else None,
+            )
+            if use_prescreen:
+                clean_count = sum(1 for result in results if result.get("prescreen") == "clean")
+                st.caption(f"⚡ {clean_count}/{len(results)} asset(s) passed the local pre-screen.")
+            st.subheader("📋 Compliance Report:")
+            rows = [row for result in results for row in compliance_batch.violation_rows(result)]
+            if rows:
+                st.dataframe(pd.DataFrame(rows), use_container_width=True)
+            st.markdown(compliance_batch.merge_report(results))
+            for result in results:
+                if result["error"]:
+                    st.error(f"❌ {result['asset']}: {result['error']}")
+        except Exception as e:
+            st.error(f"❌ Error during compliance check: {e}")
+
+# -----------------------------
+# ❓ Ask Rulebook-Only Questions
+# -----------------------------
+st.markdown("---")
+st.subheader("💬 Ask a Question Based on Rulebooks")
+
+query = st.text_input(
+    "Enter your question about the rules (e.g., 'Are health-related claims allowed in product ads?')",
+    key="rule_query"
+)
+
+if st.button("Ask Rulebook", key="query_button"):
+    if not rulebooks:
+        st.warning("Please upload rulebooks first.")
+    elif not query:
+        st.warning("Please enter a question.")
+    else:
+        rulebook_hashes = [meta["hash"] for meta in rulebook_metas]
+        try:
+            cached, similarity, question_vector = answer_cache.lookup(rulebook_hashes, query) if rulebook_hashes else (None, 0.0, None)
+            if cached:
+                st.subheader("📘 Answer from Rulebook (cached):")
+                st.caption(f"⚡ Served from cache ({similarity:.0%} similar to a previous question): “{cached['question']}”")
+                st.markdown(cached["answer"])
+            else:
+                context = [query]
+                for rule_pdf in rulebooks:
+                    context.append({"mime_type": "application/pdf", "data": rule_pdf.getvalue()})
+
+                response = model.generate_content(context)
+                st.subheader("📘 Answer from Rulebook:")
+                st.markdown(response.text)
+                if rulebook_hashes:
+                    answer_cache.store(rulebook_hashes, query, response.text, vector=question_vector)
+        except Exception as e:
+            st.error(f"❌ Error while querying rulebook: {e}")
+
+if rulebook_metas and st.button("🧹 Clear cached answers for these rulebooks", key="clear_answer_cache"):
+    answer_cache.invalidate([meta["hash"] for meta in rulebook_metas])
+    st.success("Cached answers cleared.")
+
+# -----------------------------
+# 🗄️ Rulebook Store
+# -----------------------------
+with st.sidebar:
+    st.subheader("🗄️ Rulebook Store")
+    stored_rulebooks = rulebook_store.list_rulebooks()
+    total_mb = sum(meta.get("disk_bytes", 0) for meta in stored_rulebooks) / (1024 * 1024)
+    st.caption(f"{len(stored_rulebooks)} rulebook(s), {total_mb:.1f} MB of {rulebook_store.DISK_BUDGET_BYTES / (1024 * 1024):.0f} MB budget")
+    for meta in stored_rulebooks:
+        col_name, col_evict = st.columns([4, 1])
+        col_name.markdown(f"**{meta['names'][0]}** · {meta['pages']} pages · {meta['chunks']} chunks")
+        if col_evict.button("🗑️", key=f"evict_{meta['hash']}"):
+            rulebook_store.evict_rulebook(meta["hash"])
+            answer_cache.invalidate_rulebook(meta["hash"])
+            st.rerun()
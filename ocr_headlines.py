@@ -0,0 +1,142 @@
+import os
+import numpy as np
+import pytesseract
+
+import cache_store
+
+NAMESPACE = "ocr_headlines"
+OCR_ENGINE = os.getenv("OCR_ENGINE", "tesseract")  # "tesseract" or "easyocr"
+MIN_CONFIDENCE = 40
+HEADLINE_TYPES = ("main", "image", "supporting")
+HEADLINE_LABELS = {"main": "Main Headline", "image": "Image Headline", "supporting": "Supporting Headline"}
+
+_easyocr_reader = None
+
+
+def image_hash(image):
+    """Hash the decoded pixels so the same creative hits the cache whatever its container format."""
+    image = image.convert("RGB")
+    return cache_store.content_hash(f"{image.size}".encode("utf-8") + image.tobytes())
+
+
+def _tesseract_lines(image):
+    data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+    lines = {}
+    for i, word in enumerate(data["text"]):
+        if not word.strip() or float(data["conf"][i]) < MIN_CONFIDENCE:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        left, top, width, height = data["left"][i], data["top"][i], data["width"][i], data["height"][i]
+        line = lines.setdefault(key, {"words": [], "heights": [], "box": [left, top, left + width, top + height]})
+        line["words"].append(word.strip())
+        line["heights"].append(height)
+        box = line["box"]
+        line["box"] = [min(box[0], left), min(box[1], top), max(box[2], left + width), max(box[3], top + height)]
+    return [
+        {"text": " ".join(line["words"]), "box": line["box"], "font_size": float(np.median(line["heights"]))}
+        for line in lines.values()
+    ]
+
+
+def _easyocr_lines(image):
+    global _easyocr_reader
+    if _easyocr_reader is None:
+        import easyocr
+        _easyocr_reader = easyocr.Reader(["en"], gpu=False)
+    lines = []
+    for points, text, confidence in _easyocr_reader.readtext(np.asarray(image)):
+        if confidence * 100 < MIN_CONFIDENCE or not text.strip():
+            continue
+        xs = [point[0] for point in points]
+        ys = [point[1] for point in points]
+        box = [int(min(xs)), int(min(ys)), int(max(xs)), int(max(ys))]
+        # easyocr boxes include ascenders and descenders; ~0.75 of the box height approximates the cap height
+        lines.append({"text": text.strip(), "box": box, "font_size": 0.75 * (box[3] - box[1])})
+    return lines
+
+
+def _group_blocks(lines):
+    """Merge vertically adjacent lines of similar size into text blocks."""
+    blocks = []
+    for line in sorted(lines, key=lambda line: (line["box"][1], line["box"][0])):
+        for block in blocks:
+            box = block["box"]
+            similar_size = abs(line["font_size"] - block["font_size"]) <= 0.2 * block["font_size"]
+            vertical_gap = line["box"][1] - box[3]
+            overlaps_horizontally = line["box"][0] < box[2] and line["box"][2] > box[0]
+            if similar_size and overlaps_horizontally and 0 <= vertical_gap <= block["font_size"]:
+                block["text"] += " " + line["text"]
+                block["box"] = [min(box[0], line["box"][0]), box[1], max(box[2], line["box"][2]), line["box"][3]]
+                break
+        else:
+            blocks.append(dict(line))
+    return blocks
+
+
+def classify_blocks(blocks, width, height):
+    """Label text blocks as main, image or supporting headline (or body) by size and position.
+
+    The main headline is the largest text, ties broken by the higher position. The supporting
+    headline is the largest smaller block placed just below or above the main headline. The image
+    headline is the largest remaining block that is clearly bigger than body text.
+    """
+    if not blocks:
+        return {}
+    for block in blocks:
+        block["role"] = "body"
+        block["relative_size"] = block["font_size"] / float(height)
+        block["centre"] = [(block["box"][0] + block["box"][2]) / (2.0 * width),
+                           (block["box"][1] + block["box"][3]) / (2.0 * height)]
+    ordered = sorted(blocks, key=lambda block: (-block["font_size"], block["box"][1]))
+    body_size = float(np.median([block["font_size"] for block in blocks]))
+
+    main = ordered[0]
+    main["role"] = "main"
+    roles = {"main": main}
+    for block in ordered[1:]:
+        near_main = min(abs(block["box"][1] - main["box"][3]), abs(main["box"][1] - block["box"][3])) <= 2 * main["font_size"]
+        if "supporting" not in roles and near_main and block["font_size"] < main["font_size"]:
+            block["role"] = "supporting"
+            roles["supporting"] = block
+        elif "image" not in roles and not near_main and block["font_size"] >= 1.2 * body_size:
+            block["role"] = "image"
+            roles["image"] = block
+    return roles
+
+
+def extract_headlines(image):
+    """OCR a creative and classify its text into headlines, cached per image hash.
+
+    Returns {"main", "image", "supporting": text or None, "blocks": [...], "all_text": str}.
+    """
+    key = image_hash(image)
+    cached = cache_store.read_json(NAMESPACE, key)
+    if cached is not None:
+        return cached
+
+    rgb = image.convert("RGB")
+    lines = _easyocr_lines(rgb) if OCR_ENGINE == "easyocr" else _tesseract_lines(rgb)
+    blocks = _group_blocks(lines)
+    roles = classify_blocks(blocks, *rgb.size)
+    result = {headline_type: roles[headline_type]["text"] if headline_type in roles else None for headline_type in HEADLINE_TYPES}
+    result["blocks"] = sorted(blocks, key=lambda block: (block["box"][1], block["box"][0]))
+    result["all_text"] = "\n".join(block["text"] for block in result["blocks"])
+    cache_store.write_json(NAMESPACE, key, result)
+    return result
+
+
+def seed_prompt(prompt, extraction):
+    """Prefix a headline prompt with the OCR extraction so it can run without the image."""
+    headlines = "\n".join(
+        f"- {HEADLINE_LABELS[headline_type]}: {extraction[headline_type] or 'Not present'}" for headline_type in HEADLINE_TYPES
+    )
+    layout = "\n".join(
+        f"- [{block['role']}] \"{block['text']}\" (text height {block['relative_size']:.1%} of the canvas, "
+        f"centre at {block['centre'][0]:.0%} across, {block['centre'][1]:.0%} down)"
+        for block in extraction["blocks"]
+    )
+    return (
+        "The text of the marketing asset has already been extracted with OCR. Do not ask for the image; "
+        "use the extraction below instead of performing the headline extraction step yourself.\n\n"
+        f"Extracted headlines:\n{headlines}\n\nAll text blocks, top to bottom:\n{layout}\n\n{prompt}"
+    )
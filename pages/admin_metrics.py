@@ -0,0 +1,62 @@
+import os
+import urllib.request
+import pandas as pd
+import streamlit as st
+
+import metrics
+
+# app3's scrape endpoint, served over plain HTTP like any Prometheus target
+METRICS_URL = os.getenv("METRICS_URL", "http://127.0.0.1:8000/metrics")
+
+
+def load_exposition(source, url):
+    if source == "This Streamlit server":
+        return metrics.exposition()[0].decode("utf-8")
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return response.read().decode("utf-8")
+
+
+def total(rows, field, **match):
+    return sum(row[field] for row in rows if all(row.get(key) == value for key, value in match.items()))
+
+
+st.title("📊 Metrics")
+source = st.radio("Source", ["app3 API", "This Streamlit server"], horizontal=True)
+url = st.text_input("app3 metrics URL", METRICS_URL, disabled=source != "app3 API")
+if st.button("🔄 Refresh"):
+    st.rerun()
+
+try:
+    rows = metrics.snapshot(load_exposition(source, url))
+except Exception as e:
+    st.error(f"Failed to load metrics: {e}")
+    st.stop()
+
+hits = sum(row["hits"] for row in rows["cache"])
+lookups = hits + sum(row["misses"] for row in rows["cache"])
+columns = st.columns(5)
+columns[0].metric("Model calls", f"{total(rows['model_calls'], 'calls'):.0f}")
+columns[1].metric("Rate limited (429)", f"{total(rows['model_calls'], 'calls', outcome='rate_limited'):.0f}")
+columns[2].metric("Input tokens", f"{total(rows['tokens'], 'tokens', direction='input'):,.0f}")
+columns[3].metric("Output tokens", f"{total(rows['tokens'], 'tokens', direction='output'):,.0f}")
+columns[4].metric("Cache hit ratio", f"{hits / lookups:.0%}" if lookups else "–")
+
+st.subheader("Latency by analysis and stage")
+if rows["stages"]:
+    stages = pd.DataFrame(rows["stages"])
+    st.dataframe(stages, use_container_width=True, hide_index=True)
+    st.bar_chart(stages.pivot_table(index="analysis", columns="stage", values="mean_s", aggfunc="sum"))
+else:
+    st.info("No analyses recorded yet.")
+
+left, right = st.columns(2)
+with left:
+    st.subheader("Caches")
+    st.dataframe(pd.DataFrame(rows["cache"]), use_container_width=True, hide_index=True)
+    st.subheader("Queues and concurrency")
+    st.dataframe(pd.DataFrame(rows["gauges"]), use_container_width=True, hide_index=True)
+with right:
+    st.subheader("Model calls")
+    st.dataframe(pd.DataFrame(rows["model_calls"]), use_container_width=True, hide_index=True)
+    st.subheader("Retries")
+    st.dataframe(pd.DataFrame(rows["retries"]), use_container_width=True, hide_index=True)
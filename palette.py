@@ -0,0 +1,187 @@
+import os
+import json
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+import cache_store
+import ocr_headlines
+import visual_metrics
+
+NAMESPACE = "palette"
+BRAND_PALETTE_PATH = os.getenv("BRAND_PALETTE_PATH", "brand_palette.json")
+PALETTE_SIZE = 6
+SAMPLE_PIXELS = 12000
+SAMPLE_SIDE = 256
+DEFAULT_TOLERANCE = 10.0  # CIEDE2000 distance above which a colour counts as off-brand
+
+
+def hex_to_rgb(value):
+    value = value.lstrip("#")
+    return [int(value[i:i + 2], 16) for i in (0, 2, 4)]
+
+
+def rgb_to_hex(rgb):
+    return "#{:02x}{:02x}{:02x}".format(*[int(round(channel)) for channel in rgb])
+
+
+def load_brand_palette(path=BRAND_PALETTE_PATH):
+    """Load {"colors": {"name": "#hex"}, "tolerance": float} or None when no brand palette is configured."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return {
+        "names": list(config["colors"].keys()),
+        "rgb": np.asarray([hex_to_rgb(value) for value in config["colors"].values()], dtype=np.float64),
+        "tolerance": float(config.get("tolerance", DEFAULT_TOLERANCE)),
+    }
+
+
+def rgb_to_lab(rgb):
+    """Convert an (..., 3) array of sRGB values in 0–255 to CIELAB (D65)."""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    matrix = np.array([[0.4124564, 0.3575761, 0.1804375],
+                       [0.2126729, 0.7151522, 0.0721750],
+                       [0.0193339, 0.1191920, 0.9503041]])
+    xyz = linear @ matrix.T / np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+def ciede2000(lab1, lab2):
+    """Vectorized CIEDE2000 colour difference; inputs broadcast against each other."""
+    L1, a1, b1 = np.moveaxis(np.asarray(lab1, dtype=np.float64), -1, 0)
+    L2, a2, b2 = np.moveaxis(np.asarray(lab2, dtype=np.float64), -1, 0)
+    C1, C2 = np.hypot(a1, b1), np.hypot(a2, b2)
+    C_mean7 = ((C1 + C2) / 2) ** 7
+    G = 0.5 * (1 - np.sqrt(C_mean7 / (C_mean7 + 25.0 ** 7)))
+    a1p, a2p = (1 + G) * a1, (1 + G) * a2
+    C1p, C2p = np.hypot(a1p, b1), np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+
+    dLp = L2 - L1
+    dCp = C2p - C1p
+    dh = h2p - h1p
+    dh = np.where(dh > 180, dh - 360, np.where(dh < -180, dh + 360, dh))
+    dh = np.where(C1p * C2p == 0, 0, dh)
+    dHp = 2 * np.sqrt(C1p * C2p) * np.sin(np.radians(dh / 2))
+
+    Lp_mean = (L1 + L2) / 2
+    Cp_mean = (C1p + C2p) / 2
+    h_sum = h1p + h2p
+    hp_mean = np.where(
+        C1p * C2p == 0, h_sum,
+        np.where(np.abs(h1p - h2p) <= 180, h_sum / 2, np.where(h_sum < 360, (h_sum + 360) / 2, (h_sum - 360) / 2)),
+    )
+    T = (1 - 0.17 * np.cos(np.radians(hp_mean - 30)) + 0.24 * np.cos(np.radians(2 * hp_mean))
+         + 0.32 * np.cos(np.radians(3 * hp_mean + 6)) - 0.20 * np.cos(np.radians(4 * hp_mean - 63)))
+    d_theta = 30 * np.exp(-(((hp_mean - 275) / 25) ** 2))
+    Cp_mean7 = Cp_mean ** 7
+    R_C = 2 * np.sqrt(Cp_mean7 / (Cp_mean7 + 25.0 ** 7))
+    S_L = 1 + 0.015 * (Lp_mean - 50) ** 2 / np.sqrt(20 + (Lp_mean - 50) ** 2)
+    S_C = 1 + 0.045 * Cp_mean
+    S_H = 1 + 0.015 * Cp_mean * T
+    R_T = -np.sin(np.radians(2 * d_theta)) * R_C
+    return np.sqrt((dLp / S_L) ** 2 + (dCp / S_C) ** 2 + (dHp / S_H) ** 2 + R_T * (dCp / S_C) * (dHp / S_H))
+
+
+def sample_pixels(image, count=SAMPLE_PIXELS, seed=0):
+    """Random subsample of the pixels of a downscaled copy of the image, as float32 RGB rows."""
+    pixels = visual_metrics.to_rgb_array(image, max_side=SAMPLE_SIDE).reshape(-1, 3).astype(np.float32)
+    if len(pixels) > count:
+        pixels = pixels[np.random.default_rng(seed).choice(len(pixels), count, replace=False)]
+    return pixels
+
+
+def _squared_distances(points, centres):
+    return (points ** 2).sum(1)[:, None] - 2 * points @ centres.T + (centres ** 2).sum(1)[None, :]
+
+
+def minibatch_kmeans(pixels, k=PALETTE_SIZE, batch_size=1024, iterations=40, seed=0):
+    """Mini-batch k-means (Sculley 2010) with k-means++ initialisation."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(np.unique(pixels, axis=0)))
+    centres = [pixels[rng.integers(len(pixels))]]
+    for _ in range(1, k):
+        distances = _squared_distances(pixels, np.asarray(centres)).min(axis=1).clip(min=0)
+        total = distances.sum()
+        centres.append(pixels[rng.choice(len(pixels), p=distances / total)] if total > 0 else pixels[rng.integers(len(pixels))])
+    centres = np.asarray(centres, dtype=np.float32)
+    counts = np.zeros(k)
+    for _ in range(iterations):
+        batch = pixels[rng.integers(len(pixels), size=min(batch_size, len(pixels)))]
+        nearest = _squared_distances(batch, centres).argmin(axis=1)
+        for cluster in np.unique(nearest):
+            members = batch[nearest == cluster]
+            counts[cluster] += len(members)
+            learning_rate = len(members) / counts[cluster]
+            centres[cluster] = (1 - learning_rate) * centres[cluster] + learning_rate * members.mean(axis=0)
+    return centres
+
+
+def extract_palette(image, brand=None, k=PALETTE_SIZE):
+    """Dominant palette with coverage and off-brand flags, cached per image and brand palette.
+
+    Returns {"swatches": [{"hex", "coverage", "brand_match", "delta_e", "off_brand"}], "off_brand_coverage": float}.
+    """
+    brand = load_brand_palette() if brand is None else brand
+    brand_key = cache_store.content_hash(json.dumps([brand["rgb"].tolist(), brand["tolerance"]]).encode())[:12] if brand else "none"
+    key = f"{ocr_headlines.image_hash(image)}-{brand_key}"
+    cached = cache_store.read_json(NAMESPACE, key)
+    if cached is not None:
+        return cached
+
+    pixels = sample_pixels(image)
+    centres = minibatch_kmeans(pixels, k=k)
+    coverage = np.bincount(_squared_distances(pixels, centres).argmin(axis=1), minlength=len(centres)) / float(len(pixels))
+
+    swatches = [{"hex": rgb_to_hex(centre), "coverage": float(share)} for centre, share in zip(centres, coverage)]
+    if brand is not None:
+        distances = ciede2000(rgb_to_lab(centres)[:, None, :], rgb_to_lab(brand["rgb"])[None, :, :])
+        for swatch, row in zip(swatches, distances):
+            best = int(row.argmin())
+            swatch["brand_match"] = brand["names"][best]
+            swatch["delta_e"] = float(row[best])
+            swatch["off_brand"] = bool(row[best] > brand["tolerance"])
+    swatches.sort(key=lambda swatch: swatch["coverage"], reverse=True)
+    result = {
+        "swatches": swatches,
+        "off_brand_coverage": float(sum(swatch["coverage"] for swatch in swatches if swatch.get("off_brand"))),
+        "brand_checked": brand is not None,
+    }
+    cache_store.write_json(NAMESPACE, key, result)
+    return result
+
+
+def extract_palettes(images, max_workers=8):
+    """Palettes for a batch of images; NumPy releases the GIL in the heavy loops."""
+    brand = load_brand_palette()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda image: extract_palette(image, brand=brand), images))
+
+
+def describe_palette(result):
+    """Render the palette as prompt context."""
+    lines = []
+    for swatch in result["swatches"]:
+        line = f"- {swatch['hex']} covering {swatch['coverage']:.0%}"
+        if result["brand_checked"]:
+            status = "OFF-BRAND" if swatch["off_brand"] else "on-brand"
+            line += f", nearest brand colour {swatch['brand_match']} (ΔE2000 {swatch['delta_e']:.1f}, {status})"
+        lines.append(line)
+    text = "Dominant colour palette measured locally (do not re-derive it):\n" + "\n".join(lines) + "\n"
+    if result["brand_checked"]:
+        text += f"Off-brand colour coverage: {result['off_brand_coverage']:.0%}\n"
+    return text
+
+
+def swatches_html(result):
+    """HTML strip of colour swatches sized by coverage, for st.markdown."""
+    blocks = "".join(
+        f'<div title="{swatch["hex"]} {swatch["coverage"]:.0%}" style="flex:{max(swatch["coverage"], 0.02):.3f};'
+        f'background:{swatch["hex"]};height:36px;{"outline:3px dashed red;outline-offset:-3px;" if swatch.get("off_brand") else ""}"></div>'
+        for swatch in result["swatches"]
+    )
+    return f'<div style="display:flex;width:100%;border:1px solid #ccc">{blocks}</div>'
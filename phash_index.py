@@ -0,0 +1,152 @@
+import os
+import json
+import threading
+import numpy as np
+from PIL import Image
+
+import cache_store
+
+INDEX_PATH = os.path.join(cache_store.CACHE_ROOT, "phash_index.jsonl")
+HAMMING_THRESHOLD = int(os.getenv("PHASH_HAMMING_THRESHOLD", "6"))
+HASH_BITS = 64
+
+# DCT-II basis for the 32x32 pHash transform
+_DCT_SIZE = 32
+_DCT = np.cos(np.pi * (2 * np.arange(_DCT_SIZE)[None, :] + 1) * np.arange(_DCT_SIZE)[:, None] / (2 * _DCT_SIZE))
+_BYTE_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def _bits_to_int(bits):
+    return int("".join("1" if bit else "0" for bit in np.asarray(bits).ravel()), 2)
+
+
+def dhash(image):
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 greyscale thumbnail."""
+    pixels = np.asarray(image.convert("L").resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(image):
+    """64-bit perceptual hash: low-frequency 8x8 DCT coefficients compared to their median."""
+    pixels = np.asarray(image.convert("L").resize((_DCT_SIZE, _DCT_SIZE), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:8, :8].ravel()
+    median = np.median(low[1:])  # the DC term only encodes overall brightness
+    return _bits_to_int(low > median)
+
+
+def popcount(values):
+    """Number of set bits of each uint64 in an array."""
+    values = np.asarray(values, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _BYTE_POPCOUNT[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class MultiIndexHashTable:
+    """Multi-index hashing for Hamming-radius search over 64-bit hashes.
+
+    The hash is split into threshold + 1 chunks; by the pigeonhole principle any hash within
+    the threshold matches at least one chunk exactly, so only those buckets are verified.
+    """
+
+    def __init__(self, threshold=HAMMING_THRESHOLD):
+        self.threshold = threshold
+        chunks = threshold + 1
+        # Python ints: a NumPy int64 mask for the top chunk would wrap negative
+        bounds = [int(bound) for bound in np.linspace(0, HASH_BITS, chunks + 1)]
+        self.chunk_masks = [(((1 << (end - start)) - 1) << start, start) for start, end in zip(bounds[:-1], bounds[1:])]
+        self.tables = [{} for _ in self.chunk_masks]
+        self.hashes = np.zeros(1024, dtype=np.uint64)
+        self.keys = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, value):
+        # Work out everything that can fail before touching the tables
+        stored = np.uint64(value)
+        chunks = [(value & mask) >> shift for mask, shift in self.chunk_masks]
+        position = len(self.keys)
+        if position == len(self.hashes):
+            self.hashes = np.concatenate([self.hashes, np.zeros_like(self.hashes)])
+        self.hashes[position] = stored
+        self.keys.append(key)
+        for table, chunk in zip(self.tables, chunks):
+            table.setdefault(chunk, []).append(position)
+
+    def query(self, value, threshold=None):
+        """Return [(key, distance)] of every stored hash within the threshold, closest first."""
+        threshold = self.threshold if threshold is None else min(threshold, self.threshold)
+        candidates = set()
+        for table, (mask, shift) in zip(self.tables, self.chunk_masks):
+            candidates.update(table.get((value & mask) >> shift, ()))
+        if not candidates:
+            return []
+        positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        distances = popcount(self.hashes[positions] ^ np.uint64(value))
+        close = distances <= threshold
+        order = np.argsort(distances[close], kind="stable")
+        return [(self.keys[position], int(distance))
+                for position, distance in zip(positions[close][order], distances[close][order])]
+
+
+class NearDuplicateIndex:
+    """Persistent pHash index over analyzed assets, appended to a JSONL file as assets are added."""
+
+    def __init__(self, path=INDEX_PATH, threshold=HAMMING_THRESHOLD):
+        self.path = path
+        self.table = MultiIndexHashTable(threshold)
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._insert(json.loads(line))
+                    except (ValueError, KeyError, TypeError, OverflowError):
+                        continue  # tolerate a torn last line or a bad entry
+
+    def _insert(self, entry):
+        if entry["key"] in self.entries:
+            return
+        self.table.add(entry["key"], int(entry["phash"], 16))
+        self.entries[entry["key"]] = entry
+
+    def add(self, key, image, **fields):
+        """Hash an image and add it to the index (no-op if the key is already indexed)."""
+        with self._lock:
+            if key in self.entries:
+                return self.entries[key]
+            entry = dict(fields, key=key, phash=f"{phash(image):016x}", dhash=f"{dhash(image):016x}")
+            # Only persist entries that made it into the in-memory index
+            self._insert(entry)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            return entry
+
+    def find(self, image, threshold=None, exclude=None):
+        """Near-duplicates of an image as [(entry, phash distance, dhash distance)], closest first."""
+        image_phash, image_dhash = phash(image), dhash(image)
+        with self._lock:
+            matches = self.table.query(image_phash, threshold)
+        results = []
+        for key, distance in matches:
+            if key == exclude:
+                continue
+            entry = self.entries[key]
+            results.append((entry, distance, bin(int(entry["dhash"], 16) ^ image_dhash).count("1")))
+        return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Process-wide near-duplicate index, loaded from disk on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex()
+        return _index
@@ -0,0 +1,140 @@
+import io
+import os
+import time
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+import frame_decoder
+import animated_media
+import metrics
+import tracing
+
+WORKERS = int(os.getenv("PREPROCESS_WORKERS", str(os.cpu_count() or 1)))
+# Jobs admitted beyond the ones running; past that, requests are turned away with a 503
+QUEUE_SIZE = int(os.getenv("PREPROCESS_QUEUE_SIZE", str(2 * WORKERS)))
+SUBMIT_TIMEOUT = float(os.getenv("PREPROCESS_SUBMIT_TIMEOUT", "2"))
+RESULT_TIMEOUT = float(os.getenv("PREPROCESS_TIMEOUT", "120"))
+# Formats the model accepts as-is; anything else is re-encoded
+PASSTHROUGH_FORMATS = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+JPEG_QUALITY = 90
+
+
+class PreprocessingBusy(Exception):
+    """Raised when the preprocessing pool is saturated and the request should be retried later."""
+
+
+def _encode(image):
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG", quality=JPEG_QUALITY)
+    return {"mime_type": "image/jpeg", "data": buffer.getvalue()}
+
+
+def _prepare(data, is_image, filename):
+    """Turn an upload (bytes, or the path of a spooled file) into model-ready image parts. Runs in a worker process."""
+    if is_image:
+        if animated_media.is_animated(data):
+            return [_encode(frame) for frame in animated_media.keyframes(data)]
+        if isinstance(data, str):
+            with open(data, "rb") as f:
+                data = f.read()
+        image = Image.open(io.BytesIO(data))
+        if image.format in PASSTHROUGH_FORMATS and not getattr(image, "is_animated", False):
+            image.verify()  # reject truncated or corrupt files without a full decode
+            return [{"mime_type": PASSTHROUGH_FORMATS[image.format], "data": data}]
+        return [_encode(image)]
+
+    if isinstance(data, str):
+        return _first_frame(data)
+    suffix = os.path.splitext(filename or "")[1] or ".mp4"
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(data)
+        tmp_path = tmp.name
+    try:
+        return _first_frame(tmp_path)
+    finally:
+        os.remove(tmp_path)
+
+
+def _first_frame(video_path):
+    # The routes analyze the first frame only, so only that frame is decoded
+    _, frames = frame_decoder.decode_frames(video_path, [0])
+    if len(frames) == 0:
+        raise Exception("No frames were extracted from the video. Please check the video format.")
+    return [_encode(Image.fromarray(frames[0]))]
+
+
+def _timed_prepare(data, is_image, filename):
+    # Wall-clock timestamps, so the parent can place the worker's decode on its own trace
+    start = time.time_ns()
+    return _prepare(data, is_image, filename), start, time.time_ns()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(WORKERS + QUEUE_SIZE)
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide preprocessing pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            context = frame_decoder.pool_context(preload=("frame_decoder", __name__))
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=context)
+        return _pool
+
+
+def in_flight():
+    """Number of preprocessing jobs running or queued."""
+    return _in_flight
+
+
+def saturated():
+    """True when no more jobs would be admitted right now."""
+    return _in_flight >= WORKERS + QUEUE_SIZE
+
+
+def _report():
+    metrics.IN_FLIGHT.labels("preprocess").set(_in_flight)
+    metrics.QUEUE_DEPTH.labels("preprocess").set(max(_in_flight - WORKERS, 0))
+
+
+def _release(_future):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+        _report()
+    _slots.release()
+
+
+def prepare(data, is_image, filename="", analysis=""):
+    """Preprocess uploaded media on the process pool and wait for the model-ready parts.
+
+    data is the upload's bytes, or the path of a file holding them, which saves copying a
+    large upload through the pool.
+
+    Raises PreprocessingBusy if no slot frees up within SUBMIT_TIMEOUT seconds. A slot stays
+    taken until its job really finishes, even if the caller stops waiting for it. The wall time
+    and the worker's decode time are recorded as the analysis' preprocess and decode stages.
+    """
+    global _in_flight
+    if not _slots.acquire(timeout=SUBMIT_TIMEOUT):
+        raise PreprocessingBusy("The server is busy preprocessing other uploads. Please retry shortly.")
+    with _in_flight_lock:
+        _in_flight += 1
+        _report()
+    with metrics.stage(analysis, "preprocess"):
+        try:
+            future = get_pool().submit(_timed_prepare, data, is_image, filename)
+        except Exception:
+            _release(None)
+            raise
+        future.add_done_callback(_release)
+        parts, decode_start, decode_end = future.result(timeout=RESULT_TIMEOUT)
+        tracing.record_span("decode", decode_start, decode_end, analysis=analysis, is_image=is_image, parts=len(parts))
+    metrics.STAGE_SECONDS.labels(analysis, "decode").observe((decode_end - decode_start) / 1e9)
+    return parts
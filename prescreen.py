@@ -0,0 +1,135 @@
+import io
+import os
+import re
+import json
+import functools
+from PIL import Image
+import pytesseract
+from PyPDF2 import PdfReader
+
+import cache_store
+import rulebook_store
+
+# Configurable term list: {"prohibited": [...], "required_disclaimers": [{"when": [...], "disclaimer": "..."}]}
+TERMS_PATH = os.getenv("COMPLIANCE_TERMS_PATH", "compliance_terms.json")
+MAX_TERM_WORDS = 6
+
+# Sentences in a rulebook that forbid something, and the quoted phrases they forbid
+_PROHIBITION_SENTENCE = re.compile(
+    r"[^.\n]*\b(?:prohibited|must not|may not|shall not|cannot|not permitted|not allowed|forbidden)\b[^.\n]*",
+    re.IGNORECASE,
+)
+# A single quote only counts when it is not between two word characters, so apostrophes
+# ("company's", "doesn't") are not taken for quotes
+_QUOTED_PHRASE = re.compile(
+    r"\"([^\"\n]{3,80})\"|“([^”\n]{3,80})”|(?<!\w)‘([^’\n]{3,80})’(?!\w)|(?<!\w)'([^'\n]{3,80})'(?!\w)"
+)
+
+
+def load_terms(path=TERMS_PATH):
+    """Load the configured prohibited terms and required disclaimers."""
+    if not os.path.exists(path):
+        return {"prohibited": [], "required_disclaimers": []}
+    with open(path, "r", encoding="utf-8") as f:
+        terms = json.load(f)
+    terms.setdefault("prohibited", [])
+    terms.setdefault("required_disclaimers", [])
+    return terms
+
+
+def prohibited_phrases(text):
+    """Quoted phrases of at most MAX_TERM_WORDS words in the sentences of text that prohibit something."""
+    phrases = set()
+    for sentence in _PROHIBITION_SENTENCE.findall(text):
+        for groups in _QUOTED_PHRASE.findall(sentence):
+            phrase = " ".join(next(group for group in groups if group).split()).lower()
+            if len(phrase.split()) <= MAX_TERM_WORDS:
+                phrases.add(phrase)
+    return phrases
+
+
+def derive_prohibited_terms(rulebook_metas):
+    """Collect quoted phrases from rulebook sentences that prohibit something.
+
+    Derived terms are cached per rulebook set, so this only scans each set once.
+    """
+    # The suffix retires terms cached before apostrophes stopped counting as quotes
+    set_hash = rulebook_store.rulebook_set_hash(meta["hash"] for meta in rulebook_metas) + "-v2"
+    cached = cache_store.read_json("prescreen_terms", set_hash)
+    if cached is not None:
+        return cached
+
+    terms = set()
+    for meta in rulebook_metas:
+        for page in rulebook_store.load_rulebook(meta["hash"])["pages"]:
+            terms.update(prohibited_phrases(page))
+    terms = sorted(terms)
+    cache_store.write_json("prescreen_terms", set_hash, terms)
+    return terms
+
+
+def build_terms(rulebook_metas, path=TERMS_PATH):
+    """Merge configured terms with the ones derived from the rulebooks."""
+    terms = load_terms(path)
+    prohibited = {term.lower() for term in terms["prohibited"]}
+    prohibited.update(derive_prohibited_terms(rulebook_metas))
+    return {"prohibited": sorted(prohibited), "required_disclaimers": terms["required_disclaimers"]}
+
+
+@functools.lru_cache(maxsize=64)
+def compile_matcher(terms):
+    """Compile a tuple of phrases into one case-insensitive alternation regex.
+
+    Longest phrases come first so overlapping terms report the most specific match.
+    """
+    if not terms:
+        return None
+    ordered = sorted(set(terms), key=len, reverse=True)
+    pattern = "|".join(r"\s+".join(re.escape(word) for word in term.split()) for term in ordered)
+    return re.compile(rf"(?<!\w)(?:{pattern})(?!\w)", re.IGNORECASE)
+
+
+def find_terms(text, terms):
+    """Return the distinct terms (lower-cased) found in the text."""
+    matcher = compile_matcher(tuple(terms))
+    if matcher is None or not text:
+        return []
+    return sorted({" ".join(match.group(0).lower().split()) for match in matcher.finditer(text)})
+
+
+def extract_text(mime_type, data):
+    """Extract text from an image (OCR), PDF or text file. Returns None when the type is unsupported."""
+    mime_type = mime_type or ""
+    if mime_type.startswith("image/"):
+        return pytesseract.image_to_string(Image.open(io.BytesIO(data)).convert("RGB"))
+    if mime_type == "application/pdf":
+        return "\n".join((page.extract_text() or "") for page in PdfReader(io.BytesIO(data)).pages)
+    if mime_type.startswith("text/") or mime_type in ("application/json", "application/csv"):
+        return data.decode("utf-8", errors="ignore")
+    return None
+
+
+def screen_asset(mime_type, data, terms):
+    """Pre-screen one asset locally.
+
+    status is "clean" when no prohibited term matched and every triggered disclaimer is present,
+    "flagged" otherwise, and "unreadable" when no text could be extracted (these always get the full check).
+    """
+    try:
+        text = extract_text(mime_type, data)
+    except Exception:
+        text = None
+    if not text or not text.strip():
+        return {"status": "unreadable", "prohibited_hits": [], "missing_disclaimers": [], "text": ""}
+
+    prohibited_hits = find_terms(text, terms["prohibited"])
+    missing_disclaimers = []
+    for rule in terms["required_disclaimers"]:
+        triggers = rule.get("when", [])
+        if triggers and not find_terms(text, triggers):
+            continue
+        if not find_terms(text, [rule["disclaimer"]]):
+            missing_disclaimers.append(rule["disclaimer"])
+
+    status = "flagged" if prohibited_hits or missing_disclaimers else "clean"
+    return {"status": status, "prohibited_hits": prohibited_hits, "missing_disclaimers": missing_disclaimers, "text": text}
@@ -0,0 +1,219 @@
+import io
+import os
+import json
+import time
+import uuid
+import numpy as np
+import google.generativeai as genai
+from PyPDF2 import PdfReader
+
+from cache_store import CACHE_ROOT, content_hash, directory_size, remove_tree
+
+# Parsed rulebooks live under <cache root>/rulebooks/<sha256 of the PDF>/
+STORE_DIR = os.path.join(CACHE_ROOT, "rulebooks")
+EMBEDDING_MODEL = os.getenv("RULEBOOK_EMBEDDING_MODEL", "models/text-embedding-004")
+DISK_BUDGET_BYTES = int(float(os.getenv("RULEBOOK_STORE_BUDGET_MB", "500")) * 1024 * 1024)
+CHUNK_SIZE = 1200
+CHUNK_OVERLAP = 200
+EMBED_BATCH_SIZE = 100
+# Temporary directories older than this are left over from a crashed indexing run
+STALE_PARTIAL_SECONDS = 3600
+
+
+def _rulebook_dir(rulebook_hash):
+    return os.path.join(STORE_DIR, rulebook_hash)
+
+
+def _read_meta(rulebook_hash):
+    try:
+        with open(os.path.join(_rulebook_dir(rulebook_hash), "meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(rulebook_hash, meta, directory=None):
+    path = os.path.join(directory or _rulebook_dir(rulebook_hash), "meta.json")
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def extract_pages(pdf_bytes):
+    """Extract the text of every page of a PDF."""
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    return [(page.extract_text() or "") for page in reader.pages]
+
+
+def chunk_pages(pages, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """Split page texts into overlapping chunks, remembering page number and character offsets."""
+    chunks = []
+    step = max(chunk_size - overlap, 1)
+    for page_number, text in enumerate(pages, start=1):
+        text = text.strip()
+        for start in range(0, len(text), step):
+            end = min(start + chunk_size, len(text))
+            chunks.append({"page": page_number, "start": start, "end": end, "text": text[start:end]})
+            if end == len(text):
+                break
+    return chunks
+
+
+def embed_texts(texts, task_type="retrieval_document"):
+    """Embed a list of texts with the Gemini embedding model, returning a float32 matrix."""
+    vectors = []
+    for i in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = texts[i:i + EMBED_BATCH_SIZE]
+        result = genai.embed_content(model=EMBEDDING_MODEL, content=batch, task_type=task_type)
+        vectors.extend(result["embedding"])
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1) if texts else np.zeros((0, 0), np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True) if len(matrix) else 1.0
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def index_rulebook(name, pdf_bytes, embed_fn=embed_texts):
+    """Parse, chunk and embed a rulebook unless an identical PDF is already in the store.
+
+    Returns the rulebook metadata; the content hash is available as meta["hash"].
+    """
+    rulebook_hash = content_hash(pdf_bytes)
+    meta = _read_meta(rulebook_hash)
+    if meta is not None:
+        meta["last_used"] = time.time()
+        if name not in meta["names"]:
+            meta["names"].append(name)
+        _write_meta(rulebook_hash, meta)
+        return meta
+
+    pages = extract_pages(pdf_bytes)
+    chunks = chunk_pages(pages)
+    vectors = embed_fn([chunk["text"] for chunk in chunks]) if chunks else np.zeros((0, 0), np.float32)
+
+    # Write everything, meta.json included, into a directory of our own and rename it into place,
+    # so a crash never leaves a half-indexed rulebook and concurrent sessions never share files
+    final_dir = _rulebook_dir(rulebook_hash)
+    tmp_dir = f"{final_dir}.partial-{uuid.uuid4().hex}"
+    os.makedirs(tmp_dir)
+    try:
+        with open(os.path.join(tmp_dir, "pages.json"), "w", encoding="utf-8") as f:
+            json.dump(pages, f)
+        with open(os.path.join(tmp_dir, "chunks.json"), "w", encoding="utf-8") as f:
+            json.dump(chunks, f)
+        np.save(os.path.join(tmp_dir, "vectors.npy"), vectors)
+
+        now = time.time()
+        meta = {
+            "hash": rulebook_hash,
+            "names": [name],
+            "pages": len(pages),
+            "chunks": len(chunks),
+            "pdf_bytes": len(pdf_bytes),
+            "created": now,
+            "last_used": now,
+        }
+        _write_meta(rulebook_hash, meta, tmp_dir)
+        meta["disk_bytes"] = directory_size(tmp_dir)
+        _write_meta(rulebook_hash, meta, tmp_dir)
+
+        if os.path.isdir(final_dir) and _read_meta(rulebook_hash) is None:
+            remove_tree(final_dir)  # left without meta.json by an older, interrupted run
+        try:
+            os.replace(tmp_dir, final_dir)
+        except OSError:
+            # Another session indexed the same PDF first: use its copy
+            existing = _read_meta(rulebook_hash)
+            if existing is None:
+                raise
+            return index_rulebook(name, pdf_bytes, embed_fn)
+    finally:
+        remove_tree(tmp_dir)
+    return meta
+
+
+def index_rulebooks(uploaded_files, embed_fn=embed_texts, budget_bytes=DISK_BUDGET_BYTES):
+    """Index a set of uploaded PDFs, only parsing the ones not already stored.
+
+    Returns (metas, newly_indexed_names). The disk budget is enforced afterwards,
+    never evicting rulebooks from the current set.
+    """
+    metas = []
+    newly_indexed = []
+    for uploaded in uploaded_files:
+        data = uploaded.getvalue()
+        existed = _read_meta(content_hash(data)) is not None
+        meta = index_rulebook(uploaded.name, data, embed_fn=embed_fn)
+        if not existed:
+            newly_indexed.append(uploaded.name)
+        metas.append(meta)
+    enforce_budget(budget_bytes, keep={meta["hash"] for meta in metas})
+    return metas, newly_indexed
+
+
+def rulebook_set_hash(rulebook_hashes):
+    """Order-independent hash identifying a set of rulebooks."""
+    return content_hash("\n".join(sorted(rulebook_hashes)).encode("utf-8"))
+
+
+def list_rulebooks():
+    """Return the metadata of every stored rulebook, most recently used first."""
+    if not os.path.isdir(STORE_DIR):
+        return []
+    metas = []
+    for entry in os.listdir(STORE_DIR):
+        if ".partial" in entry:
+            continue
+        meta = _read_meta(entry)
+        if meta is not None:
+            metas.append(meta)
+    return sorted(metas, key=lambda meta: meta["last_used"], reverse=True)
+
+
+def evict_rulebook(rulebook_hash):
+    """Remove a rulebook and all of its derived data from the store."""
+    remove_tree(_rulebook_dir(rulebook_hash))
+
+
+def remove_orphans(max_age=STALE_PARTIAL_SECONDS):
+    """Delete stale temporary directories and rulebook directories that have no meta.json."""
+    if not os.path.isdir(STORE_DIR):
+        return
+    now = time.time()
+    for entry in os.listdir(STORE_DIR):
+        path = os.path.join(STORE_DIR, entry)
+        try:
+            age = now - os.path.getmtime(path)
+        except OSError:
+            continue
+        if ".partial" in entry:
+            if age > max_age:
+                remove_tree(path)
+        elif os.path.isdir(path) and _read_meta(entry) is None and age > max_age:
+            remove_tree(path)
+
+
+def enforce_budget(budget_bytes=DISK_BUDGET_BYTES, keep=()):
+    """Evict least recently used rulebooks until the store fits in the disk budget."""
+    remove_orphans()
+    metas = list_rulebooks()
+    total = sum(meta.get("disk_bytes", 0) for meta in metas)
+    evicted = []
+    for meta in reversed(metas):  # least recently used first
+        if total <= budget_bytes:
+            break
+        if meta["hash"] in keep:
+            continue
+        evict_rulebook(meta["hash"])
+        total -= meta.get("disk_bytes", 0)
+        evicted.append(meta["hash"])
+    return evicted
+
+
+def load_rulebook(rulebook_hash):
+    """Load the pages, chunks and chunk vectors of a stored rulebook."""
+    rulebook_dir = _rulebook_dir(rulebook_hash)
+    with open(os.path.join(rulebook_dir, "pages.json"), "r", encoding="utf-8") as f:
+        pages = json.load(f)
+    with open(os.path.join(rulebook_dir, "chunks.json"), "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+    vectors = np.load(os.path.join(rulebook_dir, "vectors.npy"))
+    return {"meta": _read_meta(rulebook_hash), "pages": pages, "chunks": chunks, "vectors": vectors}
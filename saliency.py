@@ -0,0 +1,137 @@
+import os
+import re
+import cv2
+import numpy as np
+from PIL import Image
+
+import cache_store
+import ocr_headlines
+
+NAMESPACE = "saliency"
+MAP_WIDTH = 64  # spectral residual works on a heavily downscaled image
+SALIENT_PERCENTILE = 90
+CTA_PATTERN = re.compile(
+    r"\b(shop|buy|order|get|learn|sign|join|subscribe|download|book|try|start|discover|register|claim|call|apply|contact)\b"
+    r"|\b(now|today|here|more|free)\s*[!>›→]?$",
+    re.IGNORECASE,
+)
+
+
+def spectral_residual(image):
+    """Spectral residual saliency map (Hou & Zhang) at MAP_WIDTH resolution, normalized to 0–1."""
+    gray = np.asarray(image.convert("L"), dtype=np.float32)
+    height, width = gray.shape
+    small = cv2.resize(gray, (MAP_WIDTH, max(1, int(round(MAP_WIDTH * height / float(width))))), interpolation=cv2.INTER_AREA)
+    spectrum = np.fft.fft2(small)
+    log_amplitude = np.log(np.abs(spectrum) + 1e-8)
+    phase = np.angle(spectrum)
+    residual = log_amplitude - cv2.blur(log_amplitude, (3, 3))
+    saliency = np.abs(np.fft.ifft2(np.exp(residual + 1j * phase))) ** 2
+    saliency = cv2.GaussianBlur(saliency.astype(np.float32), (0, 0), sigmaX=2.5)
+    saliency -= saliency.min()
+    return saliency / max(float(saliency.max()), 1e-8)
+
+
+def _region_score(saliency_map, box, width, height):
+    """Mean of the top quartile of saliency values inside a box given in image coordinates."""
+    map_height, map_width = saliency_map.shape
+    x0 = int(box[0] * map_width / width)
+    y0 = int(box[1] * map_height / height)
+    x1 = max(x0 + 1, int(np.ceil(box[2] * map_width / width)))
+    y1 = max(y0 + 1, int(np.ceil(box[3] * map_height / height)))
+    values = saliency_map[y0:y1, x0:x1].ravel()
+    if values.size == 0:
+        return 0.0
+    return float(np.sort(values)[-max(1, values.size // 4):].mean())
+
+
+def _product_box(saliency_map, text_boxes, width, height):
+    """Largest salient blob that is not mostly text, in image coordinates."""
+    mask = (saliency_map >= np.percentile(saliency_map, SALIENT_PERCENTILE)).astype(np.uint8)
+    scale_x = width / float(saliency_map.shape[1])
+    scale_y = height / float(saliency_map.shape[0])
+    for box in text_boxes:
+        x0, y0 = int(box[0] / scale_x), int(box[1] / scale_y)
+        x1, y1 = int(np.ceil(box[2] / scale_x)), int(np.ceil(box[3] / scale_y))
+        mask[y0:y1, x0:x1] = 0
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+    return [int(x * scale_x), int(y * scale_y), int((x + w) * scale_x), int((y + h) * scale_y)]
+
+
+def detect_regions(image, saliency_map, text_blocks):
+    """Build headline, CTA, text and product regions from OCR blocks and the saliency map."""
+    width, height = image.size
+    regions = []
+    for block in text_blocks:
+        role = block.get("role", "body")
+        if role in ("main", "image", "supporting"):
+            kind = f"{ocr_headlines.HEADLINE_LABELS[role]}"
+        elif CTA_PATTERN.search(block["text"]) and len(block["text"].split()) <= 5:
+            kind = "CTA"
+        else:
+            kind = "Text"
+        regions.append({"kind": kind, "label": block["text"], "box": block["box"]})
+    product = _product_box(saliency_map, [block["box"] for block in text_blocks], width, height)
+    if product:
+        regions.append({"kind": "Product / Visual", "label": "Most salient non-text area", "box": product})
+    for region in regions:
+        region["score"] = _region_score(saliency_map, region["box"], width, height)
+    return regions
+
+
+def fixation_order(regions):
+    """Rank regions by saliency, most attention-grabbing first."""
+    ranked = sorted(regions, key=lambda region: region["score"], reverse=True)
+    for rank, region in enumerate(ranked, start=1):
+        region["rank"] = rank
+    return ranked
+
+
+def analyze(image):
+    """Saliency map and ranked fixation order for an image, cached per image hash.
+
+    Returns {"map": ndarray (MAP_WIDTH wide, 0–1), "regions": [...ranked...]}.
+    """
+    key = ocr_headlines.image_hash(image)
+    map_path = cache_store.cache_path(NAMESPACE, f"{key}.npy")
+    regions = cache_store.read_json(NAMESPACE, key)
+    if regions is not None and os.path.exists(map_path):
+        return {"map": np.load(map_path), "regions": regions}
+
+    saliency_map = spectral_residual(image)
+    try:
+        text_blocks = ocr_headlines.extract_headlines(image)["blocks"]
+    except Exception:
+        text_blocks = []
+    regions = fixation_order(detect_regions(image, saliency_map, text_blocks))
+    np.save(map_path, saliency_map)
+    cache_store.write_json(NAMESPACE, key, regions)
+    return {"map": saliency_map, "regions": regions}
+
+
+def heatmap_overlay(image, saliency_map, regions=(), alpha=0.45):
+    """Blend a colour-mapped saliency map over the image and number the ranked regions."""
+    rgb = np.asarray(image.convert("RGB"))
+    height, width = rgb.shape[:2]
+    heat = cv2.resize((saliency_map * 255).astype(np.uint8), (width, height), interpolation=cv2.INTER_CUBIC)
+    heat = cv2.cvtColor(cv2.applyColorMap(heat, cv2.COLORMAP_JET), cv2.COLOR_BGR2RGB)
+    overlay = cv2.addWeighted(rgb, 1 - alpha, heat, alpha, 0)
+    thickness = max(2, width // 300)
+    for region in regions:
+        x0, y0, x1, y1 = region["box"]
+        cv2.rectangle(overlay, (x0, y0), (x1, y1), (255, 255, 255), thickness)
+        cv2.putText(overlay, str(region["rank"]), (x0 + thickness, max(y0 - thickness, 12 * thickness)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5 * thickness, (255, 255, 255), thickness)
+    return Image.fromarray(overlay)
+
+
+def describe_fixations(regions, limit=8):
+    """Render the fixation order as prompt context."""
+    lines = [
+        f"{region['rank']}. {region['kind']}: \"{region['label']}\" (saliency {region['score']:.2f})"
+        for region in regions[:limit]
+    ]
+    return "Predicted order of content consumption from a local saliency model:\n" + "\n".join(lines) + "\n"
@@ -0,0 +1,147 @@
+import os
+import threading
+import numpy as np
+
+import cache_store
+import analysis_archive
+import visual_metrics
+import ocr_headlines
+import legibility
+import saliency
+
+MODEL_PATH = os.path.join(cache_store.CACHE_ROOT, "score_model.npz")
+TARGET_ANALYSIS = "overall_analysis"
+MIN_TRAINING_ASSETS = int(os.getenv("SCORE_MODEL_MIN_ASSETS", "30"))
+# Mean predictive standard deviation (score points) above which an asset is queued for the LLM
+UNCERTAINTY_THRESHOLD = float(os.getenv("SCORE_MODEL_UNCERTAINTY", "0.5"))
+ENSEMBLE_SIZE = 16
+RIDGE_ALPHA = 1.0
+
+FEATURES = [
+    "colourfulness", "rms_contrast", "edge_density", "text_region_ratio", "text_regions",
+    "palette_entropy", "focus_offset", "focus_spread",
+    "ocr_blocks", "ocr_words", "main_headline_words", "has_main_headline", "has_image_headline",
+    "has_supporting_headline", "has_cta", "main_headline_height", "legibility_pass_rate",
+]
+
+
+def extract_features(image):
+    """Local visual and OCR features of a creative, keyed by FEATURES."""
+    features = dict(visual_metrics.compute_metrics(image))
+    try:
+        extraction = ocr_headlines.extract_headlines(image)
+    except Exception:
+        extraction = {"main": None, "image": None, "supporting": None, "blocks": [], "all_text": ""}
+    main_block = next((block for block in extraction["blocks"] if block.get("role") == "main"), None)
+    features.update({
+        "ocr_blocks": len(extraction["blocks"]),
+        "ocr_words": len(extraction["all_text"].split()),
+        "main_headline_words": len((extraction["main"] or "").split()),
+        "has_main_headline": float(bool(extraction["main"])),
+        "has_image_headline": float(bool(extraction["image"])),
+        "has_supporting_headline": float(bool(extraction["supporting"])),
+        "has_cta": float(any(saliency.CTA_PATTERN.search(block["text"]) for block in extraction["blocks"])),
+        "main_headline_height": main_block["relative_size"] if main_block else 0.0,
+        "legibility_pass_rate": legibility.analyze(image)["pass_rate"],
+    })
+    return {name: float(features[name]) for name in FEATURES}
+
+
+def training_set():
+    """Feature matrix and aspect score matrix from archived assets that have both.
+
+    Returns (X, Y, aspects); missing aspect scores are NaN.
+    """
+    rows, targets = [], []
+    for record in analysis_archive.iter_records():
+        analysis = record.get("analyses", {}).get(TARGET_ANALYSIS)
+        if not analysis or not analysis.get("scores") or not record.get("features"):
+            continue
+        rows.append([record["features"].get(name, 0.0) for name in FEATURES])
+        targets.append(analysis["scores"])
+    aspects = sorted({aspect for scores in targets for aspect in scores})
+    X = np.asarray(rows, dtype=np.float64).reshape(len(rows), len(FEATURES))
+    Y = np.asarray([[scores.get(aspect, np.nan) for aspect in aspects] for scores in targets], dtype=np.float64)
+    return X, Y.reshape(len(rows), len(aspects)), aspects
+
+
+def _fit_ridge(X, Y, alpha):
+    """Multi-output ridge regression that ignores missing targets per aspect."""
+    design = np.hstack([X, np.ones((len(X), 1))])
+    penalty = alpha * np.eye(design.shape[1])
+    penalty[-1, -1] = 0  # do not shrink the intercept
+    weights = np.zeros((design.shape[1], Y.shape[1]))
+    for column in range(Y.shape[1]):
+        known = ~np.isnan(Y[:, column])
+        if known.sum() == 0:
+            continue
+        A = design[known]
+        weights[:, column] = np.linalg.solve(A.T @ A + penalty, A.T @ Y[known, column])
+    return weights
+
+
+def train(seed=0):
+    """Fit a bootstrap ensemble of ridge regressors on the archive and save it.
+
+    Returns the number of training assets, or 0 if there were not enough.
+    """
+    X, Y, aspects = training_set()
+    if len(X) < MIN_TRAINING_ASSETS:
+        return 0
+    mean, std = X.mean(axis=0), X.std(axis=0) + 1e-8
+    Xs = (X - mean) / std
+    rng = np.random.default_rng(seed)
+    ensemble = np.stack([
+        _fit_ridge(Xs[sample], Y[sample], RIDGE_ALPHA)
+        for sample in (rng.integers(len(Xs), size=len(Xs)) for _ in range(ENSEMBLE_SIZE))
+    ])
+    design = np.hstack([Xs, np.ones((len(Xs), 1))])
+    residuals = Y - (design @ ensemble.mean(axis=0))
+    noise = np.sqrt(np.nanmean(residuals ** 2, axis=0))
+    np.savez(MODEL_PATH, mean=mean, std=std, ensemble=ensemble, noise=noise,
+             aspects=np.asarray(aspects), features=np.asarray(FEATURES), n=len(X))
+    _reset()
+    return len(X)
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def _reset():
+    global _model
+    with _model_lock:
+        _model = None
+
+
+def load_model():
+    """The trained model, or None when it has not been trained (or was trained on other features)."""
+    global _model
+    with _model_lock:
+        if _model is None and os.path.exists(MODEL_PATH):
+            data = np.load(MODEL_PATH)
+            if list(data["features"]) == FEATURES:
+                _model = {key: data[key] for key in data.files}
+        return _model
+
+
+def predict(features):
+    """Predict aspect scores with uncertainty.
+
+    Returns None if no model is trained, else {"scores": {aspect: (mean, std)}, "uncertainty": float,
+    "needs_llm": bool}. The std combines ensemble disagreement and residual noise.
+    """
+    model = load_model()
+    if model is None:
+        return None
+    x = (np.asarray([features[name] for name in FEATURES]) - model["mean"]) / model["std"]
+    predictions = np.append(x, 1.0) @ model["ensemble"]  # (ensemble, aspects)
+    mean = np.clip(predictions.mean(axis=0), 1, 5)
+    std = np.sqrt(predictions.var(axis=0) + model["noise"] ** 2)
+    uncertainty = float(std.mean())
+    return {
+        "scores": {str(aspect): (float(m), float(s)) for aspect, m, s in zip(model["aspects"], mean, std)},
+        "uncertainty": uncertainty,
+        "needs_llm": uncertainty > UNCERTAINTY_THRESHOLD,
+        "trained_on": int(model["n"]),
+    }
@@ -0,0 +1,221 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+import cv2
+import faiss
+import numpy as np
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import cache_store
+import analysis_archive
+
+INDEX_DIR = os.path.join(cache_store.CACHE_ROOT, "similarity")
+THUMBNAIL_SIZE = (160, 160)
+HOG_SIZE = 64
+# HSV histogram bins (hue, saturation, value) and HOG geometry: 3x3 blocks of 2x2 cells, 9 orientations
+HSV_BINS = (8, 4, 4)
+HOG_CELL, HOG_BINS = 16, 9
+COLOUR_WEIGHT = 0.5  # share of the similarity coming from colour vs. structure
+DIMENSION = int(np.prod(HSV_BINS)) + (HOG_SIZE // HOG_CELL - 1) ** 2 * 4 * HOG_BINS
+# Recorded next to the vectors: an index is only ever searched with the embedding that built it
+EMBEDDING = f"hsv{'x'.join(map(str, HSV_BINS))}-numpy-hog{HOG_SIZE}-v1"
+
+
+def _hog(gray):
+    """HOG with 3x3 blocks of 2x2 cells and L2-Hys block normalisation.
+
+    Computed in NumPy rather than with cv2.HOGDescriptor, which OpenCV 5 removed and whose vectors
+    differ slightly from these, so that every build writes comparable vectors into the index.
+    """
+    gray = gray.astype(np.float32)
+    gx, gy = np.zeros_like(gray), np.zeros_like(gray)
+    gx[:, 1:-1] = gray[:, 2:] - gray[:, :-2]
+    gy[1:-1, :] = gray[2:, :] - gray[:-2, :]
+    magnitude = np.hypot(gx, gy)
+    position = (np.degrees(np.arctan2(gy, gx)) % 180) / (180 / HOG_BINS) - 0.5
+    low = np.floor(position).astype(int)
+    upper_weight = position - low
+    cells = HOG_SIZE // HOG_CELL
+    histograms = np.zeros((cells, cells, HOG_BINS), dtype=np.float32)
+    rows, cols = np.indices(gray.shape) // HOG_CELL
+    for bins, weight in ((low % HOG_BINS, 1 - upper_weight), ((low + 1) % HOG_BINS, upper_weight)):
+        np.add.at(histograms, (rows, cols, bins), magnitude * weight)
+    blocks = []
+    for y in range(cells - 1):
+        for x in range(cells - 1):
+            block = histograms[y:y + 2, x:x + 2].ravel()
+            block = np.minimum(block / (np.linalg.norm(block) + 1e-6), 0.2)  # L2-Hys
+            blocks.append(block / (np.linalg.norm(block) + 1e-6))
+    return np.concatenate(blocks)
+
+
+def embed(image):
+    """Compact L2-normalized embedding: weighted HSV colour histogram + HOG of a 64x64 greyscale thumbnail."""
+    rgb = np.asarray(image.convert("RGB"))
+    small = cv2.resize(rgb, (128, 128), interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_RGB2HSV)
+    histogram = cv2.calcHist([hsv], [0, 1, 2], None, list(HSV_BINS), [0, 180, 0, 256, 0, 256]).ravel()
+    histogram = np.sqrt(histogram / max(float(histogram.sum()), 1.0))  # Hellinger mapping for inner-product search
+    gray = cv2.resize(cv2.cvtColor(small, cv2.COLOR_RGB2GRAY), (HOG_SIZE, HOG_SIZE), interpolation=cv2.INTER_AREA)
+    hog = _hog(gray)
+    hog = hog / max(float(np.linalg.norm(hog)), 1e-8)
+    histogram = histogram / max(float(np.linalg.norm(histogram)), 1e-8)
+    vector = np.concatenate([np.sqrt(COLOUR_WEIGHT) * histogram, np.sqrt(1 - COLOUR_WEIGHT) * hog]).astype(np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-8)
+
+
+@contextmanager
+def _file_lock(f):
+    if fcntl is None:  # Windows: appends from a single process are still serialized by the index lock
+        yield
+        return
+    fcntl.flock(f, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SimilarityIndex:
+    """FAISS inner-product index over archived creatives.
+
+    Vectors are appended to a raw float32 file and keys to a JSONL file, so the index grows
+    incrementally without ever rewriting what is already on disk. Other processes (the Streamlit
+    app and the API) append to the same files, so the index reloads whenever they have changed.
+    """
+
+    def __init__(self, directory=INDEX_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.keys_path = os.path.join(directory, "keys.jsonl")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self._lock = threading.Lock()
+        self._check_embedding()
+        self._reset()
+        self._refresh()
+
+    def _check_embedding(self):
+        meta = {}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        has_vectors = os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) > 0
+        if has_vectors and meta.get("embedding") != EMBEDDING:
+            raise ValueError(f"The similarity index in {self.directory} was built with a different embedding "
+                             f"({meta.get('embedding', 'unknown')}, expected {EMBEDDING}). Delete it to rebuild.")
+        if not meta:
+            with open(self.meta_path, "w", encoding="utf-8") as f:
+                json.dump({"embedding": EMBEDDING, "dimension": DIMENSION}, f)
+
+    def _reset(self):
+        self.index = faiss.IndexFlatIP(DIMENSION)
+        self.keys = []
+        self._key_set = set()
+        self._offsets = (0, 0)  # bytes of the vectors and keys files already loaded
+
+    def _refresh(self):
+        """Load whatever this or another process (the Streamlit app, the API) appended since the last call."""
+        sizes = tuple(os.path.getsize(path) if os.path.exists(path) else 0 for path in (self.vectors_path, self.keys_path))
+        if sizes == self._offsets or not all(sizes):
+            return
+        if sizes[0] < self._offsets[0] or sizes[1] < self._offsets[1]:
+            self._check_embedding()  # the index was deleted or rebuilt
+            self._reset()
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._offsets[1])
+            lines = f.read(sizes[1] - self._offsets[1]).splitlines(keepends=True)
+        lines = [line for line in lines if line.endswith(b"\n")]  # a torn trailing write is read next time
+        with open(self.vectors_path, "rb") as f:
+            f.seek(self._offsets[0])
+            vectors = np.frombuffer(f.read(sizes[0] - self._offsets[0]), dtype=np.float32)
+        count = min(len(lines), len(vectors) // DIMENSION)
+        if not count:
+            return
+        keys = [json.loads(line)["key"] for line in lines[:count]]
+        self.index.add(vectors[:count * DIMENSION].reshape(count, DIMENSION))
+        self.keys.extend(keys)
+        self._key_set.update(keys)
+        self._offsets = (self._offsets[0] + count * DIMENSION * 4, self._offsets[1] + sum(map(len, lines[:count])))
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self.keys)
+
+    def __contains__(self, key):
+        with self._lock:
+            self._refresh()
+            return key in self._key_set
+
+    def add(self, key, image, name=None):
+        """Embed an image, add it to the index and store a thumbnail for display."""
+        with self._lock:
+            self._refresh()
+            if key in self._key_set:
+                return False
+            vector = embed(image)
+            # Vector and key are appended under a file lock so concurrent processes keep both files aligned
+            with open(self.vectors_path, "ab") as vectors_file, _file_lock(vectors_file):
+                vectors_file.write(vector.tobytes())
+                vectors_file.flush()
+                with open(self.keys_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"key": key, "name": name}) + "\n")
+            self._refresh()
+        thumbnail = image.convert("RGB")
+        thumbnail.thumbnail(THUMBNAIL_SIZE)
+        thumbnail.save(thumbnail_path(key), format="JPEG", quality=80)
+        return True
+
+    def search(self, image, k=5, exclude=None):
+        """Return [(key, similarity)] of the k most similar indexed creatives."""
+        with self._lock:
+            self._refresh()
+            if not self.keys:
+                return []
+            scores, positions = self.index.search(embed(image)[None, :], min(k + 1, len(self.keys)))
+            results = [(self.keys[position], float(score)) for score, position in zip(scores[0], positions[0])
+                       if position >= 0 and self.keys[position] != exclude]
+        return results[:k]
+
+
+def similar_creatives(image, k=5, exclude=None):
+    """Most similar archived creatives with their cached analysis scores.
+
+    Returns [{"key", "name", "similarity", "thumbnail", "scores": {analysis: {aspect: score}}, "mean_score"}].
+    """
+    results = []
+    for key, similarity in get_index().search(image, k=k, exclude=exclude):
+        record = analysis_archive.get(key) or {"name": key, "analyses": {}}
+        scores = {name: analysis["scores"] for name, analysis in record["analyses"].items() if analysis.get("scores")}
+        all_scores = [value for aspects in scores.values() for value in aspects.values()]
+        results.append({
+            "key": key,
+            "name": record["name"],
+            "similarity": similarity,
+            "thumbnail": thumbnail_path(key),
+            "scores": scores,
+            "mean_score": float(np.mean(all_scores)) if all_scores else None,
+        })
+    return results
+
+
+def thumbnail_path(key):
+    return cache_store.cache_path("similarity_thumbnails", f"{key}.jpg")
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Process-wide similarity index, loaded from disk on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SimilarityIndex()
+        return _index
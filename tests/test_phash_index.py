@@ -0,0 +1,56 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import phash_index
+
+
+def creative(seed=0):
+    """A photo-like test image: a colour gradient with a few shapes on it."""
+    y, x = np.mgrid[0:240, 0:320]
+    pixels = np.stack([x * 255 // 320, y * 255 // 240, np.full_like(x, 120)], axis=-1).astype(np.uint8)
+    image = Image.fromarray(pixels)
+    draw = ImageDraw.Draw(image)
+    rng = np.random.default_rng(seed)
+    for _ in range(6):
+        x0, y0 = rng.integers(0, 260), rng.integers(0, 180)
+        draw.rectangle([x0, y0, x0 + 60, y0 + 40], fill=tuple(int(v) for v in rng.integers(0, 255, 3)))
+    return image
+
+
+def test_index_and_query_real_image(tmp_path):
+    image = creative()
+    # The DC coefficient lands in the top bit, so real images hash to values >= 2**63
+    assert phash_index.phash(image) >= 1 << 63
+
+    path = str(tmp_path / "phash_index.jsonl")
+    index = phash_index.NearDuplicateIndex(path)
+    index.add("original", image, name="original.png")
+    index.add("other", creative(seed=1), name="other.png")
+
+    resized = image.resize((160, 120))
+    matches = index.find(resized)
+    assert matches and matches[0][0]["key"] == "original"
+    assert matches[0][1] <= phash_index.HAMMING_THRESHOLD
+
+    reloaded = phash_index.NearDuplicateIndex(path)
+    assert reloaded.find(resized)[0][0]["key"] == "original"
+
+
+def test_failed_insert_is_not_persisted(tmp_path, monkeypatch):
+    path = str(tmp_path / "phash_index.jsonl")
+    index = phash_index.NearDuplicateIndex(path)
+
+    def fail(key, value):
+        raise OverflowError("boom")
+
+    monkeypatch.setattr(index.table, "add", fail)
+    with pytest.raises(OverflowError):
+        index.add("asset", creative())
+    assert "asset" not in index.entries
+    assert not os.path.exists(path)
@@ -0,0 +1,17 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import prescreen
+
+
+def test_apostrophes_are_not_quotes():
+    text = "Ads for the company's products must not use the phrase 'risk free' or claim it doesn't hurt."
+    assert prescreen.prohibited_phrases(text) == {"risk free"}
+
+
+def test_double_and_typographic_quotes():
+    text = ("Claims such as \"clinically proven\" are prohibited. "
+            "The company’s ads may not say ‘guaranteed results’ or “100% safe”.")
+    assert prescreen.prohibited_phrases(text) == {"clinically proven", "guaranteed results", "100% safe"}
@@ -0,0 +1,48 @@
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import video_upload
+
+
+class FakePart:
+    """Records how the part was built, like the SDK's Part.from_data / Part.from_uri."""
+
+    @classmethod
+    def from_data(cls, mime_type, data):
+        return ("data", mime_type, data)
+
+    @classmethod
+    def from_uri(cls, uri, mime_type):
+        return ("uri", mime_type, uri)
+
+
+def test_small_video_is_sent_inline(tmp_path):
+    video = io.BytesIO(b"x" * 1024)
+    uploader = video_upload.LocalUploader(str(tmp_path))
+    part, info = video_upload.video_part(video, "video/mp4", FakePart, uploader=uploader, inline_limit_mb=1)
+    assert part == ("data", "video/mp4", b"x" * 1024)
+    assert info == {"mode": "inline", "size": 1024}
+    assert os.listdir(tmp_path) == []
+
+
+def test_large_video_is_uploaded_in_chunks(tmp_path):
+    data = os.urandom(2 * 1024 * 1024)
+    uploader = video_upload.LocalUploader(str(tmp_path))
+    part, info = video_upload.video_part(io.BytesIO(data), "video/mp4", FakePart, uploader=uploader, inline_limit_mb=1)
+    assert info["mode"] == "uploaded" and info["size"] == len(data)
+    assert part == ("uri", "video/mp4", info["uri"])
+    path = info["uri"][len("file://"):]
+    with open(path, "rb") as f:
+        assert f.read() == data
+    assert os.path.basename(path) == video_upload.stream_hash(io.BytesIO(data))
+
+
+def test_large_video_without_uploader_is_flagged(monkeypatch):
+    monkeypatch.setattr(video_upload, "UPLOADER", "")
+    data = b"x" * (2 * 1024 * 1024)
+    part, info = video_upload.video_part(io.BytesIO(data), "video/mp4", FakePart, inline_limit_mb=1)
+    assert part[0] == "data"
+    assert info == {"mode": "inline-over-limit", "size": len(data)}
@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import threading
+from contextlib import contextmanager
+from opentelemetry import context, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+# Spans go to a local JSONL file (by default next to the other caches); TRACING_ENABLED=0 makes every span a no-op
+TRACE_PATH = os.getenv("TRACE_JSONL_PATH", os.path.join(os.getenv("MARKETING_CACHE_DIR", ".cache"), "traces", "spans.jsonl"))
+ENABLED = os.getenv("TRACING_ENABLED", "1").lower() not in ("0", "false", "no")
+
+tracer = trace.get_tracer("marketing")
+_setup_lock = threading.Lock()
+_configured = False
+
+
+def _hex(value, width):
+    return format(value, f"0{width}x")
+
+
+def span_record(span):
+    """One finished span as a flat JSON-serialisable dict."""
+    parent = span.parent
+    return {
+        "trace_id": _hex(span.context.trace_id, 32),
+        "span_id": _hex(span.context.span_id, 16),
+        "parent_id": _hex(parent.span_id, 16) if parent else None,
+        "name": span.name,
+        "service": span.resource.attributes.get("service.name"),
+        "pid": os.getpid(),
+        "start_ns": span.start_time,
+        "end_ns": span.end_time,
+        "duration_ms": (span.end_time - span.start_time) / 1e6,
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+        "events": [{"name": event.name, "time_ns": event.timestamp, "attributes": dict(event.attributes or {})}
+                   for event in span.events],
+    }
+
+
+class JsonlSpanExporter(SpanExporter):
+    """OpenTelemetry exporter that appends finished spans to a local JSONL file, one span per line."""
+
+    def __init__(self, path=TRACE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, spans):
+        lines = "".join(json.dumps(span_record(span), default=str) + "\n" for span in spans)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def setup(service_name, path=TRACE_PATH):
+    """Install the tracer provider for this process once. Until then every span is a no-op."""
+    global _configured
+    with _setup_lock:
+        if _configured or not ENABLED:
+            return
+        provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        provider.add_span_processor(BatchSpanProcessor(JsonlSpanExporter(path)))
+        trace.set_tracer_provider(provider)
+        _configured = True
+
+
+def _attributes(attributes):
+    # OpenTelemetry only accepts primitive attribute values
+    return {key: value for key, value in attributes.items() if isinstance(value, (str, bool, int, float))}
+
+
+@contextmanager
+def span(name, **attributes):
+    """Trace a block as a child of the current span."""
+    with tracer.start_as_current_span(name, attributes=_attributes(attributes)) as current:
+        yield current
+
+
+def start_span(name, **attributes):
+    """Open a span and make it current until end_span, for code that cannot use a with block (request hooks)."""
+    opened = tracer.start_span(name, attributes=_attributes(attributes))
+    return opened, context.attach(trace.set_span_in_context(opened))
+
+
+def end_span(opened, token):
+    context.detach(token)
+    opened.end()
+
+
+def open_span(name, parent=None, **attributes):
+    """Start a span without making it current, for work that outlives the request (streamed responses).
+
+    parent is a context from current_context(). Returns (span, context carrying the span) for wrap().
+    """
+    opened = tracer.start_span(name, context=parent, attributes=_attributes(attributes))
+    return opened, trace.set_span_in_context(opened, parent)
+
+
+def current_context():
+    return context.get_current()
+
+
+def record_span(name, start_ns, end_ns, **attributes):
+    """Add a finished child span from timestamps taken elsewhere, e.g. in a worker process."""
+    finished = tracer.start_span(name, attributes=_attributes(attributes), start_time=int(start_ns))
+    finished.end(end_time=int(end_ns))
+
+
+def set_attributes(**attributes):
+    trace.get_current_span().set_attributes(_attributes(attributes))
+
+
+def wrap(fn, parent=None):
+    """Bind fn to the current (or the given) trace context so spans it opens on a pool thread keep their parent."""
+    captured = context.get_current() if parent is None else parent
+
+    def traced(*args, **kwargs):
+        token = context.attach(captured)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            context.detach(token)
+    return traced
+
+
+def load(path=TRACE_PATH):
+    """Every span in a JSONL trace file, grouped by trace id in start order."""
+    traces = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                traces.setdefault(record["trace_id"], []).append(record)
+    for spans in traces.values():
+        spans.sort(key=lambda record: record["start_ns"])
+    return dict(sorted(traces.items(), key=lambda item: item[1][0]["start_ns"]))
+
+
+def timeline(spans, width=60):
+    """Text flame timeline of one trace: each span indented under its parent with a bar over the trace's duration."""
+    start = min(record["start_ns"] for record in spans)
+    total = max(max(record["end_ns"] for record in spans) - start, 1)
+    children = {}
+    for record in spans:
+        children.setdefault(record["parent_id"], []).append(record)
+    ids = {record["span_id"] for record in spans}
+    lines = []
+
+    def walk(record, depth):
+        left = int((record["start_ns"] - start) / total * width)
+        bar = " " * left + "█" * max(int(record["duration_ms"] * 1e6 / total * width), 1)
+        lines.append(f"{bar:<{width}} {record['duration_ms']:9.1f} ms  {'  ' * depth}{record['name']}")
+        for child in children.get(record["span_id"], []):
+            walk(child, depth + 1)
+
+    for root in [record for record in spans if record["parent_id"] not in ids]:
+        walk(root, 0)
+    return "\n".join(lines)
+
+
+def chrome_trace(spans):
+    """Spans as Chrome trace events, to open in Perfetto or chrome://tracing."""
+    return {"traceEvents": [
+        {"name": record["name"], "ph": "X", "ts": record["start_ns"] / 1000, "dur": record["duration_ms"] * 1000,
+         "pid": record["pid"], "tid": record["trace_id"][:8], "args": record["attributes"]}
+        for record in spans
+    ]}
+
+
+if __name__ == "__main__":
+    # Inspect traces offline: python tracing.py [spans.jsonl] [trace_id|last] [--chrome out.json]
+    args = [arg for arg in sys.argv[1:] if arg != "--chrome"]
+    chrome_path = sys.argv[sys.argv.index("--chrome") + 1] if "--chrome" in sys.argv else None
+    if chrome_path:
+        args.remove(chrome_path)
+    traces = load(args[0] if args else TRACE_PATH)
+    wanted = args[1] if len(args) > 1 else "last"
+    selected = list(traces.values())[-1] if wanted == "last" else traces[wanted]
+    print(f"trace {selected[0]['trace_id']} ({len(selected)} spans)")
+    print(timeline(selected))
+    if chrome_path:
+        with open(chrome_path, "w", encoding="utf-8") as f:
+            json.dump(chrome_trace(selected), f)
+        print(f"Chrome trace written to {chrome_path}")
@@ -0,0 +1,157 @@
+import io
+import os
+import tempfile
+from flask import Request
+
+import cache_store
+
+SPOOL_NAMESPACE = "upload_spool"
+# Parts larger than this are written to disk as they stream in instead of being kept in memory
+SPOOL_THRESHOLD = int(os.getenv("APP3_SPOOL_THRESHOLD_KB", "1024")) * 1024
+LIMITS_MB = {
+    "image": int(os.getenv("APP3_MAX_IMAGE_MB", "20")),
+    "animation": int(os.getenv("APP3_MAX_ANIMATION_MB", "50")),
+    "video": int(os.getenv("APP3_MAX_VIDEO_MB", "500")),
+}
+BATCH_MAX_MB = int(os.getenv("APP3_MAX_BATCH_MB", "4096"))
+# Room for the form fields and multipart framing around the file itself
+FORM_SLACK = 1024 * 1024
+MAX_REQUEST_BYTES = max(LIMITS_MB.values()) * 1048576 + FORM_SLACK
+BATCH_MAX_BYTES = BATCH_MAX_MB * 1048576
+SNIFF_BYTES = 32
+
+EXTENSION_KINDS = {
+    "png": "image", "jpg": "image", "jpeg": "image", "webp": "animation", "gif": "animation",
+    "mp4": "video", "mov": "video", "avi": "video", "mkv": "video", "webm": "video", "mpeg": "video", "mpg": "video",
+}
+
+
+class UploadRejected(Exception):
+    """An upload refused before decoding; status is the HTTP status to answer with."""
+    status = 400
+
+
+class UploadTooLarge(UploadRejected):
+    status = 413
+
+
+class UnsupportedMedia(UploadRejected):
+    status = 415
+
+
+def limit_bytes(kind):
+    return LIMITS_MB.get(kind, LIMITS_MB["image"]) * 1048576
+
+
+def declared_kind(filename, content_type=None):
+    """Media kind claimed by a part's filename or Content-Type header (checked later by sniff)."""
+    extension = filename.rsplit(".", 1)[1].lower() if filename and "." in filename else ""
+    if extension in EXTENSION_KINDS:
+        return EXTENSION_KINDS[extension]
+    if content_type and content_type.startswith("video/"):
+        return "video"
+    return "image"
+
+
+def sniff(head):
+    """(kind, mime type) from a file's first bytes, or (None, None) if it is not a supported format."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image", "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image", "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "animation", "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        # Extended WebP carries an animation flag in its VP8X header
+        animated = head[12:16] == b"VP8X" and len(head) > 20 and head[20] & 0x02
+        return ("animation" if animated else "image"), "image/webp"
+    if head[4:8] == b"ftyp":
+        return "video", "video/quicktime" if head[8:10] == b"qt" else "video/mp4"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "video", "video/webm" if b"webm" in head else "video/x-matroska"
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return "video", "video/x-msvideo"
+    if head[:4] in (b"\x00\x00\x01\xba", b"\x00\x00\x01\xb3"):
+        return "video", "video/mpeg"
+    return None, None
+
+
+def check_upload(stream, is_image=None):
+    """Sniff an upload's real type and enforce that type's size limit, before anything decodes it.
+
+    is_image is what the client claimed (None to accept either). Raises UnsupportedMedia or
+    UploadTooLarge, and returns (kind, mime type) otherwise.
+    """
+    stream.seek(0)
+    head = stream.read(SNIFF_BYTES)
+    size = stream.seek(0, io.SEEK_END)
+    stream.seek(0)
+    kind, mime_type = sniff(head)
+    if kind is None:
+        raise UnsupportedMedia("Unsupported or malformed file: expected a JPEG, PNG, GIF or WebP image or a video.")
+    if is_image is not None and is_image != (kind != "video"):
+        raise UnsupportedMedia(f"The file is {'a video' if kind == 'video' else 'an image'}, "
+                               f"but is_image was {'true' if is_image else 'false'}.")
+    if size > limit_bytes(kind):
+        raise UploadTooLarge(f"The {kind} is larger than the {LIMITS_MB[kind]} MB limit.")
+    return kind, mime_type
+
+
+class SpooledUpload:
+    """File object for one upload part: in memory up to SPOOL_THRESHOLD bytes, then a named file on disk.
+
+    Writes past `limit` bytes raise UploadTooLarge, so an oversized part is cut off as it streams in.
+    """
+
+    def __init__(self, limit, threshold=SPOOL_THRESHOLD):
+        self._file = io.BytesIO()
+        self.limit = limit
+        self.threshold = threshold
+        self.size = 0
+        self.path = None
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.limit:
+            raise UploadTooLarge(f"The upload is larger than the {self.limit // 1048576} MB limit for its type.")
+        if self.path is None and self.size > self.threshold:
+            directory = os.path.dirname(cache_store.cache_path(SPOOL_NAMESPACE, "spool"))
+            spooled = tempfile.NamedTemporaryFile(dir=directory, suffix=".upload", delete=False)
+            spooled.write(self._file.getvalue())
+            self._file, self.path = spooled, spooled.name
+        return self._file.write(data)
+
+    def close(self):
+        self._file.close()
+        if self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+    def __del__(self):
+        self.close()
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def source(stream):
+    """What to hand to preprocessing: the spool file's path once the upload is on disk, otherwise its bytes."""
+    if isinstance(stream, SpooledUpload) and stream.path:
+        stream.flush()
+        return stream.path
+    stream.seek(0)
+    return stream.read()
+
+
+class UploadRequest(Request):
+    """Flask request whose file parts are size-limited per media kind and spooled to disk when large."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        limit = limit_bytes(declared_kind(filename, content_type))
+        # Reject from the headers alone when the body cannot fit the limit for this part's type
+        if (content_length or total_content_length or 0) > limit + FORM_SLACK:
+            raise UploadTooLarge(f"The upload is larger than the {limit // 1048576} MB limit for its type.")
+        return SpooledUpload(limit)
@@ -1,14 +1,18 @@
 import streamlit as st
-import base64
+import io
 import vertexai
 from vertexai.generative_models import GenerativeModel, Part
 from PIL import Image
 import time
-import numpy as np
 import json
-import tempfile
 import os
 import traceback
+import pandas as pd
+
+import video_timeline
+import video_upload
+import video_proxy
+import tracing
 
 # Load credentials from Streamlit secrets and write to a file
 credentials_path = "/tmp/gcp_credentials.json"
@@ -33,21 +37,60 @@ os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = credentials_path
 # Initialize Vertex AI
 vertexai.init(project=st.secrets["gcp"]["project_id"], location="us-central1")
 
-def analyze_video(uploaded_video, prompt, temperature, top_p, max_tokens):
+def video_image_part(jpeg_bytes):
+    return Part.from_data(mime_type="image/jpeg", data=jpeg_bytes)
+
+def render_timeline(video_file, filename, prompt, model, generation_config, summarize=True):
+    """Shot-by-shot timeline analysis: chart the per-segment scores and optionally show the summary."""
+    # Frames are sampled from the cached low-resolution proxy instead of decoding the original
+    proxy = video_proxy.make_proxy(video_file, filename)
+    progress_bar = st.progress(0)
+    timeline = video_timeline.analyze_timeline(
+        model, proxy["path"], prompt,
+        image_part=video_image_part,
+        generation_config=generation_config,
+        on_segment=lambda done, total: progress_bar.progress(done / total),
+        summarize=summarize,
+    )
+
+    times, series = video_timeline.timeline_series(timeline["segments"])
+    st.line_chart(pd.DataFrame(series, index=pd.Index(times, name="Seconds")))
+    segments = pd.DataFrame([
+        {"Start (s)": round(segment["start"], 1), "End (s)": round(segment["end"], 1), "Emotion": segment.get("emotion"),
+         "Intensity": segment["intensity"], "Attention": segment["attention"],
+         "Text presence": segment["text_presence"], "Description": segment.get("description")}
+        for segment in timeline["segments"]
+    ])
+    st.dataframe(segments, use_container_width=True)
+    st.caption(f"{len(timeline['segments'])} segments, {timeline['calls']} model calls "
+               f"({sum(segment['cached'] for segment in timeline['segments'])} segments from cache)")
+    if timeline["summary"]:
+        st.markdown("### Timeline Summary:")
+        st.write(timeline["summary"])
+    return timeline
+
+def analyze_video(uploaded_video, prompt, temperature, top_p, max_tokens, use_proxy=True):
     try:
+        mime_type = getattr(uploaded_video, "type", None) or "video/mp4"
+        filename = getattr(uploaded_video, "name", "video.mp4")
         if isinstance(uploaded_video, bytes):
-            video_bytes = uploaded_video
-        else:
-            video_bytes = uploaded_video.read()
-        encoded_video = base64.b64encode(video_bytes).decode('utf-8')
+            uploaded_video = io.BytesIO(uploaded_video)
 
         progress_bar = st.progress(0)
         progress_info = st.info("Starting analysis... This might take a few moments.")
 
-        video_part = Part.from_data(
-            mime_type=uploaded_video.type,
-            data=base64.b64decode(encoded_video),
-        )
+        if use_proxy:
+            with st.spinner('Preparing a reduced proxy of the video...'):
+                proxy = video_proxy.make_proxy(uploaded_video, filename)
+            st.caption(video_proxy.describe_reduction(proxy))
+            with open(proxy["path"], "rb") as proxy_file:
+                video_part, ingestion = video_upload.video_part(proxy_file, "video/mp4", Part)
+        else:
+            # Pass the upload buffer (or a chunked upload's URI) straight to the SDK, no base64 round trip
+            video_part, ingestion = video_upload.video_part(uploaded_video, mime_type, Part)
+        if ingestion["mode"] == "inline-over-limit":
+            st.warning(f"This video is over the {video_upload.INLINE_LIMIT_MB:.0f} MB inline limit but no uploader "
+                       "is configured (VIDEO_UPLOADER), so it is sent inline and may be rejected.")
         text_part = prompt
 
         generation_config = {
@@ -60,32 +103,40 @@ def analyze_video(uploaded_video, prompt, temperature, top_p, max_tokens):
 
         start_time = time.time()
         with st.spinner('Analyzing the video... This might take a few moments.'):
-            responses = model.generate_content(
-                [video_part, text_part],
-                generation_config=generation_config,
-                safety_settings=[],
-                stream=True,
-            )
-
-            output_text = ""
-            placeholder = st.empty()
-            for i, response in enumerate(responses):
-                output_text += response.text
-                placeholder.text_area("Current Analysis", value=output_text, height=150)
-                progress = min((i + 1) / 10, 1.0)
-                progress_bar.progress(progress)
-                time.sleep(0.1)
+            with tracing.span("generate_content", model="gemini-2.5-flash", prompt_family="video_analysis",
+                              bytes=ingestion["size"], ingestion=ingestion["mode"]):
+                responses = model.generate_content(
+                    [video_part, text_part],
+                    generation_config=generation_config,
+                    safety_settings=[],
+                    stream=True,
+                )
+
+                output_text = ""
+                usage = None
+                placeholder = st.empty()
+                for i, response in enumerate(responses):
+                    output_text += response.text
+                    usage = getattr(response, "usage_metadata", None) or usage
+                    placeholder.text_area("Current Analysis", value=output_text, height=150)
+                    progress = min((i + 1) / 10, 1.0)
+                    progress_bar.progress(progress)
+                    time.sleep(0.1)
+                if usage:
+                    tracing.set_attributes(input_tokens=usage.prompt_token_count, output_tokens=usage.candidates_token_count)
 
             st.success("Analysis Complete!")
             end_time = time.time()
             st.info(f"The analysis took approximately {end_time - start_time:.2f} seconds.")
-            st.markdown("### Analysis Result:")
-            st.write(output_text)
+            st.caption(f"Video of {ingestion['size'] / (1024 * 1024):.1f} MB sent {ingestion['mode']}"
+                       + (f", {usage.prompt_token_count} prompt tokens" if usage else ""))
+            with tracing.span("render", characters=len(output_text)):
+                st.markdown("### Analysis Result:")
+                st.write(output_text)
 
             if "emotion" in prompt.lower():
                 st.markdown("### Emotional Intensity Over Time:")
-                emotional_intensity = np.random.rand(10)
-                st.line_chart(emotional_intensity)
+                render_timeline(uploaded_video, filename, prompt, model, generation_config, summarize=False)
 
             if st.button("💾 Save Analysis to File"):
                 with open("analysis_output.txt", "w") as f:
@@ -99,6 +150,7 @@ def analyze_video(uploaded_video, prompt, temperature, top_p, max_tokens):
 
 def main():
     st.set_page_config(page_title="Marketing Media Analysis AI Assistant", layout="wide")
+    tracing.setup("video")
     st.title("🧠 Marketing Media Analysis AI Assistant with Gemini-2.0-Flash")
 
     tab1, tab2 = st.tabs(["🖼️ Image Analysis", "🎥 Video Analysis"])
@@ -113,6 +165,10 @@ def main():
         temperature = st.sidebar.slider("Temperature", 0.0, 2.0, 1.0, 0.1)
         top_p = st.sidebar.slider("Top P", 0.0, 1.0, 0.95, 0.05)
         max_tokens = st.sidebar.slider("Max Output Tokens", 1000, 8192, 4096, 500)
+        use_proxy = st.sidebar.checkbox(
+            f"Analyze a {video_proxy.MAX_HEIGHT}p / {video_proxy.FPS:g} fps proxy", value=True,
+            help="Transcode the upload to a smaller proxy before sending it to the model (fewer bytes and tokens).",
+        )
 
         uploaded_video = st.file_uploader("Upload a video for analysis", type=["mp4", "mov", "avi", "mkv", "webm"], key="video")
         user_prompt = st.text_area("Enter your prompt for the video analysis", key="video_prompt")
@@ -122,7 +178,19 @@ def main():
 
         if uploaded_video and user_prompt:
             if st.button("Analyze Video"):
-                analyze_video(uploaded_video, user_prompt, temperature, top_p, max_tokens)
+                with video_upload.peak_memory() as peak, tracing.span("video.analyze", filename=uploaded_video.name):
+                    analyze_video(uploaded_video, user_prompt, temperature, top_p, max_tokens, use_proxy)
+                st.caption(f"Estimated peak Python heap for this request: {peak['peak_mb']:.1f} MB")
+            if st.button("📈 Analyze Timeline"):
+                try:
+                    with st.spinner('Analyzing the video shot by shot...'), tracing.span("video.timeline", filename=uploaded_video.name):
+                        render_timeline(
+                            uploaded_video, uploaded_video.name, user_prompt,
+                            GenerativeModel("gemini-2.5-flash"),
+                            {"max_output_tokens": max_tokens, "temperature": temperature, "top_p": top_p},
+                        )
+                except Exception as e:
+                    st.error(f"An error occurred: {str(e)}")
 
 if __name__ == "__main__":
     main()
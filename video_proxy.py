@@ -0,0 +1,147 @@
+import os
+import time
+import shutil
+import subprocess
+import cv2
+
+import cache_store
+import video_upload
+
+NAMESPACE = "video_proxies"
+MAX_HEIGHT = int(os.getenv("VIDEO_PROXY_MAX_HEIGHT", "720"))
+FPS = float(os.getenv("VIDEO_PROXY_FPS", "4"))
+VIDEO_BITRATE = os.getenv("VIDEO_PROXY_BITRATE", "1M")
+AUDIO_BITRATE = "64k"
+
+
+def _settings_key():
+    return f"{MAX_HEIGHT}p-{FPS:g}fps-{VIDEO_BITRATE}"
+
+
+def probe(path):
+    """Resolution, frame rate, frame count, duration and size of a video file."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise Exception(f"Failed to open video file {path}. Check if the file is corrupt or format is unsupported.")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    info = {
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": fps,
+        "frames": frames,
+        "duration": frames / fps if fps else 0.0,
+        "bytes": os.path.getsize(path),
+    }
+    cap.release()
+    return info
+
+
+def _ffmpeg_exe():
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return shutil.which("ffmpeg")
+
+
+def _transcode_ffmpeg(ffmpeg, source_path, proxy_path):
+    # Keep a low-bitrate audio track: music and voice-over matter for ad analysis
+    command = [
+        ffmpeg, "-y", "-loglevel", "error", "-i", source_path,
+        "-vf", f"fps={FPS:g},scale=-2:'min({MAX_HEIGHT},ih)'",
+        "-c:v", "libx264", "-preset", "veryfast", "-b:v", VIDEO_BITRATE, "-maxrate", VIDEO_BITRATE,
+        "-bufsize", VIDEO_BITRATE, "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", AUDIO_BITRATE, "-ac", "1",
+        "-movflags", "+faststart", proxy_path,
+    ]
+    subprocess.run(command, check=True, capture_output=True)
+
+
+def _transcode_opencv(source_path, proxy_path):
+    """Fallback without ffmpeg: drop frames and downscale with OpenCV (no audio, no bitrate cap)."""
+    cap = cv2.VideoCapture(source_path)
+    source_fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    scale = min(MAX_HEIGHT / float(height), 1.0) if height else 1.0
+    size = (int(width * scale) // 2 * 2, int(height * scale) // 2 * 2)
+    writer = cv2.VideoWriter(proxy_path, cv2.VideoWriter_fourcc(*"mp4v"), min(FPS, source_fps), size)
+    step = max(source_fps / FPS, 1.0)
+    index, next_kept = 0, 0.0
+    while cap.grab():
+        if index >= next_kept:
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            writer.write(cv2.resize(frame, size, interpolation=cv2.INTER_AREA) if scale < 1 else frame)
+            next_kept += step
+        index += 1
+    writer.release()
+    cap.release()
+
+
+def make_proxy(fileobj, filename="video.mp4"):
+    """Transcode an uploaded video to a small analysis proxy, cached per content hash.
+
+    The proxy is at most MAX_HEIGHT pixels high, FPS frames per second and VIDEO_BITRATE.
+    Returns a dict with the proxy "path", "source" and "proxy" probes, "transcode_seconds",
+    reduction "ratios" and whether it came from the cache.
+    """
+    key = f"{video_upload.stream_hash(fileobj)}-{_settings_key()}"
+    proxy_path = cache_store.cache_path(NAMESPACE, f"{key}.mp4")
+    cached = cache_store.read_json(NAMESPACE, key)
+    if cached is not None and os.path.exists(proxy_path):
+        return dict(cached, path=proxy_path, cached=True)
+
+    suffix = os.path.splitext(filename)[1] or ".mp4"
+    source_path = cache_store.cache_path(NAMESPACE, f"{key}.source{suffix}")
+    with open(source_path, "wb") as f:
+        fileobj.seek(0)
+        shutil.copyfileobj(fileobj, f, video_upload.CHUNK_SIZE)
+    fileobj.seek(0)
+    try:
+        source = probe(source_path)
+        start = time.time()
+        ffmpeg = _ffmpeg_exe()
+        tmp_path = f"{proxy_path}.part.mp4"
+        if ffmpeg:
+            _transcode_ffmpeg(ffmpeg, source_path, tmp_path)
+        else:
+            _transcode_opencv(source_path, tmp_path)
+        os.replace(tmp_path, proxy_path)
+        transcode_seconds = time.time() - start
+    finally:
+        os.remove(source_path)
+
+    proxy = probe(proxy_path)
+    info = {
+        "source": source,
+        "proxy": proxy,
+        "transcode_seconds": transcode_seconds,
+        "encoder": "ffmpeg" if ffmpeg else "opencv",
+        "ratios": reduction_ratios(source, proxy),
+    }
+    cache_store.write_json(NAMESPACE, key, info)
+    return dict(info, path=proxy_path, cached=False)
+
+
+def reduction_ratios(source, proxy):
+    """How many times smaller the proxy is in bytes, pixels per frame and frames."""
+    def ratio(a, b):
+        return a / b if b else None
+
+    return {
+        "bytes": ratio(source["bytes"], proxy["bytes"]),
+        "pixels": ratio(source["width"] * source["height"], proxy["width"] * proxy["height"]),
+        "frames": ratio(source["frames"], proxy["frames"]),
+    }
+
+
+def describe_reduction(info):
+    """One-line summary of a proxy for display."""
+    source, proxy, ratios = info["source"], info["proxy"], info["ratios"]
+    return (f"Proxy {proxy['width']}x{proxy['height']} @ {proxy['fps']:.0f} fps, {proxy['bytes'] / 1048576:.1f} MB "
+            f"(source {source['width']}x{source['height']} @ {source['fps']:.0f} fps, {source['bytes'] / 1048576:.1f} MB): "
+            f"{ratios['bytes'] or 0:.1f}x fewer bytes, {ratios['pixels'] or 0:.1f}x fewer pixels per frame, "
+            f"{ratios['frames'] or 0:.1f}x fewer frames"
+            + (" (cached)" if info.get("cached") else f", transcoded in {info['transcode_seconds']:.1f}s"))
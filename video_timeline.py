@@ -0,0 +1,215 @@
+import io
+import os
+import re
+import json
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+import cache_store
+import frame_decoder
+import metrics
+import tracing
+
+NAMESPACE = "video_segments"
+SAMPLE_FPS = 2.0
+SAMPLE_SIDE = 360
+SHOT_THRESHOLD = 0.45  # Bhattacharyya distance between HSV histograms that always counts as a cut
+# Smaller jumps count as a cut when they stand out from the recent frame-to-frame distances
+ADAPTIVE_MIN_DISTANCE = 0.15
+ADAPTIVE_RATIO = 4.0
+ADAPTIVE_WINDOW = 8
+MIN_SEGMENT_SECONDS = 1.0
+MAX_SEGMENTS = int(os.getenv("VIDEO_TIMELINE_MAX_SEGMENTS", "12"))
+KEYFRAMES_PER_SEGMENT = 3
+MAX_WORKERS = int(os.getenv("VIDEO_TIMELINE_MAX_WORKERS", "6"))
+PROMPT_VERSION = "1"
+
+SEGMENT_PROMPT = """These {count} frames come from one shot of a video or animated ad ({start:.1f}s to {end:.1f}s).
+Score the shot and respond with JSON only:
+{{"emotion": "<dominant emotion>", "valence": <-1 negative .. 1 positive>, "intensity": <0..1 emotional intensity>,
+"attention": <0..1 how attention-grabbing>, "text_presence": <0..1 share of the shot carrying on-screen text>,
+"description": "<one sentence>"}}"""
+
+SUMMARY_PROMPT = """You are given a shot-by-shot analysis of a video or animated ad as JSON (times in seconds).
+{segments}
+
+{user_prompt}
+
+Base your answer on the shot analysis. Describe how emotion, attention and on-screen text develop over time,
+identify the strongest and weakest moments by timestamp, and give concrete recommendations."""
+
+
+def default_image_part(jpeg_bytes):
+    """Image part in the google.generativeai dict format."""
+    return {"mime_type": "image/jpeg", "data": jpeg_bytes}
+
+
+def sample_frames(video_path, fps=SAMPLE_FPS, max_side=SAMPLE_SIDE):
+    """Decode about fps frames per second, downscaled, in parallel worker processes.
+
+    Returns (times, frames) with frames as RGB uint8 arrays.
+    """
+    total, source_fps, _, _ = frame_decoder.probe(video_path)
+    step = max(int(round(source_fps / fps)), 1)
+    indices, frames = frame_decoder.decode_frames(video_path, range(0, total, step), max_side=max_side)
+    if not indices:
+        raise Exception("No frames were extracted, possibly due to an error in reading the video.")
+    return [index / source_fps for index in indices], list(frames)
+
+
+def _histogram(frame):
+    hsv = cv2.cvtColor(frame, cv2.COLOR_RGB2HSV)
+    histogram = cv2.calcHist([hsv], [0, 1], None, [16, 8], [0, 180, 0, 256])
+    return cv2.normalize(histogram, histogram).astype(np.float32)
+
+
+def detect_shots(times, frames, threshold=SHOT_THRESHOLD):
+    """Split sampled frames into shots at large colour histogram changes.
+
+    Returns a list of (first_index, last_index) pairs into the sampled frames.
+    """
+    histograms = [_histogram(frame) for frame in frames]
+    distances = [0.0] + [cv2.compareHist(histograms[i - 1], histograms[i], cv2.HISTCMP_BHATTACHARYYA)
+                         for i in range(1, len(frames))]
+    cuts = [0]
+    for i in range(1, len(frames)):
+        recent = np.median(distances[max(i - ADAPTIVE_WINDOW, 1):i]) if i > 1 else distances[i]
+        is_cut = distances[i] > threshold or (
+            distances[i] > ADAPTIVE_MIN_DISTANCE and distances[i] > ADAPTIVE_RATIO * recent)
+        if is_cut and times[i] - times[cuts[-1]] >= MIN_SEGMENT_SECONDS:
+            cuts.append(i)
+    return [(start, end - 1) for start, end in zip(cuts, cuts[1:] + [len(frames)])]
+
+
+def bound_segments(segments, times, max_segments=MAX_SEGMENTS):
+    """Merge the shortest shot into its shorter neighbour until at most max_segments remain."""
+    segments = list(segments)
+
+    def duration(segment):
+        return times[segment[1]] - times[segment[0]]
+
+    while len(segments) > max_segments:
+        i = min(range(len(segments)), key=lambda j: duration(segments[j]))
+        if i == 0:
+            j = 1
+        elif i == len(segments) - 1:
+            j = i - 1
+        else:
+            j = i - 1 if duration(segments[i - 1]) <= duration(segments[i + 1]) else i + 1
+        first, second = sorted((i, j))
+        segments[first:second + 1] = [(segments[first][0], segments[second][1])]
+    return segments
+
+
+def _jpeg(frame, quality=85):
+    buffer = io.BytesIO()
+    Image.fromarray(frame).save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def _parse_json(text):
+    return json.loads(re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip()))
+
+
+def _score(value, low):
+    try:
+        return float(np.clip(float(value or 0), low, 1))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def normalize_segment(result):
+    """Every field the timeline reads, with defaults for whatever the model's JSON left out."""
+    result = result if isinstance(result, dict) else {}
+    normalized = dict(result, emotion=str(result.get("emotion") or "unknown"),
+                      description=str(result.get("description") or ""))
+    for field in ("valence", "intensity", "attention", "text_presence"):
+        normalized[field] = _score(result.get(field), -1 if field == "valence" else 0)
+    return normalized
+
+
+def analyze_segment(model, keyframes, start, end, image_part=default_image_part, generation_config=None):
+    """Score one segment with a single multi-frame call, cached per segment hash."""
+    jpegs = [_jpeg(frame) for frame in keyframes]
+    key = cache_store.content_hash(PROMPT_VERSION.encode() + b"".join(jpegs))
+    cached = cache_store.read_json(NAMESPACE, key)
+    if cached is not None:
+        return dict(normalize_segment(cached), start=start, end=end, cached=True)
+
+    prompt = SEGMENT_PROMPT.format(count=len(jpegs), start=start, end=end)
+    response = metrics.generate(model, [prompt] + [image_part(jpeg) for jpeg in jpegs], "video_segment",
+                                generation_config=generation_config)
+    with metrics.stage("video_segment", "parse"):
+        try:
+            result = normalize_segment(_parse_json(response.text))
+        except ValueError:
+            # Keep the rest of the timeline; an unreadable answer is not cached so it is retried next time
+            return dict(normalize_segment({"description": "The model's answer for this segment could not be parsed."}),
+                        start=start, end=end, cached=False)
+    cache_store.write_json(NAMESPACE, key, result)
+    return dict(result, start=start, end=end, cached=False)
+
+
+def analyze_timeline(model, video_path, user_prompt, image_part=default_image_part, generation_config=None,
+                     max_segments=MAX_SEGMENTS, on_segment=None, summarize=True):
+    """Map: score every shot concurrently. Reduce: one summary call over the shot results.
+
+    Uses at most max_segments + 1 model calls. Returns {"segments": [...], "summary": str or None, "calls": int}.
+    on_segment(done, total) is called from the calling thread as segments finish.
+    """
+    with metrics.stage("video_timeline", "decode"):
+        times, frames = sample_frames(video_path)
+    return analyze_frames(model, times, frames, user_prompt, image_part, generation_config,
+                          max_segments, on_segment, summarize)
+
+
+def analyze_frames(model, times, frames, user_prompt, image_part=default_image_part, generation_config=None,
+                   max_segments=MAX_SEGMENTS, on_segment=None, summarize=True):
+    """analyze_timeline on already sampled (times, RGB frames), e.g. from an animated image."""
+    segments = bound_segments(detect_shots(times, frames), times, max_segments)
+    duration_step = 1.0 / SAMPLE_FPS
+
+    jobs = []
+    for first, last in segments:
+        picks = np.unique(np.linspace(first, last, KEYFRAMES_PER_SEGMENT).round().astype(int))
+        jobs.append(([frames[i] for i in picks], times[first], times[last] + duration_step))
+
+    results = [None] * len(jobs)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        segment_call = tracing.wrap(analyze_segment)
+        futures = [executor.submit(segment_call, model, keyframes, start, end, image_part, generation_config)
+                   for keyframes, start, end in jobs]
+        for done, future in enumerate(futures, start=1):
+            results[done - 1] = future.result()
+            if on_segment:
+                on_segment(done, len(futures))
+
+    calls = sum(1 for result in results if not result["cached"])
+    compact = [{key: result.get(key) for key in ("start", "end", "emotion", "valence", "intensity", "attention",
+                                              "text_presence", "description")} for result in results]
+    if not summarize:
+        return {"segments": results, "summary": None, "calls": calls}
+    summary = metrics.generate(
+        model, SUMMARY_PROMPT.format(segments=json.dumps(compact, indent=1), user_prompt=user_prompt), "video_summary",
+        generation_config=generation_config,
+    ).text
+    return {"segments": results, "summary": summary, "calls": calls + 1}
+
+
+def timeline_series(segments, step=0.5):
+    """Resample segment scores onto a regular time grid for charting.
+
+    Returns (times, {"Emotional intensity": [...], "Attention": [...], "Text presence": [...], "Valence": [...]}).
+    """
+    end = max(segment["end"] for segment in segments)
+    grid = np.arange(0, end, step)
+    series = {name: np.zeros_like(grid) for name in ("Emotional intensity", "Attention", "Text presence", "Valence")}
+    for segment in segments:
+        inside = (grid >= segment["start"]) & (grid < segment["end"])
+        series["Emotional intensity"][inside] = segment["intensity"]
+        series["Attention"][inside] = segment["attention"]
+        series["Text presence"][inside] = segment["text_presence"]
+        series["Valence"][inside] = segment["valence"]
+    return grid, series
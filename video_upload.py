@@ -0,0 +1,135 @@
+import os
+import shutil
+import hashlib
+import logging
+import tracemalloc
+from contextlib import contextmanager
+
+import cache_store
+
+# Uploads larger than this are sent by reference (resumable chunked upload) instead of inline
+INLINE_LIMIT_MB = float(os.getenv("VIDEO_INLINE_LIMIT_MB", "20"))
+CHUNK_SIZE = 8 * 1024 * 1024  # multiple of 256 KiB, as resumable uploads require
+UPLOAD_BUCKET = os.getenv("VIDEO_UPLOAD_BUCKET", "")
+UPLOADER = os.getenv("VIDEO_UPLOADER", "gcs" if UPLOAD_BUCKET else "")
+
+logger = logging.getLogger(__name__)
+
+
+def file_size(fileobj):
+    """Size of a seekable file object without reading it."""
+    position = fileobj.tell()
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(position)
+    return size
+
+
+def stream_hash(fileobj, chunk_size=CHUNK_SIZE):
+    """SHA-256 of a file object, read in chunks so the whole file is never copied."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def inline_bytes(fileobj):
+    """The upload as bytes for an inline part, without extra copies.
+
+    BytesIO-backed uploads (Streamlit's UploadedFile) hand back their internal buffer from
+    getvalue() without copying it; anything else is read once.
+    """
+    if hasattr(fileobj, "getvalue"):
+        return fileobj.getvalue()
+    fileobj.seek(0)
+    return fileobj.read()
+
+
+class GCSUploader:
+    """Resumable chunked upload to Cloud Storage; the model reads the video from its gs:// URI."""
+
+    def __init__(self, bucket=UPLOAD_BUCKET, prefix="video-uploads"):
+        from google.cloud import storage
+        self.bucket = storage.Client().bucket(bucket)
+        self.prefix = prefix
+
+    def upload(self, fileobj, key, mime_type, size):
+        blob = self.bucket.blob(f"{self.prefix}/{key}")
+        if not blob.exists():
+            blob.chunk_size = CHUNK_SIZE  # setting a chunk size makes the client use a resumable session
+            fileobj.seek(0)
+            blob.upload_from_file(fileobj, size=size, content_type=mime_type)
+        return f"gs://{self.bucket.name}/{blob.name}"
+
+
+class LocalUploader:
+    """Stand-in for GCSUploader that copies the video chunk by chunk into the local cache."""
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(cache_store.CACHE_ROOT, "video_uploads")
+        os.makedirs(self.directory, exist_ok=True)
+
+    def upload(self, fileobj, key, mime_type, size):
+        path = os.path.join(self.directory, key)
+        if not os.path.exists(path):
+            fileobj.seek(0)
+            tmp_path = f"{path}.part"
+            with open(tmp_path, "wb") as f:
+                shutil.copyfileobj(fileobj, f, CHUNK_SIZE)
+            os.replace(tmp_path, path)
+        return f"file://{os.path.abspath(path)}"
+
+
+def get_uploader():
+    """The configured uploader (VIDEO_UPLOADER=gcs|local), or None if large videos are sent inline."""
+    if UPLOADER == "gcs":
+        return GCSUploader()
+    if UPLOADER == "local":
+        return LocalUploader()
+    return None
+
+
+def video_part(fileobj, mime_type, part_cls, uploader=None, inline_limit_mb=INLINE_LIMIT_MB):
+    """Build a model part for an uploaded video without base64 round trips.
+
+    Small videos are passed inline straight from the upload buffer; larger ones are uploaded in
+    chunks by the uploader and passed by URI. part_cls is the SDK Part class (from_data/from_uri).
+    Returns (part, info) where info describes the path taken; its mode is "inline-over-limit" when
+    a large video had to be sent inline because no uploader is configured.
+    """
+    size = file_size(fileobj)
+    if size <= inline_limit_mb * 1024 * 1024:
+        return part_cls.from_data(mime_type=mime_type, data=inline_bytes(fileobj)), {"mode": "inline", "size": size}
+    uploader = uploader if uploader is not None else get_uploader()
+    if uploader is None:
+        logger.warning("Video of %.1f MB is over the %.0f MB inline limit but no uploader is configured "
+                       "(set VIDEO_UPLOADER); sending it inline", size / (1024 * 1024), inline_limit_mb)
+        return part_cls.from_data(mime_type=mime_type, data=inline_bytes(fileobj)), {"mode": "inline-over-limit", "size": size}
+    uri = uploader.upload(fileobj, stream_hash(fileobj), mime_type, size)
+    return part_cls.from_uri(uri=uri, mime_type=mime_type), {"mode": "uploaded", "size": size, "uri": uri}
+
+
+@contextmanager
+def peak_memory():
+    """Estimate the peak Python heap allocated inside the block.
+
+    Yields a dict whose "peak_mb" is filled in when the block exits. This is a tracemalloc figure:
+    it only sees Python allocations (not buffers copied by native code such as the SDK's protobuf
+    serialization), and tracing is process-wide, so concurrent sessions add to each other's peak.
+    Treat it as an indication, not the process RSS.
+    """
+    result = {"peak_mb": None}
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    try:
+        yield result
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        result["peak_mb"] = (peak - baseline) / (1024 * 1024)
+        if started:
+            tracemalloc.stop()
@@ -0,0 +1,144 @@
+import time
+import cv2
+import numpy as np
+
+# Images are measured at this maximum side length; every metric is scale-independent
+ANALYSIS_SIZE = 512
+PALETTE_LEVELS = 8  # quantization levels per channel for the palette entropy
+
+
+def to_rgb_array(image, max_side=ANALYSIS_SIZE):
+    """Convert a PIL image to an RGB uint8 array no larger than max_side."""
+    rgb = np.asarray(image.convert("RGB"))
+    height, width = rgb.shape[:2]
+    scale = max_side / float(max(height, width))
+    if scale < 1:
+        rgb = cv2.resize(rgb, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+    return rgb
+
+
+def colourfulness(rgb):
+    """Hasler–Süsstrunk colourfulness (0 = greyscale, ~100+ = extremely colourful)."""
+    r, g, b = [channel.astype(np.float32) for channel in np.moveaxis(rgb, -1, 0)]
+    rg = r - g
+    yb = 0.5 * (r + g) - b
+    return float(np.hypot(rg.std(), yb.std()) + 0.3 * np.hypot(rg.mean(), yb.mean()))
+
+
+def rms_contrast(gray):
+    """Standard deviation of normalized luminance (0–0.5)."""
+    return float((gray.astype(np.float32) / 255.0).std())
+
+
+def edge_density(gray):
+    """Fraction of pixels on a Canny edge, with thresholds derived from the median intensity."""
+    median = float(np.median(gray))
+    edges = cv2.Canny(gray, int(max(0, 0.66 * median)), int(min(255, 1.33 * median)))
+    return float(np.count_nonzero(edges)) / edges.size
+
+
+def detect_text_regions(gray):
+    """Find text-like regions with a morphological gradient and horizontal closing.
+
+    Returns a list of (x, y, w, h) boxes in the coordinates of the given array.
+    """
+    height, width = gray.shape
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    connected = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1)))
+    contours, _ = cv2.findContours(connected, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h < 6 or h > 0.3 * height or w < 1.5 * h:
+            continue
+        filled = cv2.countNonZero(binary[y:y + h, x:x + w]) / float(w * h)
+        if 0.2 <= filled <= 0.9:  # strokes, not solid blocks or stray lines
+            boxes.append((x, y, w, h))
+    return boxes
+
+
+def text_region_ratio(gray, boxes=None):
+    """Fraction of the canvas covered by text-like regions."""
+    boxes = detect_text_regions(gray) if boxes is None else boxes
+    mask = np.zeros(gray.shape, dtype=bool)
+    for x, y, w, h in boxes:
+        mask[y:y + h, x:x + w] = True
+    return float(mask.mean())
+
+
+def palette_entropy(rgb, levels=PALETTE_LEVELS):
+    """Normalized Shannon entropy of the quantized colour histogram (0 = one colour, 1 = uniform)."""
+    quantized = (rgb.astype(np.uint16) * levels // 256).reshape(-1, 3)
+    codes = quantized[:, 0] * levels * levels + quantized[:, 1] * levels + quantized[:, 2]
+    counts = np.bincount(codes, minlength=levels ** 3).astype(np.float64)
+    p = counts[counts > 0] / counts.sum()
+    return float(-(p * np.log2(p)).sum() / np.log2(levels ** 3))
+
+
+def focus_measure(gray):
+    """Centre of mass of gradient energy and how concentrated it is.
+
+    Returns (offset, spread): offset is the distance of the centre of mass from the image centre,
+    spread the weighted standard distance around it, both relative to the half-diagonal.
+    """
+    gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+    weight = np.hypot(gx, gy)
+    total = float(weight.sum())
+    height, width = gray.shape
+    half_diagonal = 0.5 * np.hypot(width, height)
+    if total == 0:
+        return 0.0, 1.0
+    ys, xs = np.indices(gray.shape, dtype=np.float32)
+    cx, cy = float((weight * xs).sum() / total), float((weight * ys).sum() / total)
+    offset = np.hypot(cx - width / 2.0, cy - height / 2.0) / half_diagonal
+    spread = np.sqrt(float((weight * ((xs - cx) ** 2 + (ys - cy) ** 2)).sum() / total)) / half_diagonal
+    return float(offset), float(spread)
+
+
+def compute_metrics(image):
+    """Measure an image locally. Returns a dict of metrics plus the time it took in milliseconds."""
+    start = time.perf_counter()
+    rgb = to_rgb_array(image)
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    boxes = detect_text_regions(gray)
+    offset, spread = focus_measure(gray)
+    metrics = {
+        "colourfulness": colourfulness(rgb),
+        "rms_contrast": rms_contrast(gray),
+        "edge_density": edge_density(gray),
+        "text_region_ratio": text_region_ratio(gray, boxes),
+        "text_regions": len(boxes),
+        "palette_entropy": palette_entropy(rgb),
+        "focus_offset": offset,
+        "focus_spread": spread,
+    }
+    metrics["elapsed_ms"] = (time.perf_counter() - start) * 1000.0
+    return metrics
+
+
+def label_metrics(metrics):
+    """Map measurements onto the attribute vocabulary used by the basic analysis."""
+    return {
+        "text_amount": "High" if metrics["text_region_ratio"] > 0.15 else "Low",
+        "color_usage": "Colourful" if metrics["colourfulness"] > 45 else "Muted",
+        "visual_cues": "Strong" if metrics["rms_contrast"] > 0.22 and metrics["edge_density"] > 0.05 else "Weak",
+        "focus": "Central message" if metrics["focus_offset"] < 0.15 and metrics["focus_spread"] < 0.45 else "Scattered",
+    }
+
+
+def describe_metrics(metrics):
+    """Render the metrics as prompt context for the model."""
+    labels = label_metrics(metrics)
+    return (
+        "Locally measured visual metrics (use them as ground truth instead of estimating these properties):\n"
+        f"- Colourfulness (Hasler–Süsstrunk): {metrics['colourfulness']:.1f} ({labels['color_usage']})\n"
+        f"- RMS contrast: {metrics['rms_contrast']:.3f}\n"
+        f"- Edge density: {metrics['edge_density']:.3f}\n"
+        f"- Text-region ratio: {metrics['text_region_ratio']:.1%} of the canvas in {metrics['text_regions']} regions "
+        f"(text amount {labels['text_amount']})\n"
+        f"- Palette entropy: {metrics['palette_entropy']:.2f} (0 = single colour, 1 = uniform spread)\n"
+        f"- Focus: centre of mass {metrics['focus_offset']:.2f} from centre, spread {metrics['focus_spread']:.2f} "
+        f"({labels['focus']})\n"
+    )